@@ -0,0 +1,445 @@
+"""
+Build step for the frontend's JS/CSS bundles and web fonts.
+
+Each page loads its own script plus app.js, and every page loads style.css.
+build_assets() concatenates and minifies each bundle in ASSET_BUNDLES into a
+content-hashed file under ASSET_BUILD_DIR, subsets the fonts that style.css
+references to the characters the site can display, and records the output
+names in a manifest.json next to them. The {% bundle %} tag emits one tag per
+bundle from the manifest. With no manifest, or with ASSET_USE_BUNDLES off
+(for frontend work), it emits the source files one by one as before.
+
+Minification uses rjsmin/rcssmin when they are installed. Otherwise a
+conservative built-in pass drops comments and indentation but keeps line
+breaks, so automatic semicolon insertion behaves exactly as in the source.
+Font subsetting needs fontTools (and brotli for woff2 output); without it
+the original fonts are referenced unchanged. All four are listed in
+requirements-optional.txt.
+
+Bundle names are already fingerprinted with the same hash that
+core.staticserve uses, so they are served as immutable under their own name.
+Run build_assets before collectstatic.
+"""
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+# {bundle name: static names of its sources, in load order}. Page scripts ran
+# before app.js in the templates, so each page bundle keeps that order.
+BUNDLES = {
+    'site.css': ['frontend/css/style.css'],
+    'site.js': ['frontend/js/app.js'],
+    'game.js': ['frontend/js/game.js', 'frontend/js/app.js'],
+    'login.js': ['frontend/js/login.js', 'frontend/js/app.js'],
+    'start.js': ['frontend/js/start.js', 'frontend/js/app.js'],
+    'store.js': ['frontend/js/store.js', 'frontend/js/app.js'],
+}
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Same fingerprint length as core.staticserve
+HASH_LENGTH = 12
+
+# Text from players, fish names and chatbot replies is only known at runtime,
+# so fonts always keep printable ASCII and Latin-1 on top of what the sources use
+BASE_CHARACTERS = ''.join(map(chr, range(0x20, 0x7f))) + ''.join(map(chr, range(0xa0, 0x100)))
+
+FONT_EXTENSIONS = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': None, '.otf': None}
+
+_url_re = re.compile(r'''url\(\s*(['"]?)([^'")]+?)\1\s*\)''')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def bundles():
+    return _setting('ASSET_BUNDLES', BUNDLES)
+
+
+def build_dir():
+    """Directory the bundles are written to; must be inside a STATICFILES_DIRS entry."""
+    return Path(_setting('ASSET_BUILD_DIR', Path(settings.BASE_DIR) / 'frontend' / 'static' / 'frontend' / 'dist'))
+
+
+def build_prefix():
+    """Static name prefix of build_dir(), e.g. 'frontend/dist'."""
+    directory = build_dir().resolve()
+    for entry in settings.STATICFILES_DIRS:
+        prefix, root = entry if isinstance(entry, (list, tuple)) else ('', entry)
+        root = Path(root).resolve()
+        if directory == root or root in directory.parents:
+            return posixpath.join(prefix, directory.relative_to(root).as_posix()).strip('/')
+    raise ValueError(f'ASSET_BUILD_DIR {directory} is not inside STATICFILES_DIRS')
+
+
+def fingerprint(data):
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, data):
+    base, ext = posixpath.splitext(name)
+    return f'{base}.{fingerprint(data)}{ext}'
+
+
+def read_source(name):
+    path = finders.find(name)
+    if path is None:
+        raise FileNotFoundError(f'Static file {name} not found')
+    return Path(path).read_text(encoding='utf-8')
+
+
+# --- JavaScript ---------------------------------------------------------
+
+# After these keywords a slash starts a regex literal, not a division
+_REGEX_KEYWORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'instanceof',
+    'yield', 'await',
+}
+
+_WORD = re.compile(r'[\w$\\]')
+
+
+def _is_word(char):
+    return bool(char) and (bool(_WORD.match(char)) or ord(char) > 0x7f)
+
+
+def _skip_string(source, start):
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote or char == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_regex(source, start):
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return i
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '/':
+            i += 1
+            while i < len(source) and _is_word(source[i]):
+                i += 1  # flags
+            return i
+        i += 1
+    return i
+
+
+def _skip_template(source, start):
+    """End of the template literal at start, including any ${...} inside it."""
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            return i + 1
+        if source.startswith('${', i):
+            i = _skip_code(source, i + 2)
+            continue
+        i += 1
+    return i
+
+
+def _skip_code(source, start):
+    """End of a ${...} expression starting at start (just past the closing brace)."""
+    depth = 0
+    i = start
+    while i < len(source):
+        char = source[i]
+        if char in '"\'':
+            i = _skip_string(source, i)
+            continue
+        if char == '`':
+            i = _skip_template(source, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0:
+                return i + 1
+            depth -= 1
+        i += 1
+    return i
+
+
+def _regex_allowed(previous):
+    """Whether a slash after the token previous starts a regex literal."""
+    if not previous:
+        return True
+    if _is_word(previous[0]):
+        return previous in _REGEX_KEYWORDS
+    # After a value (string, template, regex or closing bracket) it is a division
+    return len(previous) == 1 and previous not in ')]\'"`'
+
+
+def _fallback_js(source):
+    """Drop comments and indentation; whitespace runs become one space or one newline."""
+    out = []
+    i = 0
+    n = len(source)
+    previous = ''  # last token emitted
+    pending = ''  # whitespace owed before the next token: '', ' ' or '\n'
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n\f\v\ufeff':
+            pending = '\n' if char == '\n' or pending == '\n' else (pending or ' ')
+            i += 1
+            continue
+        if char == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if char == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            pending = '\n' if '\n' in source[i:end] or pending == '\n' else (pending or ' ')
+            i = end
+            continue
+
+        if char in '"\'':
+            end = _skip_string(source, i)
+        elif char == '`':
+            end = _skip_template(source, i)
+        elif char == '/' and _regex_allowed(previous):
+            end = _skip_regex(source, i)
+        elif _is_word(char):
+            end = i + 1
+            while end < n and _is_word(source[end]):
+                end += 1
+        else:
+            end = i + 1
+        token = source[i:end]
+
+        if previous and pending:
+            last = previous[-1]
+            if pending == '\n' and last not in '{;,([' and token[0] not in '}])':
+                out.append('\n')
+            elif (_is_word(last) and _is_word(token[0])) or (last in '+-/' and token[0] == last):
+                out.append(' ')
+        pending = ''
+        out.append(token)
+        previous = token
+        i = end
+    return ''.join(out) + '\n'
+
+
+def minify_js(source):
+    try:
+        import rjsmin
+    except ImportError:
+        return _fallback_js(source)
+    return rjsmin.jsmin(source) + '\n'
+
+
+# --- CSS ----------------------------------------------------------------
+
+_css_tokens = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)''', re.S)
+
+
+def _fallback_css(source):
+    strings = []
+
+    def protect(match):
+        token = match.group(0)
+        if token.startswith('/*'):
+            return ' '
+        strings.append(token)
+        return f'\0{len(strings) - 1}\0'
+
+    css = _css_tokens.sub(protect, source)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r'\s*:\s*(?=[^{}]*[;}])', ':', css)  # declarations only, not selector pseudo-classes
+    css = css.replace(';}', '}')
+    css = re.sub('\0(\\d+)\0', lambda match: strings[int(match.group(1))], css)
+    return css.strip() + '\n'
+
+
+def minify_css(source):
+    try:
+        import rcssmin
+    except ImportError:
+        return _fallback_css(source)
+    return rcssmin.cssmin(source) + '\n'
+
+
+def rebase_css_urls(source, source_name, target_dir, replacements=None):
+    """Rewrite relative url()s in a stylesheet moving from source_name's directory to target_dir.
+
+    replacements maps static names (e.g. a font) to the name to reference instead.
+    """
+    replacements = replacements or {}
+    source_dir = posixpath.dirname(source_name)
+
+    def rewrite(match):
+        url = match.group(2).strip()
+        if url.startswith(('data:', '/', '#')) or '://' in url:
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+        name = posixpath.normpath(posixpath.join(source_dir, path))
+        name = replacements.get(name, name)
+        return f'url("{posixpath.relpath(name, target_dir)}{suffix}")'
+
+    return _url_re.sub(rewrite, source)
+
+
+def css_urls(source, source_name):
+    """Static names of the relative url()s in a stylesheet."""
+    names = []
+    for match in _url_re.finditer(source):
+        url = match.group(2).strip()
+        if url.startswith(('data:', '/', '#')) or '://' in url:
+            continue
+        names.append(posixpath.normpath(posixpath.join(posixpath.dirname(source_name), re.match(r'[^?#]*', url).group())))
+    return names
+
+
+# --- Fonts --------------------------------------------------------------
+
+def font_characters():
+    """Characters fonts must keep: BASE_CHARACTERS plus everything in the templates and scripts."""
+    from django.template.loader import get_template
+
+    from core import warmup
+
+    characters = set(BASE_CHARACTERS)
+    for name in warmup.template_names():
+        characters.update(get_template(name).template.source)
+    for sources in bundles().values():
+        for name in sources:
+            characters.update(read_source(name))
+    return ''.join(sorted(char for char in characters if char.isprintable()))
+
+
+def subset_font(path, text):
+    """Return the font at path cut down to text in its own format, or None if that is not possible here."""
+    try:
+        from fontTools import subset
+    except ImportError:
+        return None
+    options = subset.Options()
+    options.flavor = FONT_EXTENSIONS.get(Path(path).suffix.lower())
+    options.layout_features = ['*']
+    font = subset.load_font(str(path), options)
+    subsetter = subset.Subsetter(options=options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    try:
+        subset.save_font(font, buffer, options)
+    except ImportError:
+        return None  # woff2 output needs brotli
+    return buffer.getvalue()
+
+
+# --- Manifest -----------------------------------------------------------
+
+def manifest_path():
+    return build_dir() / MANIFEST_NAME
+
+
+def read_manifest(path=None):
+    path = Path(path or manifest_path())
+    try:
+        manifest = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def _write(directory, name, data):
+    target = directory / posixpath.basename(name)
+    if not target.exists():
+        temporary = target.with_name(target.name + '.tmp')
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+
+
+def build_assets(minify=True, subset_fonts=True):
+    """Write every bundle, font subset and the manifest; returns the manifest."""
+    directory = build_dir()
+    prefix = build_prefix()
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {'version': MANIFEST_VERSION, 'bundles': {}, 'fonts': {}}
+
+    fonts = {}
+    if subset_fonts:
+        text = None
+        for bundle, sources in bundles().items():
+            if not bundle.endswith('.css'):
+                continue
+            for source_name in sources:
+                for name in css_urls(read_source(source_name), source_name):
+                    if Path(name).suffix.lower() not in FONT_EXTENSIONS or name in fonts:
+                        continue
+                    path = finders.find(name)
+                    if path is None:
+                        continue
+                    text = font_characters() if text is None else text
+                    data = subset_font(path, text)
+                    original = os.path.getsize(path)
+                    if data is None or len(data) >= original:
+                        continue
+                    fonts[name] = hashed_name(posixpath.join(prefix, posixpath.basename(name)), data)
+                    _write(directory, fonts[name], data)
+                    manifest['fonts'][name] = {'name': fonts[name], 'size': len(data), 'original_size': original}
+
+    for bundle, sources in bundles().items():
+        parts = []
+        for source_name in sources:
+            source = read_source(source_name)
+            if bundle.endswith('.css'):
+                source = rebase_css_urls(source, source_name, prefix, fonts)
+                parts.append(minify_css(source) if minify else source)
+            else:
+                # A leading ; keeps a source ending without one from running into the next
+                parts.append(';' + (minify_js(source) if minify else source))
+        data = '\n'.join(parts).encode('utf-8')
+        name = hashed_name(posixpath.join(prefix, bundle), data)
+        _write(directory, name, data)
+        manifest['bundles'][bundle] = {
+            'name': name,
+            'sources': list(sources),
+            'size': len(data),
+            'source_size': sum(os.path.getsize(finders.find(source)) for source in sources),
+        }
+
+    # Keep the previous build's files for pages rendered before it was replaced
+    previous = read_manifest() or {'bundles': {}, 'fonts': {}}
+    keep = {MANIFEST_NAME}
+    for build in (manifest, previous):
+        keep.update(posixpath.basename(entry['name']) for key in ('bundles', 'fonts') for entry in build[key].values())
+    for path in directory.iterdir():
+        if path.is_file() and path.name not in keep:
+            path.unlink()
+
+    temporary = manifest_path().with_suffix('.tmp')
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(temporary, manifest_path())
+    return manifest
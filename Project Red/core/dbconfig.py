@@ -0,0 +1,116 @@
+"""
+SQLite connection configuration for running the game on a single database file.
+
+``sqlite()`` builds a DATABASES entry with persistent connections and
+``BEGIN IMMEDIATE`` transactions, and every new SQLite connection gets the
+pragmas in SQLITE_PRAGMAS applied through the connection_created signal:
+
+- ``journal_mode=WAL`` lets readers run while a write is in progress.
+- ``synchronous=NORMAL`` is durable across application crashes under WAL,
+  and only fsyncs at checkpoints.
+- ``busy_timeout`` makes a connection wait for the write lock instead of
+  failing straight away with "database is locked".
+- ``mmap_size`` and ``cache_size`` keep hot pages in memory.
+
+Immediate transactions matter as much as the timeout. A deferred
+transaction that reads first and then writes cannot wait for the lock once
+another writer has committed; SQLite fails it at once.
+
+GameplayReadRouter optionally sends reads of gameplay models to a separate
+READ_ALIAS connection (opened with query_only) so leaderboard and state
+reads never queue behind a connection that is busy writing. Reads inside a
+transaction on the default connection stay there, so writers always see
+their own changes.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Alias of the optional read connection used by GameplayReadRouter
+READ_ALIAS = 'gameplay_read'
+
+# Apps whose read queries GameplayReadRouter may move to READ_ALIAS
+READ_APPS = frozenset({'gameplay'})
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,             # milliseconds
+    'mmap_size': 256 * 1024 * 1024,   # bytes
+    'cache_size': -20000,             # negative means KiB, so about 20 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_pragmas(alias=None):
+    """The pragmas applied to new connections for an alias; SQLITE_PRAGMAS overrides the defaults."""
+    pragmas = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    if alias == READ_ALIAS:
+        pragmas['query_only'] = 'ON'
+    return pragmas
+
+
+def sqlite(name, read_only=False, conn_max_age=600):
+    """
+    Return a DATABASES entry for a SQLite file.
+
+    read_only entries mirror the default database in tests and keep
+    deferred transactions, since they never need the write lock.
+    """
+    entry = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if read_only:
+        entry['TEST'] = {'MIRROR': 'default'}
+    else:
+        entry['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    return entry
+
+
+@receiver(connection_created, dispatch_uid='core_sqlite_pragmas')
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Configure every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in sqlite_pragmas(connection.alias).items():
+            if pragma == 'journal_mode' and connection.is_in_memory_db():
+                continue  # in-memory databases cannot use WAL
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+class GameplayReadRouter:
+    """Route reads of READ_APPS models to READ_ALIAS when it is configured."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in READ_APPS or READ_ALIAS not in settings.DATABASES:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        # Read your own writes: stay on the writer inside its transactions
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return READ_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in READ_APPS:
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', READ_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The read alias is the same file; migrations only run on default
+        if db == READ_ALIAS:
+            return False
+        return None
@@ -0,0 +1,140 @@
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.dbconfig import sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE redemption (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, clicks INTEGER NOT NULL, at REAL NOT NULL);
+CREATE INDEX redemption_user ON redemption (user_id, at);
+CREATE TABLE stats (user_id INTEGER PRIMARY KEY, count INTEGER NOT NULL, clicks INTEGER NOT NULL);
+"""
+
+# Connection setups compared by the benchmark
+MODES = {
+    # What Django does without core.dbconfig: rollback journal, deferred transactions
+    'default': {'pragmas': {}, 'begin': 'BEGIN'},
+    'tuned': {'pragmas': None, 'begin': 'BEGIN IMMEDIATE'},  # pragmas filled from settings
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures redemption-style write throughput on a scratch SQLite file with N concurrent writers, '
+        'comparing default connections with the core.dbconfig pragmas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads.')
+        parser.add_argument('--readers', type=int, default=2, help='Concurrent reader threads.')
+        parser.add_argument('--transactions', type=int, default=200, help='Transactions per writer.')
+        parser.add_argument('--users', type=int, default=100, help='Distinct users the writes are spread over.')
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both', help='Setup(s) to benchmark.')
+
+    def handle(self, *args, **options):
+        if options['writers'] < 1 or options['transactions'] < 1 or options['users'] < 1:
+            raise CommandError('--writers, --transactions and --users must be at least 1')
+
+        modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as tmp:
+                result = self.run_mode(Path(tmp) / 'bench.sqlite3', mode, options)
+            self.stdout.write(
+                f"{mode:>8}: {result['committed'] / result['elapsed']:8,.0f} tx/s  "
+                f"committed {result['committed']:>6}  locked {result['locked']:>5}  "
+                f"p50 {result['p50']:6.2f} ms  p99 {result['p99']:7.2f} ms  "
+                f"reads {result['reads'] / result['elapsed']:8,.0f}/s"
+            )
+
+    def connect(self, path, mode):
+        # Python's sqlite3 default: wait up to 5 seconds for a lock
+        connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        pragmas = MODES[mode]['pragmas']
+        for pragma, value in (sqlite_pragmas() if pragmas is None else pragmas).items():
+            connection.execute(f'PRAGMA {pragma} = {value}')
+        return connection
+
+    def run_mode(self, path, mode, options):
+        setup = self.connect(path, mode)
+        setup.executescript(SCHEMA)
+        setup.executemany(
+            'INSERT INTO stats (user_id, count, clicks) VALUES (?, 0, 0)',
+            [(user_id,) for user_id in range(options['users'])],
+        )
+        setup.close()
+
+        begin = MODES[mode]['begin']
+        latencies = []
+        counts = {'committed': 0, 'locked': 0, 'reads': 0}
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def writer(index):
+            connection = self.connect(path, mode)
+            local_latencies = []
+            committed = locked = 0
+            for n in range(options['transactions']):
+                user_id = (index * 7919 + n) % options['users']
+                started = time.perf_counter()
+                try:
+                    # Read-then-write, like saving a redemption and updating its stats row
+                    connection.execute(begin)
+                    connection.execute('SELECT count FROM stats WHERE user_id = ?', (user_id,)).fetchone()
+                    connection.execute(
+                        'INSERT INTO redemption (user_id, clicks, at) VALUES (?, ?, ?)', (user_id, n, time.time())
+                    )
+                    connection.execute(
+                        'UPDATE stats SET count = count + 1, clicks = clicks + ? WHERE user_id = ?', (n, user_id)
+                    )
+                    connection.execute('COMMIT')
+                    committed += 1
+                    local_latencies.append((time.perf_counter() - started) * 1000)
+                except sqlite3.OperationalError:
+                    locked += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            with lock:
+                counts['committed'] += committed
+                counts['locked'] += locked
+                latencies.extend(local_latencies)
+
+        def reader():
+            connection = self.connect(path, mode)
+            reads = 0
+            while not done.is_set():
+                try:
+                    connection.execute('SELECT SUM(count) FROM stats').fetchone()
+                    reads += 1
+                except sqlite3.OperationalError:
+                    pass
+            connection.close()
+            with lock:
+                counts['reads'] += reads
+
+        readers = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        writers = [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        for thread in readers:
+            thread.start()
+        started = time.perf_counter()
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        latencies.sort()
+        return {
+            **counts,
+            'elapsed': elapsed,
+            'p50': statistics.median(latencies) if latencies else 0.0,
+            'p99': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0,
+        }
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import assets, staticserve
+
+
+class Command(BaseCommand):
+    help = (
+        'Bundles and minifies each page\'s JS and CSS into content-hashed files, subsets the web fonts to the '
+        'characters the site uses and writes the manifest the {% bundle %} tag reads. Run before collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-minify', action='store_true', help='Concatenate without minifying.')
+        parser.add_argument('--no-subset-fonts', action='store_true', help='Reference the original fonts.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        for module, purpose in (('rjsmin', 'JS'), ('rcssmin', 'CSS')):
+            try:
+                __import__(module)
+            except ImportError:
+                self.stdout.write(self.style.WARNING(f'{module} is not installed; using the built-in {purpose} minifier'))
+        if not options['no_subset_fonts']:
+            try:
+                import fontTools  # noqa: F401
+            except ImportError:
+                self.stdout.write(self.style.WARNING('fontTools is not installed; fonts are not subset'))
+
+        manifest = assets.build_assets(minify=not options['no_minify'], subset_fonts=not options['no_subset_fonts'])
+        staticserve.reset_index()
+
+        for name, entry in sorted(manifest['bundles'].items()):
+            self.stdout.write(
+                f"{name:<10} {entry['source_size']:>8} -> {entry['size']:>8} bytes  {entry['name']}"
+            )
+        for name, entry in sorted(manifest['fonts'].items()):
+            self.stdout.write(f"{name} {entry['original_size']:>8} -> {entry['size']:>8} bytes  {entry['name']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(manifest["bundles"])} bundles and {len(manifest["fonts"])} fonts to {assets.build_dir()} '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
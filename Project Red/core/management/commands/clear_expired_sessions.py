@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes expired sessions in small chunks, one short transaction each, so gameplay writes are not '
+        'blocked behind one long DELETE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Sessions deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.01, help='Seconds to sleep between chunks.')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Stop after this many chunks.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['pause'] < 0:
+            raise CommandError('--chunk-size must be at least 1 and --pause must not be negative')
+        started = time.perf_counter()
+        deleted = SessionStore.clear_expired(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            max_chunks=options['max_chunks'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired sessions in {time.perf_counter() - started:.2f}s'
+        ))
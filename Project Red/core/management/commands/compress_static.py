@@ -0,0 +1,70 @@
+import gzip
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import staticserve
+
+# Extensions worth compressing; images, fonts and media are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.json', '.svg', '.html', '.txt', '.xml', '.map', '.ico'}
+
+# Keep a compressed copy only if it saves at least this fraction of the size
+MIN_SAVING = 0.05
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes .gz (and .br when the brotli package is installed) siblings for text assets in STATIC_ROOT '
+        'so core.staticserve can serve them precompressed. Run after collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompress files even if up to date.')
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATIC_ROOT)
+        if not root.is_dir():
+            raise CommandError(f'STATIC_ROOT {root} does not exist; run collectstatic first')
+
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+            self.stdout.write(self.style.WARNING('brotli is not installed; writing .gz files only'))
+
+        compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+
+        started = time.perf_counter()
+        written = 0
+        saved = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                source = Path(dirpath) / filename
+                if source.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+                    continue
+                data = None
+                for suffix, compress in compressors:
+                    target = source.with_name(source.name + suffix)
+                    if (not options['force'] and target.exists()
+                            and target.stat().st_mtime >= source.stat().st_mtime):
+                        continue
+                    if data is None:
+                        data = source.read_bytes()
+                    compressed = compress(data)
+                    if len(compressed) > len(data) * (1 - MIN_SAVING):
+                        target.unlink(missing_ok=True)
+                        continue
+                    target.write_bytes(compressed)
+                    written += 1
+                    saved += len(data) - len(compressed)
+
+        staticserve.reset_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} compressed files in {time.perf_counter() - started:.2f}s, '
+            f'saving {saved / 1024:.0f} KiB'
+        ))
@@ -0,0 +1,154 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime and prints its timings as JSON
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+import django
+from django.apps import config as app_config
+
+phases = {}
+
+def _timed(name, phase, started):
+    phases.setdefault(name, {})[phase] = time.perf_counter() - started
+
+_create = app_config.AppConfig.create.__func__
+def create(cls, entry):
+    began = time.perf_counter()
+    config = _create(cls, entry)
+    _timed(config.name, 'config', began)
+    return config
+app_config.AppConfig.create = classmethod(create)
+
+_import_models = app_config.AppConfig.import_models
+def import_models(self):
+    began = time.perf_counter()
+    _import_models(self)
+    _timed(self.name, 'models', began)
+    ready = self.ready
+    def timed_ready():
+        began = time.perf_counter()
+        ready()
+        _timed(self.name, 'ready', began)
+    self.ready = timed_ready
+app_config.AppConfig.import_models = import_models
+
+from django.conf import settings
+began = time.perf_counter()
+settings.INSTALLED_APPS
+settings_seconds = time.perf_counter() - began
+django.setup()
+setup_done = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+application_done = time.perf_counter()
+from core import warmup
+steps = [(name, seconds, repr(error) if error else None) for name, seconds, error in warmup.run()]
+print(json.dumps({
+    'apps': [config.name for config in django.apps.apps.get_app_configs()],
+    'phases': phases,
+    'settings': settings_seconds,
+    'setup': setup_done - started,
+    'application': application_done - setup_done,
+    'warmup': steps,
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """Return {module: self microseconds} from -X importtime output."""
+    self_times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        self_times[fields[2].strip()] = self_times.get(fields[2].strip(), 0) + int(fields[0])
+    return self_times
+
+
+def owner(module, app_names):
+    """The installed app a module belongs to, by longest package prefix."""
+    best = None
+    for name in app_names:
+        if (module == name or module.startswith(name + '.')) and (best is None or len(name) > len(best)):
+            best = name
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts fresh interpreters and reports, per installed app, module import time and the wall time of '
+        'its AppConfig creation, models import and ready(), followed by application creation and each '
+        'core.warmup step.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Interpreters to start; medians are reported.')
+        parser.add_argument('--json', dest='json_path', help='Also write the per-run results to this file.')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        runs = []
+        for _ in range(options['runs']):
+            completed = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', PROBE],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                raise CommandError(f'Startup probe failed:\n{completed.stderr[-2000:]}')
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result['imports'] = parse_importtime(completed.stderr)
+            runs.append(result)
+
+        app_names = runs[0]['apps']
+        owners = {}
+        for run in runs:
+            totals = run['import_by_app'] = {}
+            for module, micros in run['imports'].items():
+                if module not in owners:
+                    owners[module] = owner(module, app_names)
+                app = owners[module]
+                if app is not None:
+                    totals[app] = totals.get(app, 0) + micros / 1e6
+
+        def median(value):
+            return statistics.median(value(run) for run in runs) * 1000
+
+        self.stdout.write(f'Median of {len(runs)} cold start(s), in ms. Phases are wall time and include the imports '
+                          f'they trigger; imports is the self time of the app\'s own modules.')
+        self.stdout.write(f"{'app':<28} {'imports':>8} {'config':>8} {'models':>8} {'ready':>8} {'phases':>8}")
+        rows = []
+        for name in app_names:
+            phase = {key: median(lambda run: run['phases'].get(name, {}).get(key, 0.0))
+                     for key in ('config', 'models', 'ready')}
+            imports = median(lambda run: run['import_by_app'].get(name, 0.0))
+            rows.append((sum(phase.values()), name, imports, phase))
+        for total, name, imports, phase in sorted(rows, reverse=True):
+            self.stdout.write(
+                f"{name:<28} {imports:>8.1f} {phase['config']:>8.1f} {phase['models']:>8.1f} "
+                f"{phase['ready']:>8.1f} {total:>8.1f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f"{'settings module':<28} {median(lambda run: run['settings']):>8.1f}")
+        self.stdout.write(f"{'import django + setup()':<28} {median(lambda run: run['setup']):>8.1f}")
+        self.stdout.write(f"{'WSGI application':<28} {median(lambda run: run['application']):>8.1f}")
+        for index, (name, _, error) in enumerate(runs[0]['warmup']):
+            seconds = median(lambda run: run['warmup'][index][1])
+            note = f'  failed: {error}' if error else ''
+            self.stdout.write(f"{'warmup: ' + name:<28} {seconds:>8.1f}{note}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump(runs, file, indent=2)
@@ -0,0 +1,386 @@
+"""
+Per-view request metrics exposed in the Prometheus text format.
+
+metrics_middleware times every sampled request and records, per view and
+method: a latency histogram, a response size histogram, a histogram of
+queries per request, total SQL time and response status counts. SQL is
+measured by an execute wrapper installed on every database connection. It
+only does work while a sampled request is active in the current context,
+so it also sees queries from async views that run ORM code through
+sync_to_async.
+
+Counters live in per-thread shards, so recording never takes a lock. Each
+process writes a snapshot of its counters to METRICS_DIR every
+METRICS_FLUSH_INTERVAL seconds. The /metrics view sums every process's
+snapshot, and replaces its own with live numbers. The file name and the
+counters belong to the process that made them: a worker forked from a
+process that imported this module (gunicorn --preload, which runs warm_up()
+in the master) notices the new pid and starts its own, as
+gameplay.ratelimit.get_table does.
+
+/metrics requires 'Authorization: Bearer <METRICS_TOKEN>' when METRICS_TOKEN
+is set. Without a token it only answers requests from the same host that
+did not come through a proxy, so per-route internals are never public.
+
+METRICS_SAMPLE_RATE (0..1, default 1) is the fraction of requests
+instrumented; counts only include sampled requests. Set it to 0 to switch
+recording off.
+"""
+import atexit
+import bisect
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+from django.views.decorators.http import require_safe
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Offsets into a route's flat counter list: three histograms (buckets + overflow, sum) and SQL time
+_LATENCY = 0
+_SIZE = _LATENCY + len(LATENCY_BUCKETS) + 2
+_QUERIES = _SIZE + len(SIZE_BUCKETS) + 2
+_SQL_SECONDS = _QUERIES + len(QUERY_BUCKETS) + 2
+ROUTE_WIDTH = _SQL_SECONDS + 1
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_active = contextvars.ContextVar('metrics_request', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Shard:
+    """One thread's counters: {(view, method): [...]} and {(view, method, status): count}."""
+
+    __slots__ = ('routes', 'statuses')
+
+    def __init__(self):
+        self.routes = {}
+        self.statuses = {}
+
+
+class ProcessCounters:
+    """The shards of one process and the name of its snapshot file."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        # The start time guards against pid reuse
+        self.id = f'{self.pid}-{int(time.time() * 1000)}'
+        self.shards = []
+        self.local = threading.local()
+
+
+_process = None
+_process_lock = threading.Lock()
+_shards_lock = threading.Lock()
+
+
+def process_counters():
+    """This process's counters; a forked child gets new, empty ones instead of its parent's."""
+    global _process
+    process = _process
+    if process is None or process.pid != os.getpid():
+        with _process_lock:
+            if _process is None or _process.pid != os.getpid():
+                _process = ProcessCounters()
+            process = _process
+    return process
+
+
+def _shard():
+    process = process_counters()
+    shard = getattr(process.local, 'shard', None)
+    if shard is None:
+        shard = process.local.shard = Shard()
+        with _shards_lock:
+            process.shards.append(shard)
+    return shard
+
+
+def _observe(counters, offset, bounds, value):
+    counters[offset + bisect.bisect_left(bounds, value)] += 1
+    counters[offset + len(bounds) + 1] += value
+
+
+class RequestMetrics:
+    """SQL work done while handling one sampled request."""
+
+    __slots__ = ('queries', 'sql_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper: time the query if a sampled request is active."""
+    current = _active.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.sql_seconds += time.perf_counter() - started
+        current.queries += 1
+
+
+@receiver(connection_created, dispatch_uid='core_metrics_execute_wrapper')
+def _install_wrapper(sender, connection, **kwargs):
+    # Persistent connections reconnect on the same wrapper object; install once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def record(request, response, seconds, current):
+    """Add one finished request to this thread's shard."""
+    match = request.resolver_match
+    view = match.view_name if match else '<unresolved>'
+    key = (view, request.method)
+    shard = _shard()
+    counters = shard.routes.get(key)
+    if counters is None:
+        counters = shard.routes[key] = [0] * ROUTE_WIDTH
+    _observe(counters, _LATENCY, LATENCY_BUCKETS, seconds)
+    size = _response_size(response)
+    if size is not None:
+        _observe(counters, _SIZE, SIZE_BUCKETS, size)
+    _observe(counters, _QUERIES, QUERY_BUCKETS, current.queries)
+    counters[_SQL_SECONDS] += current.sql_seconds
+    status_key = (view, request.method, response.status_code)
+    shard.statuses[status_key] = shard.statuses.get(status_key, 0) + 1
+    _maybe_flush()
+
+
+def _sampled():
+    rate = _setting('METRICS_SAMPLE_RATE', 1.0)
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record latency, size and SQL use of sampled requests; put it first in MIDDLEWARE."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not _sampled():
+                return await get_response(request)
+            current = RequestMetrics()
+            token = _active.set(current)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _active.reset(token)
+            record(request, response, time.perf_counter() - started, current)
+            return response
+    else:
+        def middleware(request):
+            if not _sampled():
+                return get_response(request)
+            current = RequestMetrics()
+            token = _active.set(current)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _active.reset(token)
+            record(request, response, time.perf_counter() - started, current)
+            return response
+    return middleware
+
+
+def snapshot():
+    """Sum this process's shards into {'routes': {...}, 'statuses': {...}} keyed by tab-joined labels."""
+    with _shards_lock:
+        shards = list(process_counters().shards)
+    routes = {}
+    statuses = {}
+    for shard in shards:
+        for key, counters in list(shard.routes.items()):
+            total = routes.setdefault('\t'.join(key), [0] * ROUTE_WIDTH)
+            for i, value in enumerate(counters):
+                total[i] += value
+        for key, count in list(shard.statuses.items()):
+            label = '\t'.join(map(str, key))
+            statuses[label] = statuses.get(label, 0) + count
+    return {'routes': routes, 'statuses': statuses}
+
+
+def merge(snapshots):
+    """Sum several snapshots."""
+    routes = {}
+    statuses = {}
+    for snap in snapshots:
+        for key, counters in snap.get('routes', {}).items():
+            if len(counters) != ROUTE_WIDTH:
+                continue  # written with different buckets
+            total = routes.setdefault(key, [0] * ROUTE_WIDTH)
+            for i, value in enumerate(counters):
+                total[i] += value
+        for key, count in snap.get('statuses', {}).items():
+            statuses[key] = statuses.get(key, 0) + count
+    return {'routes': routes, 'statuses': statuses}
+
+
+_last_flush = time.monotonic()
+_flush_lock = threading.Lock()
+
+
+def _metrics_dir():
+    directory = _setting('METRICS_DIR', None)
+    return Path(directory) if directory else None
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR (no-op when unset)."""
+    global _last_flush
+    directory = _metrics_dir()
+    if directory is None:
+        return
+    with _flush_lock:
+        _last_flush = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{process_counters().id}.json'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(snapshot()))
+        os.replace(tmp, path)
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= _setting('METRICS_FLUSH_INTERVAL', 10.0) and not _flush_lock.locked():
+        try:
+            flush()
+        except OSError:
+            pass  # metrics must never break a request
+
+
+def collect():
+    """Merge the live snapshot with every other process's latest file."""
+    snapshots = [snapshot()]
+    directory = _metrics_dir()
+    if directory is not None and directory.is_dir():
+        stale_after = _setting('METRICS_STALE_SECONDS', 86400)
+        now = time.time()
+        own = process_counters().id
+        for path in directory.glob('*.json'):
+            if path.stem == own:
+                continue
+            try:
+                if now - path.stat().st_mtime > stale_after:
+                    path.unlink()  # a worker that has been gone for a long time
+                    continue
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    return merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, help_text, bounds, offset, routes):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, counters in sorted(routes.items()):
+        view, method = key.split('\t')
+        cumulative = 0
+        for i, bound in enumerate((*bounds, '+Inf')):
+            cumulative += counters[offset + i]
+            lines.append(f'{name}_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+        labels = _labels(view=view, method=method)
+        lines.append(f'{name}_sum{labels} {_format_number(counters[offset + len(bounds) + 1])}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+
+
+def render(data):
+    """Prometheus text exposition of merged metrics."""
+    routes = data['routes']
+    lines = [
+        '# HELP project_red_metrics_sample_rate Fraction of requests instrumented.',
+        '# TYPE project_red_metrics_sample_rate gauge',
+        f"project_red_metrics_sample_rate {_format_number(float(_setting('METRICS_SAMPLE_RATE', 1.0)))}",
+        '# HELP http_requests_total Sampled requests by view, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for key, count in sorted(data['statuses'].items()):
+        view, method, status = key.split('\t')
+        lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+    _histogram(lines, 'http_request_duration_seconds', 'Time spent handling requests.',
+               LATENCY_BUCKETS, _LATENCY, routes)
+    _histogram(lines, 'http_response_size_bytes', 'Size of response bodies.',
+               SIZE_BUCKETS, _SIZE, routes)
+    _histogram(lines, 'http_db_queries_per_request', 'SQL queries run per request.',
+               QUERY_BUCKETS, _QUERIES, routes)
+    lines.append('# HELP http_db_query_duration_seconds_total Time spent in SQL queries.')
+    lines.append('# TYPE http_db_query_duration_seconds_total counter')
+    for key, counters in sorted(routes.items()):
+        view, method = key.split('\t')
+        lines.append(
+            f'http_db_query_duration_seconds_total{_labels(view=view, method=method)} '
+            f'{_format_number(float(counters[_SQL_SECONDS]))}'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+# REMOTE_ADDR of requests from the same host
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _allowed(request):
+    token = _setting('METRICS_TOKEN', None)
+    if token:
+        return constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    # A reverse proxy on the same host connects from loopback too, but says who it forwards for
+    return request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES and 'HTTP_X_FORWARDED_FOR' not in request.META
+
+
+@require_safe
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN as a bearer token, or a local request when it is unset."""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
+
+
+@atexit.register
+def _flush_on_exit():
+    # Only processes that served requests have anything to report; manage.py
+    # commands and other one-off processes would leave an empty file each
+    if _process is None or _process.pid != os.getpid() or not _process.shards:
+        return
+    try:
+        flush()
+    except Exception:
+        pass
@@ -0,0 +1,185 @@
+"""
+Database session engine with a bounded in-process tier in front of it.
+
+Set SESSION_ENGINE = 'core.sessions'. Sessions are still stored in
+django_session, but:
+
+- Loads are served from a per-process LRU of recently used sessions
+  (SESSION_MEMORY_SIZE entries). An entry is trusted for SESSION_MEMORY_TTL
+  seconds, then re-read from the database, so changes made by another worker
+  (such as a logout) show up within that time.
+- Saves only write when the session data changed, or when the stored expiry
+  date lags the new one by more than SESSION_REFRESH_INTERVAL seconds. The
+  stored data is decoded for the comparison: encode() signs with a
+  timestamp, so re-encoding never matches once the second has changed.
+  Views that set a key to the value it already had no longer cost a write.
+- clear_expired() deletes in short chunks, each in its own transaction, so
+  clean-up never holds SQLite's write lock for long. clearsessions and the
+  clear_expired_sessions command both use it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.db import router, transaction
+from django.utils import timezone
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class SessionTier:
+    """Thread-safe LRU of {session_key: (session_data, expire_date, cached_at)}."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_key):
+        with self._lock:
+            entry = self._entries.get(session_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > _setting('SESSION_MEMORY_TTL', 5.0) or entry[1] <= timezone.now():
+                del self._entries[session_key]
+                return None
+            self._entries.move_to_end(session_key)
+            return entry
+
+    def put(self, session_key, session_data, expire_date):
+        with self._lock:
+            self._entries[session_key] = (session_data, expire_date, time.monotonic())
+            self._entries.move_to_end(session_key)
+            while len(self._entries) > _setting('SESSION_MEMORY_SIZE', 10000):
+                self._entries.popitem(last=False)
+
+    def discard(self, session_key):
+        with self._lock:
+            self._entries.pop(session_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tier = SessionTier()
+
+
+class SessionStore(db.SessionStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._stored = None   # (session_key, session_data, expire_date) as last read or written
+        self._written = None  # (session_data, expire_date) of the row being saved
+
+    def _remember(self, session):
+        self._stored = (session.session_key, session.session_data, session.expire_date)
+        tier.put(session.session_key, session.session_data, session.expire_date)
+
+    def _from_tier(self):
+        entry = tier.get(self.session_key)
+        if entry is None:
+            return None
+        self._stored = (self.session_key, entry[0], entry[1])
+        return self.model(session_key=self.session_key, session_data=entry[0], expire_date=entry[1])
+
+    def _get_session_from_db(self):
+        session = self._from_tier()
+        if session is None:
+            session = super()._get_session_from_db()
+            if session is not None:
+                self._remember(session)
+        return session
+
+    async def _aget_session_from_db(self):
+        session = self._from_tier()
+        if session is None:
+            session = await super()._aget_session_from_db()
+            if session is not None:
+                self._remember(session)
+        return session
+
+    def _unchanged(self, data, expire_date):
+        """Whether the stored row already holds this data with a recent enough expiry."""
+        if self._stored is None or self._stored[0] != self.session_key:
+            return False
+        _, session_data, stored_expiry = self._stored
+        refresh = timedelta(seconds=_setting('SESSION_REFRESH_INTERVAL', 3600))
+        return expire_date - stored_expiry < refresh and self.decode(session_data) == data
+
+    def create_model_instance(self, data):
+        session = super().create_model_instance(data)
+        self._written = session
+        return session
+
+    async def acreate_model_instance(self, data):
+        session = await super().acreate_model_instance(data)
+        self._written = session
+        return session
+
+    def save(self, must_create=False):
+        if self.session_key is not None and not must_create:
+            if self._unchanged(self._get_session(), self.get_expiry_date()):
+                return
+        super().save(must_create)
+        if self._written is not None:
+            self._remember(self._written)
+
+    async def asave(self, must_create=False):
+        if self.session_key is not None and not must_create:
+            if self._unchanged(await self._aget_session(), await self.aget_expiry_date()):
+                return
+        await super().asave(must_create)
+        if self._written is not None:
+            self._remember(self._written)
+
+    def delete(self, session_key=None):
+        key = session_key if session_key is not None else self.session_key
+        if key is not None:
+            tier.discard(key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        key = session_key if session_key is not None else self.session_key
+        if key is not None:
+            tier.discard(key)
+        await super().adelete(session_key)
+
+    @classmethod
+    def clear_expired(cls, chunk_size=None, pause=None, max_chunks=None):
+        """Delete expired sessions in chunks of short transactions; returns the number deleted."""
+        chunk_size = chunk_size or _setting('SESSION_CLEANUP_CHUNK_SIZE', 500)
+        pause = _setting('SESSION_CLEANUP_PAUSE', 0.01) if pause is None else pause
+        model = cls.get_model_class()
+        using = router.db_for_write(model)
+        deleted = 0
+        chunks = 0
+        now = timezone.now()
+        while max_chunks is None or chunks < max_chunks:
+            # expire_date is indexed, so each chunk is an index range scan
+            keys = list(
+                model.objects.using(using)
+                .filter(expire_date__lt=now)
+                .order_by('expire_date')
+                .values_list('session_key', flat=True)[:chunk_size]
+            )
+            if not keys:
+                break
+            with transaction.atomic(using=using):
+                count, _ = model.objects.using(using).filter(session_key__in=keys, expire_date__lt=now).delete()
+            deleted += count
+            chunks += 1
+            if len(keys) < chunk_size:
+                break
+            if pause:
+                # Give waiting writers a turn at the lock between chunks
+                time.sleep(pause)
+        return deleted
+
+    @classmethod
+    async def aclear_expired(cls):
+        return await sync_to_async(cls.clear_expired)()
@@ -0,0 +1,327 @@
+"""
+In-process static file serving with fingerprinted URLs.
+
+At first use the whole static tree is walked once into an in-memory index:
+for every file we keep its absolute path, size, content type, a content
+hash and any precompressed .br/.gz siblings. Requests are then answered from
+the index without touching the filesystem until the file is opened.
+
+- ``name.<hash>.ext`` URLs (what IndexedStaticFilesStorage.url() and so
+  {% static %} emit) are served with ``Cache-Control: immutable``. With
+  STATIC_FINGERPRINT_URLS off plain names are emitted instead.
+  FingerprintFinder lets runserver, which answers /static/ through the
+  staticfiles finders under DEBUG, resolve the fingerprinted names too.
+- Names that already carry their content hash (the build_assets bundles)
+  are immutable as they are.
+- Plain names still work and are revalidated with the ETag.
+- ``Accept-Encoding`` picks a .br or .gz sibling when one exists
+  (see the compress_static command).
+- ``If-None-Match`` answers 304, and single byte ranges answer 206.
+
+The index is read from STATIC_ROOT when collectstatic has been run, and from
+the staticfiles finders otherwise. With STATIC_INDEX_AUTORELOAD (defaults to
+DEBUG) entries are re-checked with a stat per request so edits show up.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+# Encodings we look for as sibling files, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# One year; fingerprinted URLs never change content
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+HASH_LENGTH = 12
+STREAM_BLOCK_SIZE = 64 * 1024
+
+_range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class StaticEntry:
+    """Everything needed to answer a request for one static file."""
+
+    __slots__ = ('name', 'path', 'size', 'mtime', 'content_type', 'digest', 'hashed_name', 'encodings')
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.digest = _file_md5(path)
+        base, ext = posixpath.splitext(name)
+        if base.endswith('.' + self.digest[:HASH_LENGTH]):
+            self.hashed_name = name  # already fingerprinted, e.g. by build_assets
+        else:
+            self.hashed_name = f'{base}.{self.digest[:HASH_LENGTH]}{ext}'
+        self.encodings = {}  # {'br': (path, size)}
+
+    def is_stale(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return stat.st_size != self.size or stat.st_mtime != self.mtime
+
+
+def _file_md5(path):
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _iter_static_files():
+    """Yield (name, absolute path) for every static file, first match wins like finders.find."""
+    seen = set()
+    root = settings.STATIC_ROOT
+    if root and Path(root).is_dir() and any(Path(root).iterdir()):
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                yield Path(os.path.relpath(path, root)).as_posix(), path
+        return
+    for finder in finders.get_finders():
+        for name, storage in finder.list([]):
+            name = Path(name).as_posix()
+            if name not in seen:
+                seen.add(name)
+                yield name, storage.path(name)
+
+
+class StaticIndex:
+    """Lookup table from request path (plain or fingerprinted) to StaticEntry."""
+
+    def __init__(self):
+        files = dict(_iter_static_files())
+        self.entries = {}
+        for name, path in files.items():
+            if any(name.endswith(suffix) and name[:-len(suffix)] in files for _, suffix in ENCODINGS):
+                continue  # served through its original's entry
+            entry = StaticEntry(name, path)
+            for encoding, suffix in ENCODINGS:
+                sibling = files.get(name + suffix)
+                if sibling:
+                    entry.encodings[encoding] = (sibling, os.path.getsize(sibling))
+            self.entries[name] = entry
+        self.hashed = {entry.hashed_name: entry for entry in self.entries.values()}
+
+    def lookup(self, name):
+        """Return (entry, is_fingerprinted) or (None, False)."""
+        entry = self.entries.get(name)
+        if entry is not None:
+            return entry, entry.hashed_name == name
+        entry = self.hashed.get(name)
+        return entry, entry is not None
+
+
+_index = None
+_index_lock = threading.Lock()
+_generation = 0  # bumped whenever the index is dropped
+
+
+def get_index():
+    """Return the static index, building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StaticIndex()
+    return _index
+
+
+def reset_index():
+    """Drop the index so the next request rebuilds it (e.g. after collectstatic)."""
+    global _index, _generation
+    with _index_lock:
+        _index = None
+        _generation += 1
+
+
+def index_generation():
+    """Counter that changes whenever fingerprinted URLs may have changed."""
+    return _generation
+
+
+def _autoreload():
+    return getattr(settings, 'STATIC_INDEX_AUTORELOAD', settings.DEBUG)
+
+
+def _fingerprint_urls():
+    return getattr(settings, 'STATIC_FINGERPRINT_URLS', True)
+
+
+def hashed_url_name(name):
+    """Return the fingerprinted name for a static file, or the name unchanged if unknown or disabled."""
+    if not _fingerprint_urls():
+        return name
+    entry = get_index().entries.get(name)
+    if entry is None or (_autoreload() and entry.is_stale()):
+        return name
+    return entry.hashed_name
+
+
+class IndexedStaticFilesStorage(StaticFilesStorage):
+    """Static storage whose url() points at fingerprinted names from the index."""
+
+    def url(self, name):
+        return super().url(hashed_url_name(name))
+
+
+class FingerprintFinder(finders.BaseFinder):
+    """
+    Staticfiles finder that maps fingerprinted names to their files.
+
+    runserver's StaticFilesHandler answers /static/ under DEBUG before the
+    URLconf is reached and looks names up through the finders, so without
+    this the URLs {% static %} emits would 404 there. It lists nothing, so
+    collectstatic and the index only see the real files.
+    """
+
+    def find(self, path, find_all=False, **kwargs):
+        find_all = find_all or kwargs.get('all', False)
+        entry, fingerprinted = get_index().lookup(path)
+        if entry is None or not fingerprinted or entry.name == path:
+            return []  # what Django's own finders return for a miss
+        return [entry.path] if find_all else entry.path
+
+    def list(self, ignore_patterns):
+        return []
+
+
+def _choose_encoding(entry, accept_encoding):
+    """Pick the preferred precompressed sibling the client accepts, if any."""
+    if not entry.encodings or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding, _ in ENCODINGS:
+        if encoding in entry.encodings and accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _parse_range(header, size):
+    """
+    Parse a single-range Range header into (start, end) inclusive.
+
+    Returns None when the header should be ignored (missing, malformed or
+    multi-range) and 'unsatisfiable' when no byte of the file is covered.
+    """
+    match = _range_re.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _stream_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = file.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+@require_safe
+def serve(request, path):
+    """Serve a static file from the in-memory index."""
+    index = get_index()
+    entry, fingerprinted = index.lookup(path)
+    if entry is not None and _autoreload() and entry.is_stale():
+        reset_index()
+        entry, fingerprinted = get_index().lookup(path)
+    if entry is None:
+        raise Http404(f'"{path}" does not exist')
+
+    encoding = _choose_encoding(entry, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    etag = f'"{entry.digest}-{encoding}"' if encoding else f'"{entry.digest}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if fingerprinted else 'public, max-age=0, must-revalidate',
+        'Vary': 'Accept-Encoding',
+    }
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    if encoding:
+        file_path, size = entry.encodings[encoding]
+        headers['Content-Encoding'] = encoding
+    else:
+        file_path, size = entry.path, entry.size
+        headers['Accept-Ranges'] = 'bytes'
+
+    byte_range = None
+    if not encoding and 'HTTP_RANGE' in request.META:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or if_range.strip() == etag:
+            byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=entry.content_type)
+        length = size if byte_range is None else byte_range[1] - byte_range[0] + 1
+        if byte_range is not None:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {byte_range[0]}-{byte_range[1]}/{size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_stream_range(file_path, start, end), status=206,
+                                         content_type=entry.content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        length = size
+        response = FileResponse(open(file_path, 'rb'), content_type=entry.content_type)
+
+    response['Content-Length'] = str(length)
+    for key, value in headers.items():
+        response[key] = value
+    return response
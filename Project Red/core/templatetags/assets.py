@@ -0,0 +1,53 @@
+"""
+{% bundle 'game.js' %} emits the script or stylesheet tag for a bundle.
+
+When ASSET_USE_BUNDLES is on (the default) and build_assets
+has written a manifest entry for the bundle, one tag for the built file is
+emitted. Otherwise there is one tag per source file, in bundle order.
+"""
+import os
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core import assets
+
+register = template.Library()
+
+_manifest = (None, None)  # (manifest file mtime, manifest)
+
+
+def get_manifest():
+    """The build manifest, re-read when the file changes; None when there is none."""
+    global _manifest
+    path = assets.manifest_path()
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if _manifest[0] != mtime:
+        _manifest = (mtime, assets.read_manifest(path))
+    return _manifest[1]
+
+
+def bundle_names(name):
+    """Static names to load for a bundle: the built file, or its sources."""
+    if getattr(settings, 'ASSET_USE_BUNDLES', True):
+        manifest = get_manifest()
+        entry = manifest['bundles'].get(name) if manifest else None
+        if entry is not None:
+            return [entry['name']]
+    try:
+        return list(assets.bundles()[name])
+    except KeyError:
+        raise template.TemplateSyntaxError(f'Unknown asset bundle {name!r}') from None
+
+
+@register.simple_tag
+def bundle(name):
+    urls = [(static(path),) for path in bundle_names(name)]
+    if name.endswith('.css'):
+        return format_html_join('\n  ', '<link rel="stylesheet" href="{}">', urls)
+    return format_html_join('\n', '<script src="{}"></script>', urls)
@@ -1,3 +1,126 @@
-from django.test import TestCase
+import json
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.db import connection
+from django.templatetags.static import static
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import assets, metrics, sessions, staticserve
+from core.templatetags import assets as asset_tags
+
+
+class StaticUrlTests(SimpleTestCase):
+    def tearDown(self):
+        staticserve.reset_index()
+
+    @override_settings(STATIC_FINGERPRINT_URLS=False)
+    def test_plain_names_when_fingerprinting_is_off(self):
+        # runserver's static handler only resolves the plain names
+        self.assertEqual(static('frontend/js/app.js'), '/static/frontend/js/app.js')
+
+    @override_settings(STATIC_FINGERPRINT_URLS=True)
+    def test_fingerprinted_names_resolve_through_the_index(self):
+        url = static('frontend/js/app.js')
+        self.assertRegex(url, r'^/static/frontend/js/app\.[0-9a-f]{12}\.js$')
+        entry, fingerprinted = staticserve.get_index().lookup(url[len('/static/'):])
+        self.assertTrue(fingerprinted)
+        self.assertEqual(entry.name, 'frontend/js/app.js')
+
+    def test_finders_resolve_fingerprinted_names_for_runserver(self):
+        url = static('frontend/js/app.js')
+        plain = finders.find('frontend/js/app.js')
+        self.assertEqual(finders.find(url[len('/static/'):]), plain)
+        self.assertEqual(finders.find(url[len('/static/'):], find_all=True), [plain])
+        self.assertIsNone(finders.find('frontend/js/app.000000000000.js'))
+
+    def test_fingerprinted_url_is_served_under_debug(self):
+        response = StaticFilesHandler(None).serve(RequestFactory().get(static('frontend/js/app.js')))
+        self.assertEqual(response.status_code, 200)
+
+
+class BundleTagTests(SimpleTestCase):
+    def setUp(self):
+        build_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(build_dir.cleanup)
+        manifest = {
+            'version': assets.MANIFEST_VERSION,
+            'bundles': {'game.js': {'name': 'frontend/dist/game.0123456789ab.js'}},
+        }
+        with open(f'{build_dir.name}/{assets.MANIFEST_NAME}', 'w') as file:
+            json.dump(manifest, file)
+        self.settings_override = override_settings(ASSET_BUILD_DIR=build_dir.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        asset_tags._manifest = (None, None)
+        self.addCleanup(setattr, asset_tags, '_manifest', (None, None))
+
+    @override_settings(DEBUG=True)
+    def test_built_bundle_is_used_regardless_of_debug(self):
+        self.assertEqual(asset_tags.bundle_names('game.js'), ['frontend/dist/game.0123456789ab.js'])
+
+    @override_settings(ASSET_USE_BUNDLES=False)
+    def test_sources_when_bundles_are_off(self):
+        self.assertEqual(asset_tags.bundle_names('game.js'), ['frontend/js/game.js', 'frontend/js/app.js'])
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        sessions.tier.clear()
+
+    def test_unchanged_session_is_not_rewritten_after_the_signing_second(self):
+        store = sessions.SessionStore()
+        store['cart'] = [1, 2]
+        store.save()
+
+        again = sessions.SessionStore(store.session_key)
+        self.assertEqual(again['cart'], [1, 2])
+        again['cart'] = [1, 2]
+        # encode() would now sign with a later timestamp than the stored data
+        later = time.time() + 2
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            with CaptureQueriesContext(connection) as queries:
+                again.save()
+        self.assertEqual(len(queries), 0)
+
+    def test_changed_session_is_written(self):
+        store = sessions.SessionStore()
+        store['cart'] = [1]
+        store.save()
+
+        again = sessions.SessionStore(store.session_key)
+        again['cart'] = [1, 2]
+        again.save()
+        sessions.tier.clear()
+        self.assertEqual(sessions.SessionStore(store.session_key)['cart'], [1, 2])
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN=None)
+class MetricsTests(SimpleTestCase):
+    def scrape(self, **meta):
+        return metrics.metrics_view(RequestFactory().get('/metrics', **meta))
+
+    def test_forked_worker_starts_its_own_counters(self):
+        statuses = metrics._shard().statuses
+        statuses[('view', 'GET', 200)] = 1
+        self.addCleanup(statuses.pop, ('view', 'GET', 200))
+        parent = metrics.process_counters()
+        with mock.patch('core.metrics.os.getpid', return_value=parent.pid + 1):
+            child = metrics.process_counters()
+            self.assertNotEqual(child.id, parent.id)
+            self.assertEqual(metrics.snapshot(), {'routes': {}, 'statuses': {}})
+
+    def test_without_a_token_only_local_requests_are_answered(self):
+        self.assertEqual(self.scrape(REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.scrape(REMOTE_ADDR='203.0.113.5').status_code, 403)
+        # Through a reverse proxy on the same host
+        self.assertEqual(self.scrape(REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.5').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.scrape(REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.scrape(REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
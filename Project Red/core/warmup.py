@@ -0,0 +1,162 @@
+"""
+Warm a worker up before it takes its first request.
+
+Much of Django and of this project is built lazily on first touch: URL
+resolvers and their regexes, compiled templates, the static file index, the
+reward pool, the store catalog and the chatbot automaton, plus the database
+connection and its pragmas. warm_up() builds all of that at startup, so the
+cost lands on the worker boot instead of on a player's request.
+
+project_red/wsgi.py and asgi.py call warm_up() once the application has been
+created. Set WARMUP_ON_STARTUP = False to skip it (for example with an
+autoreloading dev server). A step that fails is logged and skipped, since
+startup must never break because of a warmup step.
+
+Opening the database connections warms the SQLite file and the OS page
+cache, and the cache steps after it load their data through them. The last
+step closes them again: a server that preloads the application (gunicorn
+--preload) forks its workers after warm_up(), and a connection inherited
+across fork would be shared by every worker.
+"""
+import asyncio
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    """Populate the resolver and compile every URL pattern's regex."""
+    from django.urls import URLPattern, get_resolver
+
+    def walk(resolver):
+        resolver.pattern.regex
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLPattern):
+                pattern.pattern.regex
+            else:
+                walk(pattern)
+
+    resolver = get_resolver()
+    resolver.reverse_dict  # builds the reverse lookup tables
+    walk(resolver)
+
+
+def template_names():
+    """Template names under TEMPLATES DIRS and the project apps' templates directories."""
+    roots = [Path(directory) for backend in settings.TEMPLATES for directory in backend.get('DIRS', ())]
+    roots += [
+        Path(config.path) / 'templates'
+        for config in apps.get_app_configs()
+        if not config.name.startswith('django.')
+    ]
+    names = set()
+    for root in roots:
+        if root.is_dir():
+            names.update(path.relative_to(root).as_posix() for path in root.rglob('*.html'))
+    return sorted(names)
+
+
+def warm_templates():
+    """Compile every project template into the cached loader."""
+    from django.template.loader import get_template
+
+    for name in template_names():
+        get_template(name)
+
+
+def warm_static():
+    from . import staticserve
+
+    staticserve.get_index()
+
+
+def warm_reward_pool():
+    from database import reward_pool
+
+    reward_pool.get_pool()
+
+
+def warm_store_catalog():
+    from store import catalog
+
+    catalog.get_catalog()
+
+
+def warm_chatbot():
+    from events import chatbot
+
+    chatbot.get_engine()
+
+
+def warm_database():
+    """Open every configured connection, which also applies the SQLite pragmas."""
+    from django.db import connections
+
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def close_database():
+    """Close the connections the earlier steps used; each worker opens its own on first use."""
+    from django.db import connections
+
+    connections.close_all()
+
+
+# Run in this order; caches come after the database so their queries reuse the connection
+STEPS = (
+    ('urls', warm_urls),
+    ('templates', warm_templates),
+    ('static index', warm_static),
+    ('database', warm_database),
+    ('reward pool', warm_reward_pool),
+    ('store catalog', warm_store_catalog),
+    ('chatbot', warm_chatbot),
+    ('close connections', close_database),
+)
+
+
+def run(steps=STEPS):
+    """Run warmup steps; returns [(name, seconds, error or None), ...]."""
+    timings = []
+    for name, step in steps:
+        started = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as e:
+            error = e
+            logger.warning('Warmup step %s failed: %s', name, e)
+        timings.append((name, time.perf_counter() - started, error))
+    return timings
+
+
+def warm_up():
+    """Run every step unless WARMUP_ON_STARTUP is off; returns the timings."""
+    if not getattr(settings, 'WARMUP_ON_STARTUP', True):
+        return []
+    started = time.perf_counter()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        timings = run()
+    else:
+        # Some ASGI servers import the application inside their event loop,
+        # where Django refuses sync database access; warm up from a thread.
+        result = []
+        thread = threading.Thread(target=lambda: result.extend(run()), name='warmup')
+        thread.start()
+        thread.join()
+        timings = result
+    logger.info(
+        'Warmed up in %.0f ms (%s)',
+        (time.perf_counter() - started) * 1000,
+        ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds, _ in timings),
+    )
+    return timings
@@ -1,3 +1,116 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
 
-# Register your models here.
+from . import reports
+from .models import FishReward, RedeemedFish, UserRedemptionStats
+from .templatetags.rewards import render_reward_media
+
+
+def estimated_count(queryset):
+    """Cheap row count estimate for a queryset's whole table, or None when the backend has none."""
+    model = queryset.model
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] > 0 else None
+        if connection.vendor == 'sqlite' and model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+            # MIN/MAX of an integer primary key are two rowid lookups. Rows are
+            # only deleted from the old end (archiving), so the span is close.
+            # SQLite only optimizes MIN/MAX alone in a SELECT, hence the subqueries.
+            column = connection.ops.quote_name(model._meta.pk.column)
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f'SELECT (SELECT MAX({column}) FROM {table}) - (SELECT MIN({column}) FROM {table}) + 1')
+            row = cursor.fetchone()
+            return row[0] if row and row[0] else None
+    return None
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of a large unfiltered table instead of running COUNT(*).
+
+    Filtered lists, and tables below ADMIN_APPROXIMATE_COUNT_THRESHOLD rows,
+    are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_APPROXIMATE_COUNT_THRESHOLD', 100000):
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = ApproximateCountPaginator
+    # Skip the second, unfiltered COUNT(*) the change list runs for "N total"
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(FishReward)
+class FishRewardAdmin(admin.ModelAdmin):
+    list_display = ('id', 'fish_type', 'message', 'media_url')
+    list_filter = ('fish_type',)
+    search_fields = ('message', 'media_url')
+    readonly_fields = ('preview', 'media_hash', 'media_variants')
+
+    @admin.display(description='Preview')
+    def preview(self, obj):
+        # Same markup as {% reward_media %}, so a missing or broken variant shows up here
+        return render_reward_media(obj, sizes='320px')
+
+
+@admin.register(RedeemedFish)
+class RedeemedFishAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'fish_reward', 'clicks_before_redeem', 'redeemed_at')
+    # One joined query per page instead of two lookups per row
+    list_select_related = ('user', 'fish_reward')
+    # Select widgets would load every user and reward
+    raw_id_fields = ('user', 'fish_reward')
+    # Newest first by primary key, which needs no sort
+    ordering = ('-id',)
+    change_list_template = 'admin/database/redeemedfish/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('report/', self.admin_site.admin_view(self.report_view), name='database_redeemedfish_report'),
+        ] + super().get_urls()
+
+    def report_view(self, request):
+        """Redemptions per tier per day and the most awarded rewards, from reports.get_report()."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            days = min(max(int(request.GET.get('days', 30)), 1), 366)
+        except ValueError:
+            days = 30
+        report = reports.get_report(days=days)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Redemptions in the last {days} days',
+            'report': report,
+            'day_choices': (7, 30, 90, 365),
+            'ttl': reports.ttl(),
+        }
+        return TemplateResponse(request, 'admin/database/redeemedfish/report.html', context)
+
+
+@admin.register(UserRedemptionStats)
+class UserRedemptionStatsAdmin(LargeTableAdmin):
+    list_display = ('user', 'redemption_count', 'total_clicks_before_redeem', 'max_clicks_before_redeem',
+                    'last_redeemed_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
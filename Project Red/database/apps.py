@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DatabaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'database'
+
+    def ready(self):
+        # Connect the reward pool's invalidation signals
+        from . import reward_pool  # noqa: F401
@@ -0,0 +1,362 @@
+"""
+Monthly archive segments for old RedeemedFish rows.
+
+The archive_redemptions command moves whole months of redemptions out of the
+table into immutable segment files in REDEMPTION_ARCHIVE_DIR, one or more per
+calendar month (UTC). A segment stores its rows sorted by (user, redeemed_at,
+id). Each column is split into blocks of BLOCK_ROWS values, and every block
+is zlib-compressed on its own. A user index maps each user id to its first
+row, so one player's history only decompresses the blocks it spans. The
+footer also counts the segment's rows per UTC day and reward, which is all
+the admin redemption report needs from archived months (see
+reward_counts_by_day()).
+
+Segments are written from a stream of rows one block at a time, so archiving
+a month never holds it in memory. They are read through mmap: opening one
+parses the small footer, and row data is paged in only when a block is
+decompressed. Segment is a context manager for one-off reads; segments()
+keeps mappings open across calls and closes them when their file goes away.
+
+iter_redemptions() merges archived and live rows, so code that needs full
+history (leaderboard rebuilds, per-user history) does not need to know where
+a row lives. Archived rows come first, month by month and grouped by user
+within a month, then the live rows in redeemed_at order.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import RedeemedFish
+
+MAGIC = b'RFSEG01\n'
+BLOCK_ROWS = 4096
+COMPRESSION_LEVEL = 6
+
+# Column order on disk; fish_reward_id 0 stands for no reward
+COLUMNS = ('id', 'user_id', 'fish_reward_id', 'clicks_before_redeem', 'redeemed_at')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROS_PER_DAY = 86400 * 1_000_000
+_INDEX_ENTRY = struct.Struct('<qq')   # user id, first row
+_TRAILER = struct.Struct('<I8s')      # footer length, MAGIC
+
+Redemption = namedtuple('Redemption', COLUMNS)
+
+
+def archive_dir():
+    return Path(getattr(settings, 'REDEMPTION_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+
+
+def to_micros(value):
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def month_key(value):
+    return f'{value.year:04d}-{value.month:02d}'
+
+
+def month_start(value):
+    """Midnight UTC on the first day of value's month."""
+    value = value.astimezone(timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _pack(values):
+    return zlib.compress(struct.pack(f'<{len(values)}q', *values), COMPRESSION_LEVEL)
+
+
+def _unpack(data, count):
+    return struct.unpack(f'<{count}q', zlib.decompress(data))
+
+
+def write_segment(path, rows):
+    """
+    Write rows (tuples in COLUMNS order, sorted by user, time and id) to a new segment.
+
+    rows may be any iterable; it is consumed BLOCK_ROWS rows at a time.
+    Returns the number of rows written. The file appears atomically under
+    its final name, so readers never see a partial segment.
+    """
+    path = Path(path)
+    tmp = path.with_suffix('.tmp')
+    rows = iter(rows)
+    blocks = []
+    index = []
+    daily = Counter()   # {(days since the epoch, fish_reward_id): rows}
+    count = 0
+    previous = None
+    min_time = max_time = max_id = None
+    with open(tmp, 'wb') as file:
+        file.write(MAGIC)
+        while True:
+            chunk = list(islice(rows, BLOCK_ROWS))
+            if not chunk:
+                break
+            columns = list(zip(*chunk))
+            block = []
+            for column in columns:
+                data = _pack(column)
+                block.append((file.tell(), len(data)))
+                file.write(data)
+            blocks.append(block)
+
+            for row_number, user_id in enumerate(columns[1], start=count):
+                if user_id != previous:
+                    index.append((user_id, row_number))
+                    previous = user_id
+            times = columns[4]
+            daily.update(zip((micros // _MICROS_PER_DAY for micros in times), columns[2]))
+            min_time = min(times) if min_time is None else min(min_time, min(times))
+            max_time = max(times) if max_time is None else max(max_time, max(times))
+            max_id = max(columns[0]) if max_id is None else max(max_id, max(columns[0]))
+            count += len(chunk)
+
+        index_offset = file.tell()
+        for entry in index:
+            file.write(_INDEX_ENTRY.pack(*entry))
+
+        footer = json.dumps({
+            'columns': COLUMNS,
+            'rows': count,
+            'block_rows': BLOCK_ROWS,
+            'blocks': blocks,
+            'index_offset': index_offset,
+            'index_entries': len(index),
+            'min_redeemed_at': min_time,
+            'max_redeemed_at': max_time,
+            'max_id': max_id,
+            'daily_reward_counts': [[day, reward_id, rows] for (day, reward_id), rows in sorted(daily.items())],
+        }).encode()
+        file.write(footer)
+        file.write(_TRAILER.pack(len(footer), MAGIC))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+class Segment:
+    """A memory-mapped, read-only archive segment; close it, or use it as a context manager."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer_length, magic = _TRAILER.unpack_from(self._map, len(self._map) - _TRAILER.size)
+        if magic != MAGIC or self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{self.path} is not a redemption archive segment')
+        footer_end = len(self._map) - _TRAILER.size
+        footer = json.loads(self._map[footer_end - footer_length:footer_end])
+        if tuple(footer['columns']) != COLUMNS:
+            raise ValueError(f'{self.path} has unexpected columns {footer["columns"]}')
+        self.rows = footer['rows']
+        self.block_rows = footer['block_rows']
+        self.blocks = footer['blocks']
+        self.index_offset = footer['index_offset']
+        self.index_entries = footer['index_entries']
+        self.min_redeemed_at = footer['min_redeemed_at']
+        self.max_redeemed_at = footer['max_redeemed_at']
+        self.max_id = footer['max_id']
+        self._daily = footer.get('daily_reward_counts')
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def overlaps(self, since=None, until=None):
+        """Whether rows in [since, until) can be in this segment."""
+        if not self.rows:
+            return False
+        if since is not None and self.max_redeemed_at < to_micros(since):
+            return False
+        return until is None or self.min_redeemed_at < to_micros(until)
+
+    def _index_entry(self, position):
+        return _INDEX_ENTRY.unpack_from(self._map, self.index_offset + position * _INDEX_ENTRY.size)
+
+    def user_rows(self, user_id):
+        """(first row, end row) of a user's rows, by binary search over the index."""
+        low, high = 0, self.index_entries
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] < user_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.index_entries or self._index_entry(low)[0] != user_id:
+            return 0, 0
+        end = self._index_entry(low + 1)[1] if low + 1 < self.index_entries else self.rows
+        return self._index_entry(low)[1], end
+
+    def read_column(self, block, column):
+        offset, length = self.blocks[block][COLUMNS.index(column)]
+        count = min(self.block_rows, self.rows - block * self.block_rows)
+        return _unpack(self._map[offset:offset + length], count)
+
+    def iter_rows(self, start=0, end=None, columns=COLUMNS):
+        """Yield tuples of the given columns for rows [start, end), one block at a time."""
+        end = self.rows if end is None else end
+        for block in range(start // self.block_rows, -(-end // self.block_rows)):
+            base = block * self.block_rows
+            values = [self.read_column(block, column) for column in columns]
+            lo = max(start - base, 0)
+            hi = min(end - base, len(values[0]))
+            yield from zip(*(column[lo:hi] for column in values))
+
+    def daily_reward_counts(self):
+        """[(days since the epoch, fish_reward_id, rows), ...] in day order; 0 stands for no reward."""
+        if self._daily is None:
+            # Segments written before the footer carried the counts
+            counts = Counter(
+                (micros // _MICROS_PER_DAY, reward_id)
+                for reward_id, micros in self.iter_rows(columns=('fish_reward_id', 'redeemed_at'))
+            )
+            self._daily = [[day, reward_id, rows] for (day, reward_id), rows in sorted(counts.items())]
+        return self._daily
+
+    def iter_ids(self):
+        """Every row id in the segment, in row order."""
+        for row in self.iter_rows(columns=('id',)):
+            yield row[0]
+
+
+_SEGMENT_SUFFIX = '.seg'
+_cache = {}   # {path: (mtime_ns, Segment)}
+_cache_lock = threading.Lock()
+
+
+def segment_path(month, generation):
+    return archive_dir() / f'redemptions-{month}-{generation:04d}{_SEGMENT_SUFFIX}'
+
+
+def segment_files():
+    """Segment paths in month, then generation, order."""
+    directory = archive_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f'redemptions-*{_SEGMENT_SUFFIX}'))
+
+
+def segments():
+    """Open segments in month order, reusing mappings across calls."""
+    opened = []
+    with _cache_lock:
+        live = set()
+        for path in segment_files():
+            live.add(path)
+            mtime = path.stat().st_mtime_ns
+            cached = _cache.get(path)
+            if cached is None or cached[0] != mtime:
+                if cached is not None:
+                    cached[1].close()
+                cached = _cache[path] = (mtime, Segment(path))
+            opened.append(cached[1])
+        # Segments are never rewritten or removed by the archive command, so
+        # this only happens when an operator deletes or replaces a file
+        for path in set(_cache) - live:
+            _cache.pop(path)[1].close()
+    return opened
+
+
+def close_segments():
+    """Close every mapping segments() holds open."""
+    with _cache_lock:
+        for _, segment in _cache.values():
+            segment.close()
+        _cache.clear()
+
+
+def month_of(path):
+    # redemptions-YYYY-MM-NNNN.seg
+    return path.stem[len('redemptions-'):len('redemptions-YYYY-MM')]
+
+
+def reward_counts_by_day(since=None, until=None):
+    """
+    Archived redemptions per UTC day and reward, for days in [since, until), from segment footers.
+
+    Returns {(date, fish_reward_id or None): count}; no row data is decompressed.
+    """
+    first = (since - _EPOCH.date()).days if since is not None else None
+    last = (until - _EPOCH.date()).days if until is not None else None
+    counts = Counter()
+    for segment in segments():
+        if not segment.rows:
+            continue
+        if first is not None and segment.max_redeemed_at // _MICROS_PER_DAY < first:
+            continue
+        if last is not None and segment.min_redeemed_at // _MICROS_PER_DAY >= last:
+            continue
+        for day, reward_id, rows in segment.daily_reward_counts():
+            if (first is None or day >= first) and (last is None or day < last):
+                counts[(_EPOCH.date() + timedelta(days=day), reward_id or None)] += rows
+    return counts
+
+
+def iter_redemptions(user_id=None, since=None, until=None, columns=COLUMNS, chunk_size=5000):
+    """
+    Yield redemptions from the archive and then the live table, as tuples of `columns`.
+
+    Filters by user and by redeemed_at in [since, until). Archived rows come
+    month by month, by user within a month; live rows by redeemed_at and id.
+    With the full column list the tuples are Redemption namedtuples.
+    """
+    columns = tuple(columns)
+    as_record = columns == COLUMNS
+    since_us = to_micros(since) if since is not None else None
+    until_us = to_micros(until) if until is not None else None
+    read_columns = columns if 'redeemed_at' in columns else columns + ('redeemed_at',)
+    time_position = read_columns.index('redeemed_at')
+    reward_position = columns.index('fish_reward_id') if 'fish_reward_id' in columns else None
+    width = len(columns)
+
+    for segment in segments():
+        if not segment.overlaps(since, until):
+            continue
+        start, end = segment.user_rows(user_id) if user_id is not None else (0, segment.rows)
+        for row in segment.iter_rows(start, end, read_columns):
+            redeemed_at = row[time_position]
+            if since_us is not None and redeemed_at < since_us:
+                continue
+            if until_us is not None and redeemed_at >= until_us:
+                continue
+            values = list(row[:width])
+            if time_position < width:
+                values[time_position] = from_micros(redeemed_at)
+            if reward_position is not None and not values[reward_position]:
+                values[reward_position] = None
+            yield Redemption(*values) if as_record else tuple(values)
+
+    # Both orders are served by an index: (user, redeemed_at) or (redeemed_at, fish_reward)
+    live = RedeemedFish.objects.order_by('redeemed_at', 'pk')
+    if user_id is not None:
+        live = live.filter(user_id=user_id)
+    if since is not None:
+        live = live.filter(redeemed_at__gte=since)
+    if until is not None:
+        live = live.filter(redeemed_at__lt=until)
+    for row in live.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield Redemption(*row) if as_record else row
@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import chain, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Min
+from django.utils.timezone import now
+
+from database import archive
+from database.models import RedeemedFish
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves whole months of RedeemedFish rows older than a cutoff into compressed archive segments '
+        '(see database.archive). Archived rows stay readable through archive.iter_redemptions().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help='Archive months that end on or before this date (YYYY-MM-DD); rounded down to a month start.',
+        )
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=180,
+            help='Cutoff in days before now, used when --before is not given.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows fetched per round trip, and ids per DELETE.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived and stop.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['before']:
+            try:
+                cutoff = datetime.strptime(options['before'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise CommandError('--before must be a date like 2025-01-01')
+        else:
+            cutoff = now() - timedelta(days=options['older_than_days'])
+        # Only whole months are archived, so a segment never needs rows added later
+        cutoff = archive.month_start(cutoff)
+
+        oldest = RedeemedFish.objects.filter(redeemed_at__lt=cutoff).aggregate(oldest=Min('redeemed_at'))['oldest']
+        if oldest is None:
+            self.stdout.write(f'No redemptions before {cutoff:%Y-%m-%d} to archive')
+            return
+
+        archive.archive_dir().mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        total_rows = total_bytes = 0
+        month = archive.month_start(oldest)
+        while month < cutoff:
+            end = archive.next_month(month)
+            rows, size = self.archive_month(month, end, options)
+            if rows:
+                self.stdout.write(f'{archive.month_key(month)}: {rows} rows, {size / 1024:.1f} KiB')
+            total_rows += rows
+            total_bytes += size
+            month = end
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total_rows} redemptions before {cutoff:%Y-%m-%d} '
+            f'into {total_bytes / 1024:.1f} KiB in {time.perf_counter() - started:.2f}s'
+        ))
+
+    def archive_month(self, start, end, options):
+        """Archive one month; returns (rows archived, segment bytes)."""
+        month = archive.month_key(start)
+        chunk_size = options['chunk_size']
+        rows_in_month = RedeemedFish.objects.filter(redeemed_at__gte=start, redeemed_at__lt=end)
+
+        # A run that died after writing a segment but before deleting its rows
+        # leaves them in both places; finish the delete instead of archiving twice.
+        existing = [path for path in archive.segment_files() if archive.month_of(path) == month]
+        already_archived = set()
+        for path in existing:
+            with archive.Segment(path) as segment:
+                already_archived.update(segment.iter_ids())
+        if already_archived and not options['dry_run']:
+            self.delete_ids(rows_in_month, sorted(already_archived), chunk_size)
+
+        # Streamed from the cursor into the segment writer, a block at a time
+        rows = (
+            (pk, user_id, fish_reward_id or 0, clicks, archive.to_micros(redeemed_at))
+            for pk, user_id, fish_reward_id, clicks, redeemed_at in (
+                rows_in_month.order_by('user_id', 'redeemed_at', 'id')
+                .values_list(*archive.COLUMNS)
+                .iterator(chunk_size=chunk_size)
+            )
+            if pk not in already_archived
+        )
+        if options['dry_run']:
+            return sum(1 for _ in rows), 0
+        first = next(rows, None)
+        if first is None:
+            return 0, 0
+
+        path = archive.segment_path(month, len(existing) + 1)
+        count = archive.write_segment(path, chain([first], rows))
+        with archive.Segment(path) as segment:
+            self.delete_ids(rows_in_month, segment.iter_ids(), chunk_size)
+        return count, path.stat().st_size
+
+    def delete_ids(self, queryset, ids, chunk_size):
+        ids = iter(ids)
+        while chunk := list(islice(ids, chunk_size)):
+            with transaction.atomic():
+                queryset.filter(pk__in=chunk).delete()
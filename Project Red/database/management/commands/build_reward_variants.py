@@ -0,0 +1,202 @@
+import hashlib
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from core import staticserve
+from database import reward_pool
+from database.models import FishReward
+
+# Widths of the resized variants built for IMG rewards
+DEFAULT_WIDTHS = (320, 640, 1024)
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+
+
+def file_sha256(path):
+    """Hash a file in chunks so large GIFs are not read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _variant(path, url_base, content_type, width, height):
+    return {
+        'url': url_base + path.name,
+        'bytes': path.stat().st_size,
+        'width': width,
+        'height': height,
+        'content_type': content_type,
+    }
+
+
+def build_variants(job):
+    """
+    Build every variant for one reward; runs in a worker process.
+
+    GIFs become an animated WebP (Pillow) and an H.264 MP4 (ffmpeg, when
+    installed). Still images are resized to each width, never upscaled,
+    and written as progressive JPEG and WebP.
+    """
+    from PIL import Image
+
+    source = Path(job['source'])
+    out_dir = Path(job['out_dir'])
+    stem = f"{source.stem}-{job['hash'][:12]}"
+    url_base = job['url_base']
+    variants = {}
+
+    with Image.open(source) as image:
+        width, height = image.size
+        if job['fish_type'] == 'GIF':
+            webp_path = out_dir / f'{stem}.webp'
+            image.save(webp_path, format='WEBP', save_all=True, quality=WEBP_QUALITY, method=4)
+            variants['webp'] = _variant(webp_path, url_base, 'image/webp', width, height)
+
+            if job['ffmpeg']:
+                mp4_path = out_dir / f'{stem}.mp4'
+                even_width, even_height = width - width % 2, height - height % 2
+                subprocess.run(
+                    [
+                        job['ffmpeg'], '-y', '-loglevel', 'error', '-i', str(source),
+                        '-movflags', '+faststart', '-pix_fmt', 'yuv420p', '-an',
+                        '-vf', f'scale={even_width}:{even_height}', str(mp4_path),
+                    ],
+                    check=True,
+                )
+                variants['mp4'] = _variant(mp4_path, url_base, 'video/mp4', even_width, even_height)
+        else:
+            rgb = image.convert('RGB')
+            for target in sorted({min(w, width) for w in job['widths']}):
+                resized = rgb if target == width else rgb.resize(
+                    (target, max(1, round(height * target / width))), Image.LANCZOS
+                )
+                size = resized.size
+                jpeg_path = out_dir / f'{stem}-{target}w.jpg'
+                resized.save(jpeg_path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                variants[f'jpeg_{target}'] = _variant(jpeg_path, url_base, 'image/jpeg', *size)
+                webp_path = out_dir / f'{stem}-{target}w.webp'
+                resized.save(webp_path, format='WEBP', quality=WEBP_QUALITY, method=4)
+                variants[f'webp_{target}'] = _variant(webp_path, url_base, 'image/webp', *size)
+
+    return job['reward_id'], job['hash'], variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds smaller WebP/MP4/JPEG variants of IMG and GIF rewards into the static tree and records them '
+        'on FishReward. Run after load_fish_rewards and before collectstatic. Requires Pillow; MP4 output '
+        'also needs ffmpeg on PATH.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (defaults to the number of CPUs).',
+        )
+        parser.add_argument(
+            '--width',
+            type=int,
+            action='append',
+            dest='widths',
+            help=f'Width of a resized IMG variant (repeatable, default: {", ".join(map(str, DEFAULT_WIDTHS))}).',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants even when the source file has not changed.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise CommandError(
+                'Pillow is required to build reward variants: pip install Pillow (see requirements-optional.txt)'
+            )
+
+        widths = options['widths'] or list(DEFAULT_WIDTHS)
+        if any(width < 1 for width in widths):
+            raise CommandError('--width must be positive')
+
+        # Variants live in the static tree so they are served (and collected) like the originals;
+        # MEDIA_URL is only routed under DEBUG
+        default_root = Path(settings.STATICFILES_DIRS[0]) / 'frontend' / 'variants'
+        out_dir = Path(getattr(settings, 'REWARD_VARIANTS_ROOT', default_root))
+        url_base = getattr(settings, 'REWARD_VARIANTS_URL', f'{settings.STATIC_URL}frontend/variants/')
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            self.stdout.write(self.style.WARNING('ffmpeg not found; GIF rewards get WebP variants only'))
+
+        started = time.perf_counter()
+        jobs = []
+        unchanged = 0
+        missing = 0
+        rewards = FishReward.objects.filter(fish_type__in=['IMG', 'GIF'], media_url__startswith=settings.STATIC_URL)
+        for reward in rewards.only('id', 'fish_type', 'media_url', 'media_hash', 'media_variants'):
+            source = finders.find(reward.media_url[len(settings.STATIC_URL):])
+            if not source:
+                self.stdout.write(self.style.WARNING(f'Source not found for reward {reward.id}: {reward.media_url}'))
+                missing += 1
+                continue
+
+            digest = file_sha256(source)
+            variant_files_exist = reward.media_variants and all(
+                (out_dir / Path(variant['url']).name).exists() for variant in reward.media_variants.values()
+            )
+            if digest == reward.media_hash and variant_files_exist and not options['force']:
+                unchanged += 1
+                continue
+
+            jobs.append({
+                'reward_id': reward.id,
+                'fish_type': reward.fish_type,
+                'source': source,
+                'hash': digest,
+                'out_dir': str(out_dir),
+                'url_base': url_base,
+                'widths': widths,
+                'ffmpeg': ffmpeg,
+            })
+
+        updated = []
+        source_bytes = 0
+        variant_bytes = 0
+        if jobs:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                for job, (reward_id, digest, variants) in zip(jobs, pool.map(build_variants, jobs)):
+                    updated.append(FishReward(id=reward_id, media_hash=digest, media_variants=variants))
+                    source_bytes += Path(job['source']).stat().st_size
+                    # Compare against the smallest variant a client would fetch at full size
+                    if variants:
+                        largest = max(variant['width'] for variant in variants.values())
+                        variant_bytes += min(
+                            variant['bytes'] for variant in variants.values() if variant['width'] == largest
+                        )
+            FishReward.objects.bulk_update(updated, ['media_hash', 'media_variants'], batch_size=500)
+            reward_pool.invalidate()
+            staticserve.reset_index()
+
+        elapsed = time.perf_counter() - started
+        if source_bytes:
+            self.stdout.write(
+                f'Full-size payload: {source_bytes / 1e6:.1f} MB originals -> '
+                f'{variant_bytes / 1e6:.1f} MB smallest full-size variants'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Built variants for {len(updated)} rewards in {elapsed:.2f}s. '
+            f'Unchanged: {unchanged}, Missing source: {missing}'
+        ))
@@ -1,31 +1,145 @@
 import json
 import os
+import time
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import transaction
 
+from database import reward_pool
 from database.models import FishReward
 
+# JSON sections and the keys each one reads, in load order
+SECTIONS = {
+    'text_fish': ('TEXT', ('text_fish_message',)),
+    'img_fish': ('IMG', ('img_fish_url', 'img_fish_file')),
+    'gif_fish': ('GIF', ('gif_fish_url', 'gif_fish_file')),
+}
+
+# Characters read from the file per chunk in bulk mode
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_reward_entries(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Stream (section, item) pairs from a rewards JSON file without loading it whole.
+
+    The file must be an object whose values are arrays of objects, like
+    RewardFish.json. Each array item is decoded on its own as soon as enough
+    of the file has been read, so memory stays bounded by the largest item.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    def peek():
+        skip(' \t\r\n')
+        if pos >= len(buf):
+            raise ValueError('Unexpected end of file')
+        return buf[pos]
+
+    def expect(char):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError(f'Expected {char!r} at offset {pos}, found {buf[pos]!r}')
+        pos += 1
+
+    def decode():
+        nonlocal pos
+        peek()  # raw_decode does not skip leading whitespace
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise
+                continue
+            # A value ending exactly at the buffer edge may have been cut short
+            if end == len(buf) and not eof and fill():
+                continue
+            pos = end
+            return value
+
+    fill()
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = decode()
+        expect(':')
+        if peek() == '[':
+            pos += 1
+            if peek() != ']':
+                while True:
+                    yield key, decode()
+                    if peek() == ',':
+                        pos += 1
+                        continue
+                    break
+            expect(']')
+        else:
+            decode()  # ignore non-array values
+        if peek() == ',':
+            pos += 1
+            continue
+        expect('}')
+        return
+
 
 class Command(BaseCommand):
     help = 'Loads fish rewards from RewardFish.json into the database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Path to the rewards JSON file (defaults to database/RewardFish.json).',
+        )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Stream the file and write with chunked bulk_create/bulk_update in one transaction.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what bulk mode would create and update without writing anything.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk_create/bulk_update batch (bulk mode only).',
+        )
+
     def handle(self, *args, **options):
-        json_file_path = Path(settings.BASE_DIR) / 'database' / 'RewardFish.json'
+        if options['file']:
+            json_file_path = Path(options['file'])
+        else:
+            json_file_path = Path(settings.BASE_DIR) / 'database' / 'RewardFish.json'
 
         if not json_file_path.exists():
             raise CommandError(f'File not found at {json_file_path}')
 
-        try:
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                rewards_data = json.load(file)
-        except json.JSONDecodeError as exc:
-            raise CommandError(f'Invalid JSON in file at {json_file_path}: {exc}')
-
-        if not isinstance(rewards_data, dict):
-            raise CommandError('Expected JSON to be an object with keys: text_fish, img_fish, gif_fish')
-
         # Reward assets live under: frontend/static/frontend/rewards
         static_rewards_fs_dir = Path(settings.BASE_DIR) / 'frontend' / 'static' / 'frontend' / 'rewards'
         static_rewards_url_base = f"{settings.STATIC_URL.rstrip('/')}/frontend/rewards/"
@@ -39,7 +153,7 @@ class Command(BaseCommand):
             if not raw_value:
                 return None, None
 
-            raw_posix = raw_value.replace('\', '/')
+            raw_posix = raw_value.replace('\\', '/')
 
             # Already a web URL
             if raw_posix.startswith('http://') or raw_posix.startswith('https://'):
@@ -55,6 +169,21 @@ class Command(BaseCommand):
             expected_fs_path = static_rewards_fs_dir / basename
             return url, expected_fs_path
 
+        if options['bulk'] or options['dry_run']:
+            if options['batch_size'] < 1:
+                raise CommandError('--batch-size must be at least 1')
+            self.load_bulk(json_file_path, normalize_media_url, options['batch_size'], options['dry_run'])
+            return
+
+        try:
+            with open(json_file_path, 'r', encoding='utf-8') as file:
+                rewards_data = json.load(file)
+        except json.JSONDecodeError as exc:
+            raise CommandError(f'Invalid JSON in file at {json_file_path}: {exc}')
+
+        if not isinstance(rewards_data, dict):
+            raise CommandError('Expected JSON to be an object with keys: text_fish, img_fish, gif_fish')
+
         created = 0
         skipped = 0
 
@@ -110,4 +239,99 @@ class Command(BaseCommand):
             )
             created += 1 if was_created else 0
 
+        reward_pool.invalidate()
         self.stdout.write(self.style.SUCCESS(f'Successfully processed rewards. Created: {created}, Skipped: {skipped}'))
+
+    def load_bulk(self, json_file_path, normalize_media_url, batch_size, dry_run):
+        """
+        Stream the file, diff it against existing rows and write the difference in bulk.
+
+        Existing rewards are read with one query per key column (message for
+        TEXT, media_url for IMG/GIF), together with their fish_type. New rows are inserted with bulk_create and
+        rows whose fish_type changed are fixed with bulk_update, all inside a
+        single transaction.
+        """
+        started = time.perf_counter()
+        messages = {}    # message -> fish_type, in file order
+        media_urls = {}  # media_url -> fish_type, in file order
+        entries = 0
+        skipped = 0
+        missing_files = 0
+
+        try:
+            with open(json_file_path, 'r', encoding='utf-8') as file:
+                for section, item in iter_reward_entries(file):
+                    if section not in SECTIONS:
+                        continue
+                    entries += 1
+                    fish_type, keys = SECTIONS[section]
+                    raw_value = next((item.get(key) for key in keys if isinstance(item, dict) and item.get(key)), None)
+
+                    if fish_type == 'TEXT':
+                        if not raw_value:
+                            skipped += 1
+                            continue
+                        messages.setdefault(raw_value, fish_type)
+                        continue
+
+                    media_url, expected_fs_path = normalize_media_url(raw_value)
+                    if not media_url:
+                        skipped += 1
+                        continue
+                    if expected_fs_path and not expected_fs_path.exists():
+                        missing_files += 1
+                    media_urls.setdefault(media_url, fish_type)
+        except ValueError as exc:
+            raise CommandError(f'Invalid JSON in file at {json_file_path}: {exc}')
+        parsed = time.perf_counter()
+
+        # One query per key column to diff against what is already stored: {key: (id, fish_type)}
+        existing_messages = {
+            message: (reward_id, stored_type)
+            for message, reward_id, stored_type in
+            FishReward.objects.filter(message__isnull=False).values_list('message', 'id', 'fish_type')
+        }
+        existing_media = {
+            media_url: (reward_id, stored_type)
+            for media_url, reward_id, stored_type in
+            FishReward.objects.filter(media_url__isnull=False).values_list('media_url', 'id', 'fish_type')
+        }
+
+        to_create = []
+        to_update = []
+        for message, fish_type in messages.items():
+            existing = existing_messages.get(message)
+            if existing is None:
+                to_create.append(FishReward(fish_type=fish_type, message=message, media_url=None))
+            elif existing[1] != fish_type:
+                to_update.append(FishReward(id=existing[0], fish_type=fish_type))
+        for media_url, fish_type in media_urls.items():
+            existing = existing_media.get(media_url)
+            if existing is None:
+                to_create.append(FishReward(fish_type=fish_type, message=None, media_url=media_url))
+            elif existing[1] != fish_type:
+                to_update.append(FishReward(id=existing[0], fish_type=fish_type))
+        diffed = time.perf_counter()
+
+        if not dry_run:
+            with transaction.atomic():
+                FishReward.objects.bulk_create(to_create, batch_size=batch_size)
+                FishReward.objects.bulk_update(to_update, ['fish_type'], batch_size=batch_size)
+            # bulk_create/bulk_update do not send post_save
+            reward_pool.invalidate()
+        finished = time.perf_counter()
+
+        elapsed = finished - started
+        rate = entries / elapsed if elapsed > 0 else 0.0
+        if missing_files:
+            self.stdout.write(self.style.WARNING(f'{missing_files} media file(s) not found in static dir'))
+        self.stdout.write(
+            f'Parsed {entries} entries in {parsed - started:.3f}s, '
+            f'diffed in {diffed - parsed:.3f}s, wrote in {finished - diffed:.3f}s '
+            f'({rate:,.0f} entries/s)'
+        )
+        prefix = 'Dry run, nothing written. Would create' if dry_run else 'Successfully processed rewards. Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}: {len(to_create)}, Updated: {len(to_update)}, '
+            f'Unchanged: {len(messages) + len(media_urls) - len(to_create) - len(to_update)}, Skipped: {skipped}'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:21
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_rewards(apps, schema_editor):
+    """Blank content becomes NULL and duplicated content is merged into its oldest reward."""
+    FishReward = apps.get_model('database', 'FishReward')
+    RedeemedFish = apps.get_model('database', 'RedeemedFish')
+    db = schema_editor.connection.alias
+    for field in ('message', 'media_url'):
+        FishReward.objects.using(db).filter(**{field: ''}).update(**{field: None})
+        duplicated = (
+            FishReward.objects.using(db)
+            .filter(**{f'{field}__isnull': False})
+            .values(field)
+            .annotate(keep=Min('pk'), rows=Count('pk'))
+            .filter(rows__gt=1)
+            .order_by()
+        )
+        for row in duplicated:
+            extra = FishReward.objects.using(db).filter(**{field: row[field]}).exclude(pk=row['keep'])
+            RedeemedFish.objects.using(db).filter(fish_reward__in=extra).update(fish_reward_id=row['keep'])
+            extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rewards, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='fishreward',
+            constraint=models.UniqueConstraint(fields=('message',), name='unique_fishreward_message'),
+        ),
+        migrations.AddConstraint(
+            model_name='fishreward',
+            constraint=models.UniqueConstraint(fields=('media_url',), name='unique_fishreward_media_url'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_redemption_stats(apps, schema_editor):
+    """Seed UserRedemptionStats from existing redemptions with one grouped query."""
+    RedeemedFish = apps.get_model('database', 'RedeemedFish')
+    UserRedemptionStats = apps.get_model('database', 'UserRedemptionStats')
+    db_alias = schema_editor.connection.alias
+
+    totals = (
+        RedeemedFish.objects.using(db_alias)
+        .values('user_id')
+        .annotate(
+            count=Count('id'),
+            total_clicks=Sum('clicks_before_redeem'),
+            max_clicks=Max('clicks_before_redeem'),
+            last_at=Max('redeemed_at'),
+        )
+        .order_by()
+    )
+    UserRedemptionStats.objects.using(db_alias).bulk_create(
+        (
+            UserRedemptionStats(
+                user_id=row['user_id'],
+                redemption_count=row['count'],
+                total_clicks_before_redeem=row['total_clicks'] or 0,
+                max_clicks_before_redeem=row['max_clicks'] or 0,
+                last_redeemed_at=row['last_at'],
+            )
+            for row in totals.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0002_fishreward_unique_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRedemptionStats',
+            fields=[
+                ('user', models.OneToOneField(help_text='The user these totals belong to.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='redemption_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('redemption_count', models.PositiveIntegerField(default=0, help_text='How many fish the user has redeemed.')),
+                ('total_clicks_before_redeem', models.PositiveBigIntegerField(default=0, help_text='Sum of clicks_before_redeem over all redemptions.')),
+                ('max_clicks_before_redeem', models.PositiveIntegerField(default=0, help_text='Highest clicks_before_redeem of any redemption.')),
+                ('last_redeemed_at', models.DateTimeField(blank=True, help_text='Timestamp of the most recent redemption.', null=True)),
+            ],
+            options={
+                'verbose_name': 'User Redemption Stats',
+                'verbose_name_plural': 'User Redemption Stats',
+            },
+        ),
+        migrations.AlterField(
+            model_name='redeemedfish',
+            name='fish_reward',
+            field=models.ForeignKey(db_index=False, help_text='The specific fish reward assigned.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='database.fishreward'),
+        ),
+        migrations.AlterField(
+            model_name='redeemedfish',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='The user who redeemed the reward.', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='redeemedfish',
+            index=models.Index(fields=['user', 'redeemed_at'], name='redeemedfish_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redeemedfish',
+            index=models.Index(fields=['fish_reward', 'redeemed_at'], name='redeemedfish_reward_time_idx'),
+        ),
+        migrations.RunPython(backfill_redemption_stats, migrations.RunPython.noop),
+    ]
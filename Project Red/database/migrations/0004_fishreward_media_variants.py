@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0003_redemption_indexes_and_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fishreward',
+            name='media_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the source media the variants were built from.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='fishreward',
+            name='media_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Transcoded/resized variants: {name: {url, bytes, width, height, content_type}}.'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0004_fishreward_media_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='redeemedfish',
+            index=models.Index(fields=['redeemed_at', 'fish_reward'], name='redeemedfish_time_reward_idx'),
+        ),
+    ]
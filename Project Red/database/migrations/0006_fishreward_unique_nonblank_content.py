@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0005_redemption_time_index'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='fishreward',
+            name='unique_fishreward_message',
+        ),
+        migrations.RemoveConstraint(
+            model_name='fishreward',
+            name='unique_fishreward_media_url',
+        ),
+        migrations.AddConstraint(
+            model_name='fishreward',
+            constraint=models.UniqueConstraint(condition=models.Q(('message__gt', '')), fields=('message',), name='unique_fishreward_message', violation_error_message='A fish reward with this message already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='fishreward',
+            constraint=models.UniqueConstraint(condition=models.Q(('media_url__gt', '')), fields=('media_url',), name='unique_fishreward_media_url', violation_error_message='A fish reward with this media URL already exists.'),
+        ),
+    ]
@@ -1,6 +1,7 @@
-import random
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
 
 # Model to store all possible fish rewards (text, image, gif)
 class FishReward(models.Model):
@@ -32,10 +33,34 @@ class FishReward(models.Model):
         null=True,
         help_text="File path or URL for image/gif rewards."
     )
+    media_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="SHA-256 of the source media the variants were built from."
+    )
+    media_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Transcoded/resized variants: {name: {url, bytes, width, height, content_type}}."
+    )
 
     class Meta:
         verbose_name = "Fish Reward"
         verbose_name_plural = "Fish Rewards"
+        constraints = [
+            # Rewards are keyed by their content. Only non-blank content is
+            # compared: the admin saves an empty field as '' rather than NULL,
+            # and any number of media rewards have no message (and vice versa)
+            models.UniqueConstraint(
+                fields=['message'], condition=Q(message__gt=''), name='unique_fishreward_message',
+                violation_error_message='A fish reward with this message already exists.',
+            ),
+            models.UniqueConstraint(
+                fields=['media_url'], condition=Q(media_url__gt=''), name='unique_fishreward_media_url',
+                violation_error_message='A fish reward with this media URL already exists.',
+            ),
+        ]
         
 
     def __str__(self):
@@ -51,6 +76,7 @@ class RedeemedFish(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,  # covered by the (user, redeemed_at) index below
         help_text="The user who redeemed the reward."
     )  # Link to the user who redeemed
     clicks_before_redeem = models.PositiveIntegerField(
@@ -61,6 +87,7 @@ class RedeemedFish(models.Model):
         FishReward,
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,  # covered by the (fish_reward, redeemed_at) index below
         help_text="The specific fish reward assigned."
     )
     redeemed_at = models.DateTimeField(
@@ -72,7 +99,15 @@ class RedeemedFish(models.Model):
         # Only assign a fish reward the first time the object is saved
         if not self.pk and not self.fish_reward:
             self.fish_reward = self.assign_fish_reward()
-        super().save(*args, **kwargs)
+
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # Keep the per-user summary row in step with the new redemption
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            UserRedemptionStats.record_redemption(self)
 
     def assign_fish_reward(self):
         """
@@ -86,17 +121,102 @@ class RedeemedFish(models.Model):
         else:
             fish_type = 'GIF'
 
-        # Filter available rewards of the correct type
-        rewards = FishReward.objects.filter(fish_type=fish_type)
-
-        # Randomly select one reward from the filtered list
-        return random.choice(rewards) if rewards.exists() else None
+        # Randomly select one reward of that type from the in-memory pool
+        from .reward_pool import choose_reward
+        return choose_reward(fish_type)
 
     class Meta:
         verbose_name = "Redeemed Fish"
         verbose_name_plural = "Redeemed Fish"
+        indexes = [
+            models.Index(fields=['user', 'redeemed_at'], name='redeemedfish_user_time_idx'),
+            models.Index(fields=['fish_reward', 'redeemed_at'], name='redeemedfish_reward_time_idx'),
+            # Range scans over redeemed_at (the admin report, archiving) that only need the reward
+            models.Index(fields=['redeemed_at', 'fish_reward'], name='redeemedfish_time_reward_idx'),
+        ]
 
     def __str__(self):
         # Display format for admin or debugging
         fish_info = f"{self.fish_reward.fish_type} - {self.fish_reward.id}" if self.fish_reward else "No Reward"
-        return f"{self.user.username} redeemed {fish_info} after {self.clicks_before_redeem} clicks"
\ No newline at end of file
+        return f"{self.user.username} redeemed {fish_info} after {self.clicks_before_redeem} clicks"
+
+
+# Model holding running redemption totals per user
+class UserRedemptionStats(models.Model):
+    """
+    Per-user redemption summary, updated incrementally by RedeemedFish.save.
+
+    Lets profile pages and tier decisions read one row instead of aggregating
+    RedeemedFish. Totals are lifetime values: deleting or archiving
+    redemptions does not subtract from them.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='redemption_stats',
+        help_text="The user these totals belong to."
+    )
+    redemption_count = models.PositiveIntegerField(
+        default=0,
+        help_text="How many fish the user has redeemed."
+    )
+    total_clicks_before_redeem = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Sum of clicks_before_redeem over all redemptions."
+    )
+    max_clicks_before_redeem = models.PositiveIntegerField(
+        default=0,
+        help_text="Highest clicks_before_redeem of any redemption."
+    )
+    last_redeemed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp of the most recent redemption."
+    )
+
+    class Meta:
+        verbose_name = "User Redemption Stats"
+        verbose_name_plural = "User Redemption Stats"
+
+    @classmethod
+    def record_redemption(cls, redemption):
+        """
+        Add one redemption to the user's totals with F() expressions.
+
+        The common case is a single UPDATE; the row is only created on the
+        user's first redemption.
+        """
+        clicks = redemption.clicks_before_redeem
+        manager = cls.objects.db_manager(redemption._state.db)
+        updates = {
+            'redemption_count': F('redemption_count') + 1,
+            'total_clicks_before_redeem': F('total_clicks_before_redeem') + clicks,
+            'max_clicks_before_redeem': Greatest(F('max_clicks_before_redeem'), Value(clicks)),
+            'last_redeemed_at': redemption.redeemed_at,
+        }
+        if manager.filter(user_id=redemption.user_id).update(**updates):
+            return
+
+        _, created = manager.get_or_create(
+            user_id=redemption.user_id,
+            defaults={
+                'redemption_count': 1,
+                'total_clicks_before_redeem': clicks,
+                'max_clicks_before_redeem': clicks,
+                'last_redeemed_at': redemption.redeemed_at,
+            },
+        )
+        if not created:
+            # Another request created the row between our UPDATE and INSERT
+            manager.filter(user_id=redemption.user_id).update(**updates)
+
+    @property
+    def average_clicks_before_redeem(self):
+        if not self.redemption_count:
+            return 0
+        return self.total_clicks_before_redeem / self.redemption_count
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.user_id}: {self.redemption_count} redeemed, max {self.max_clicks_before_redeem} clicks"
\ No newline at end of file
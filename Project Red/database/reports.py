@@ -0,0 +1,138 @@
+"""
+Aggregated redemption report for the admin.
+
+The report covers the last N whole UTC days of redemptions, today
+included: redemptions per tier per day and the most awarded rewards. Live
+rows come from a single grouped query on (fish_reward, day). It is answered
+by a range scan of the (redeemed_at, fish_reward) index, which covers the
+query, so the cost follows the number of redemptions in the window rather
+than the size of the table. Months moved out by archive_redemptions are
+added from the per-day, per-reward counts in their segment footers, so a
+window reaching past the archive cutoff still counts every redemption.
+Tiers are the reward's fish_type, looked up from the small FishReward table
+afterwards.
+
+Results are kept per worker for REDEMPTION_REPORT_TTL seconds. Only one
+thread computes a given report at a time, so a burst of page loads costs one
+query.
+"""
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, DateField, F, Func, IntegerField
+from django.utils import timezone
+
+from . import archive
+from .models import FishReward, RedeemedFish
+
+# Shown instead of a tier for redemptions whose reward was deleted
+NO_REWARD = 'None'
+
+_lock = threading.Lock()
+_reports = {}  # {(days, top, database alias): (computed_at, report)}
+
+
+def ttl():
+    return getattr(settings, 'REDEMPTION_REPORT_TTL', 60)
+
+
+def _utc_date(field):
+    # DATE() is native on SQLite, PostgreSQL and MySQL; TruncDate would call
+    # back into Python for every row on SQLite
+    return Func(field, function='DATE', output_field=DateField())
+
+
+def _not_for_ordering(field):
+    # Unary plus: without it SQLite prefers walking the whole (fish_reward,
+    # redeemed_at) index in GROUP BY order over range-scanning redeemed_at
+    return Func(F(field), template='+%(expressions)s', output_field=IntegerField())
+
+
+def _label(reward):
+    if reward is None:
+        return '(deleted)'
+    return reward.message or reward.media_url or ''
+
+
+def compute_report(days, top=20, using='default'):
+    """Build the report for the last `days` UTC days; returns a dict of plain values."""
+    # Whole days, so archived months can be added from their per-day counts
+    first_day = timezone.now().astimezone(dt_timezone.utc).date() - timedelta(days=days - 1)
+    since = datetime.combine(first_day, dt_time.min, tzinfo=dt_timezone.utc)
+    rows = (
+        RedeemedFish.objects.using(using)
+        .filter(redeemed_at__gte=since)
+        .annotate(day=_utc_date('redeemed_at'), reward_id=_not_for_ordering('fish_reward_id'))
+        .values_list('reward_id', 'day')
+        .annotate(count=Count('*'))
+        .order_by()
+    )
+
+    per_reward = {}
+    per_day = {}
+    for reward_id, day, count in rows:
+        per_reward[reward_id] = per_reward.get(reward_id, 0) + count
+        # DATE() comes back as a string from some backends
+        per_day.setdefault(str(day), {}).setdefault(reward_id, 0)
+        per_day[str(day)][reward_id] += count
+    archived = 0
+    for (day, reward_id), count in archive.reward_counts_by_day(since=first_day).items():
+        archived += count
+        per_reward[reward_id] = per_reward.get(reward_id, 0) + count
+        per_day.setdefault(day.isoformat(), {}).setdefault(reward_id, 0)
+        per_day[day.isoformat()][reward_id] += count
+
+    rewards = FishReward.objects.using(using).in_bulk([pk for pk in per_reward if pk is not None])
+    tiers = [fish_type for fish_type, _ in FishReward.FISH_TYPE_CHOICES]
+    if None in per_reward:
+        tiers.append(NO_REWARD)
+
+    def tier_of(reward_id):
+        reward = rewards.get(reward_id)
+        return reward.fish_type if reward is not None else NO_REWARD
+
+    daily = []
+    for day in sorted(per_day):
+        counts = dict.fromkeys(tiers, 0)
+        for reward_id, count in per_day[day].items():
+            tier = tier_of(reward_id)
+            counts[tier] = counts.get(tier, 0) + count
+        daily.append({'day': day, 'counts': [counts[tier] for tier in tiers], 'total': sum(counts.values())})
+
+    ranked = sorted(((count, pk) for pk, count in per_reward.items() if pk is not None), reverse=True)[:top]
+    top_rewards = [
+        {'id': pk, 'fish_type': tier_of(pk), 'label': _label(rewards.get(pk)), 'count': count}
+        for count, pk in ranked
+    ]
+
+    return {
+        'days': days,
+        'since': since,
+        'tiers': tiers,
+        'daily': daily,
+        'tier_totals': [sum(row['counts'][index] for row in daily) for index in range(len(tiers))],
+        'total': sum(per_reward.values()),
+        'archived': archived,
+        'top_rewards': top_rewards,
+        'computed_at': timezone.now(),
+    }
+
+
+def get_report(days=30, top=20, using='default'):
+    """Return the cached report, recomputing it when missing or older than the TTL."""
+    key = (days, top, using)
+    cached = _reports.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl():
+        return cached[1]
+    with _lock:
+        # Another thread may have computed it while we waited
+        cached = _reports.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl():
+            return cached[1]
+        report = compute_report(days, top, using)
+        for stale in [k for k, (at, _) in _reports.items() if time.monotonic() - at >= ttl()]:
+            del _reports[stale]
+        _reports[key] = (time.monotonic(), report)
+    return report
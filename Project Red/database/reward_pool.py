@@ -0,0 +1,81 @@
+"""
+Per-worker cache of the FishReward catalog, grouped by fish_type.
+
+Picking a reward for a redemption used to evaluate the whole queryset for the
+tier on every save. The pool loads every reward once as compact tuples and
+serves random picks from memory, so a redemption needs no reward queries.
+
+Saves and deletes in this process invalidate the pool through signals. Other
+workers pick up changes after REWARD_POOL_TTL seconds at the latest; bulk
+writes that bypass signals (bulk_create, queryset.update) must call
+invalidate() themselves.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FishReward
+
+# Columns kept per reward; also the field order passed to FishReward.from_db
+POOL_FIELDS = ('id', 'fish_type', 'message', 'media_url', 'media_variants')
+
+_lock = threading.Lock()
+_pool = None          # {fish_type: ((id, fish_type, message, media_url, media_variants), ...)}
+_pool_db = None       # database alias the pool was loaded from
+_loaded_at = 0.0
+_version = 0          # bumped on every invalidation
+
+
+def _ttl():
+    return getattr(settings, 'REWARD_POOL_TTL', 300)
+
+
+def _load():
+    """Load every reward in a single query and group the rows by fish_type."""
+    global _pool, _pool_db, _loaded_at
+    version = _version
+    queryset = FishReward.objects.order_by('id')
+    grouped = {fish_type: [] for fish_type, _ in FishReward.FISH_TYPE_CHOICES}
+    for row in queryset.values_list(*POOL_FIELDS):
+        grouped.setdefault(row[1], []).append(row)
+    pool = {fish_type: tuple(rows) for fish_type, rows in grouped.items()}
+
+    with _lock:
+        # Only publish if nothing was invalidated while we were querying
+        if version == _version:
+            _pool, _pool_db, _loaded_at = pool, queryset.db, time.monotonic()
+    return pool
+
+
+def get_pool():
+    """Return the cached pool, reloading it when missing or older than the TTL."""
+    pool = _pool
+    if pool is None or time.monotonic() - _loaded_at > _ttl():
+        pool = _load()
+    return pool
+
+
+def choose_reward(fish_type):
+    """Return a random FishReward of the given type without querying, or None if there are none."""
+    rows = get_pool().get(fish_type)
+    if not rows:
+        return None
+    return FishReward.from_db(_pool_db, POOL_FIELDS, random.choice(rows))
+
+
+def invalidate():
+    """Drop the cached pool so the next pick reloads it."""
+    global _pool, _version
+    with _lock:
+        _pool = None
+        _version += 1
+
+
+@receiver(post_save, sender=FishReward, dispatch_uid='reward_pool_post_save')
+@receiver(post_delete, sender=FishReward, dispatch_uid='reward_pool_post_delete')
+def _invalidate_on_change(sender, **kwargs):
+    invalidate()
@@ -0,0 +1,69 @@
+"""
+{% reward_media reward %} renders a FishReward with its built variants.
+
+IMG rewards become a <picture> whose WebP and JPEG sources list every width
+in srcset, so the browser downloads the smallest one that fills the slot.
+GIF rewards become a looping, muted <video> when an MP4 variant exists and
+an animated WebP otherwise; the original GIF is the last fallback. Rewards
+without variants (build_reward_variants not run yet) render their
+media_url as is, and TEXT rewards their message.
+"""
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+# Slot width hint for srcset; rewards are shown at most 640 CSS pixels wide
+DEFAULT_SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+def _srcset(variants, prefix):
+    """'url 320w, url 640w' for the variants named prefix_<width>, narrowest first."""
+    chosen = sorted(
+        (variant for name, variant in variants.items() if name.startswith(prefix)),
+        key=lambda variant: variant['width'],
+    )
+    return ', '.join(f"{variant['url']} {variant['width']}w" for variant in chosen), chosen
+
+
+def render_reward_media(reward, sizes=DEFAULT_SIZES, alt=''):
+    variants = reward.media_variants or {}
+    if reward.fish_type == 'TEXT' or not reward.media_url:
+        return format_html('<p class="reward-message">{}</p>', reward.message or '')
+
+    if reward.fish_type == 'GIF':
+        mp4 = variants.get('mp4')
+        webp = variants.get('webp')
+        if mp4:
+            fallback = format_html('<img src="{}" alt="{}">', (webp or {}).get('url', reward.media_url), alt)
+            return format_html(
+                '<video class="reward-media" autoplay loop muted playsinline width="{}" height="{}">'
+                '<source src="{}" type="video/mp4">{}</video>',
+                mp4['width'], mp4['height'], mp4['url'], fallback,
+            )
+        if webp:
+            return format_html(
+                '<picture class="reward-media"><source srcset="{}" type="image/webp">'
+                '<img src="{}" alt="{}" width="{}" height="{}" loading="lazy"></picture>',
+                webp['url'], reward.media_url, alt, webp['width'], webp['height'],
+            )
+        return format_html('<img class="reward-media" src="{}" alt="{}" loading="lazy">', reward.media_url, alt)
+
+    webp_srcset, _ = _srcset(variants, 'webp_')
+    jpeg_srcset, jpegs = _srcset(variants, 'jpeg_')
+    if not jpegs:
+        return format_html('<img class="reward-media" src="{}" alt="{}" loading="lazy">', reward.media_url, alt)
+    largest = jpegs[-1]
+    webp_source = format_html(
+        '<source srcset="{}" sizes="{}" type="image/webp">', webp_srcset, sizes,
+    ) if webp_srcset else ''
+    return format_html(
+        '<picture class="reward-media">{}'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" width="{}" height="{}" loading="lazy"></picture>',
+        webp_source, largest['url'], jpeg_srcset, sizes, alt, largest['width'], largest['height'],
+    )
+
+
+@register.simple_tag
+def reward_media(reward, sizes=DEFAULT_SIZES, alt=''):
+    return render_reward_media(reward, sizes, alt)
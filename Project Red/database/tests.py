@@ -1,3 +1,181 @@
-from django.test import TestCase
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import archive, reports
+from .models import FishReward, RedeemedFish
+
+
+def _variant(name, width, content_type):
+    return {'url': f'/static/frontend/variants/{name}', 'bytes': 1, 'width': width, 'height': width // 2,
+            'content_type': content_type}
+
+
+class RewardMediaTagTests(SimpleTestCase):
+    def render(self, reward):
+        return Template('{% load rewards %}{% reward_media reward %}').render(Context({'reward': reward}))
+
+    def test_image_lists_every_width_in_srcset(self):
+        reward = FishReward(fish_type='IMG', media_url='/static/frontend/rewards/a.jpg', media_variants={
+            'jpeg_640': _variant('a-640w.jpg', 640, 'image/jpeg'),
+            'jpeg_320': _variant('a-320w.jpg', 320, 'image/jpeg'),
+            'webp_320': _variant('a-320w.webp', 320, 'image/webp'),
+            'webp_640': _variant('a-640w.webp', 640, 'image/webp'),
+        })
+        html = self.render(reward)
+        self.assertIn('srcset="/static/frontend/variants/a-320w.webp 320w, /static/frontend/variants/a-640w.webp 640w"', html)
+        self.assertIn('src="/static/frontend/variants/a-640w.jpg"', html)
+        self.assertIn('320w, /static/frontend/variants/a-640w.jpg 640w"', html)
+
+    def test_gif_plays_the_mp4_variant(self):
+        reward = FishReward(fish_type='GIF', media_url='/static/frontend/rewards/b.gif', media_variants={
+            'webp': _variant('b.webp', 200, 'image/webp'),
+            'mp4': _variant('b.mp4', 200, 'video/mp4'),
+        })
+        html = self.render(reward)
+        self.assertIn('<video', html)
+        self.assertIn('<source src="/static/frontend/variants/b.mp4" type="video/mp4">', html)
+
+    def test_reward_without_variants_uses_its_media_url(self):
+        reward = FishReward(fish_type='GIF', media_url='/static/frontend/rewards/b.gif')
+        self.assertIn('src="/static/frontend/rewards/b.gif"', self.render(reward))
+
+
+class BuildRewardVariantsTests(SimpleTestCase):
+    def test_missing_pillow_is_named(self):
+        with mock.patch.dict(sys.modules, {'PIL': None}):
+            with self.assertRaisesMessage(CommandError, 'pip install Pillow'):
+                call_command('build_reward_variants', stdout=StringIO())
+
+
+class FishRewardUniquenessTests(TestCase):
+    def test_blank_content_is_not_compared(self):
+        # The admin form saves an empty message as ''
+        for url in ('/media/a.jpg', '/media/b.jpg'):
+            reward = FishReward(fish_type='IMG', message='', media_url=url)
+            reward.full_clean()
+            reward.save()
+        for message in ('One fish', 'Two fish'):
+            reward = FishReward(fish_type='TEXT', message=message, media_url='')
+            reward.full_clean()
+            reward.save()
+        self.assertEqual(FishReward.objects.count(), 4)
+
+    def test_repeated_content_is_refused(self):
+        FishReward.objects.create(fish_type='TEXT', message='One fish', media_url='')
+        with self.assertRaisesMessage(ValidationError, 'A fish reward with this message already exists.'):
+            FishReward(fish_type='TEXT', message='One fish', media_url='').full_clean()
+
+
+class ArchivedReportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(REDEMPTION_ARCHIVE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(archive.close_segments)
+
+        user = User.objects.create_user('redeemer')
+        reward = FishReward.objects.create(fish_type='TEXT', message='One fish')
+        now = timezone.now()
+        for age in (400, 200, 100, 3, 0):
+            redemption = RedeemedFish.objects.create(user=user, fish_reward=reward, clicks_before_redeem=10)
+            RedeemedFish.objects.filter(pk=redemption.pk).update(redeemed_at=now - timedelta(days=age))
+        call_command('archive_redemptions', older_than_days=60, stdout=StringIO())
+
+    def test_windows_past_the_archive_cutoff_count_archived_months(self):
+        self.assertEqual(RedeemedFish.objects.count(), 2)
+        report = reports.compute_report(days=366)
+        self.assertEqual((report['total'], report['archived']), (4, 2))
+        self.assertEqual(report['tier_totals'][0], 4)
+        self.assertEqual(reports.compute_report(days=30)['archived'], 0)
+
+    def test_segments_without_footer_counts_are_counted_from_their_rows(self):
+        expected = archive.reward_counts_by_day()
+        for segment in archive.segments():
+            segment._daily = None
+        self.assertEqual(archive.reward_counts_by_day(), expected)
+        self.assertEqual(sum(expected.values()), 3)
+
+
+class SegmentRoundTripTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(REDEMPTION_ARCHIVE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(archive.close_segments)
+
+    def micros(self, day, hour=0):
+        return archive.to_micros(datetime(2024, 1, day, hour, tzinfo=dt_timezone.utc))
+
+    def rows(self):
+        # Sorted by (user, redeemed_at, id) like the archive command writes them; users 1, 4, 9 and 12
+        return [
+            (10, 1, 7, 5, self.micros(3)), (11, 1, 0, 160, self.micros(3, 5)), (12, 1, 7, 20, self.micros(20)),
+            (13, 4, 8, 400, self.micros(1)),
+            (14, 9, 7, 30, self.micros(2)), (15, 9, 7, 31, self.micros(2)), (16, 9, 8, 32, self.micros(9)),
+            (17, 9, 7, 33, self.micros(30)),
+            (18, 12, 8, 350, self.micros(31, 23)),
+        ]
+
+    def test_written_rows_read_back_across_blocks(self):
+        path = archive.segment_path('2024-01', 0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with mock.patch.object(archive, 'BLOCK_ROWS', 2):  # several blocks, users spanning them
+            self.assertEqual(archive.write_segment(path, iter(self.rows())), 9)
+
+        with archive.Segment(path) as segment:
+            self.assertEqual(list(segment.iter_rows()), self.rows())
+            self.assertEqual(list(segment.iter_ids()), list(range(10, 19)))
+            self.assertEqual(segment.max_id, 18)
+            for user_id, expected in ((1, (0, 3)), (4, (3, 4)), (9, (4, 8)), (12, (8, 9))):
+                self.assertEqual(segment.user_rows(user_id), expected)
+            for missing in (0, 2, 10, 99):
+                self.assertEqual(segment.user_rows(missing), (0, 0))
+            self.assertEqual(
+                list(segment.iter_rows(*segment.user_rows(9), columns=('id', 'clicks_before_redeem'))),
+                [(14, 30), (15, 31), (16, 32), (17, 33)],
+            )
+            day = self.micros(2) // (86400 * 1_000_000)
+            self.assertIn([day, 7, 2], segment.daily_reward_counts())
+
+    def test_iter_redemptions_merges_the_archive_and_the_live_table(self):
+        user = User.objects.create_user('keeper')
+        reward = FishReward.objects.create(fish_type='TEXT', message='Kept fish')
+        now = timezone.now()
+        live = []
+        for age in (5, 1, 3):
+            redemption = RedeemedFish.objects.create(user=user, fish_reward=reward, clicks_before_redeem=age)
+            RedeemedFish.objects.filter(pk=redemption.pk).update(redeemed_at=now - timedelta(days=age))
+            live.append(redemption.pk)
+        archived = [(100, user.pk, reward.pk, 1, self.micros(4)), (101, user.pk, 0, 2, self.micros(6))]
+        archive_path = archive.segment_path('2024-01', 0)
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        archive.write_segment(archive_path, archived)
+
+        rows = list(archive.iter_redemptions())
+        # Archive first, then live rows oldest first whatever their ids
+        self.assertEqual([row.id for row in rows], [100, 101, live[0], live[2], live[1]])
+        self.assertIsNone(rows[1].fish_reward_id)
+        self.assertEqual(rows[0].redeemed_at, datetime(2024, 1, 4, tzinfo=dt_timezone.utc))
+        self.assertEqual([row.id for row in archive.iter_redemptions(user_id=user.pk + 1)], [])
+        self.assertEqual(
+            list(archive.iter_redemptions(user_id=user.pk, since=datetime(2024, 1, 5, tzinfo=dt_timezone.utc),
+                                          columns=('id',))),
+            [(101,), (live[0],), (live[2],), (live[1],)],
+        )
+        self.assertEqual(
+            [row.id for row in archive.iter_redemptions(until=now - timedelta(days=2))], [100, 101, live[0], live[2]]
+        )
@@ -0,0 +1,214 @@
+"""
+Keyword chatbot that picks interruption replies from database/ChatbotReply.json.
+
+Every keyword in the corpus is compiled into one Aho-Corasick automaton, so
+a message is scanned once, in time proportional to its length plus the
+number of hits, however many replies the corpus holds. Keywords only count
+as whole words or phrases, and matching ignores case and repeated
+whitespace.
+
+A reply is drawn at random from the replies whose keywords matched,
+weighted by its corpus weight times the number of distinct keywords it
+matched. A fallback reply is drawn when nothing matches. The matching step
+is cached in an LRU keyed on the normalized message; the random draw is
+not, so repeated messages still get varied replies.
+
+The engine is built on first use. After that the file's mtime is checked at
+most every CHATBOT_RELOAD_INTERVAL seconds and the engine is rebuilt when it
+changes. A broken corpus is logged and the previous engine is kept.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Distinct normalized messages whose matches are cached per engine
+MATCH_CACHE_SIZE = 4096
+
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Casefold and collapse whitespace so equivalent messages share matches and cache entries."""
+    return _whitespace_re.sub(' ', text.casefold()).strip()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping whole-word keyword hits to payload ids."""
+
+    def __init__(self, keywords):
+        # keywords: {keyword: (payload ids)}; states are indices into these lists
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]  # ((keyword length, payload ids), ...) ending at each state
+        for keyword, payloads in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += ((len(keyword), tuple(payloads)),)
+
+        # Breadth-first fail links; outputs inherit their fail state's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Yield (start, end, payload ids) for every keyword occurrence bounded by non-word characters."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            for length, payloads in output[state]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                yield start, end, payloads
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class Reply:
+    __slots__ = ('reply_id', 'text', 'weight')
+
+    def __init__(self, reply_id, text, weight):
+        self.reply_id = reply_id
+        self.text = text
+        self.weight = weight
+
+
+class ReplyEngine:
+    """A compiled corpus: replies, fallbacks and the keyword automaton."""
+
+    def __init__(self, corpus):
+        self.replies = []
+        keywords = {}
+        for entry in corpus.get('chatbot_replies', []):
+            reply = _parse_reply(entry)
+            index = len(self.replies)
+            self.replies.append(reply)
+            entry_keywords = entry.get('keywords')
+            if not isinstance(entry_keywords, list) or not entry_keywords:
+                raise ValueError(f'Reply {reply.reply_id} needs a non-empty keywords list')
+            for keyword in {normalize(str(k)) for k in entry_keywords} - {''}:
+                keywords.setdefault(keyword, []).append(index)
+        self.fallbacks = [_parse_reply(entry) for entry in corpus.get('fallback_replies', [])]
+        self.automaton = KeywordAutomaton(keywords)
+        self.keyword_count = len(keywords)
+        self.match = lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match)
+
+    def _match(self, text):
+        """Return ((reply index, score), ...) for a normalized message, and the keywords hit."""
+        hits = {}
+        matched = set()
+        for start, end, payloads in self.automaton.find(text):
+            keyword = text[start:end]
+            matched.add(keyword)
+            for index in payloads:
+                hits.setdefault(index, set()).add(keyword)
+        scored = tuple((index, self.replies[index].weight * len(words)) for index, words in sorted(hits.items()))
+        return scored, tuple(sorted(matched))
+
+    def reply(self, message, rng=random):
+        """Pick a reply for a message; returns (Reply or None, matched keywords)."""
+        scored, matched = self.match(normalize(message))
+        if scored:
+            indices, scores = zip(*scored)
+            return self.replies[rng.choices(indices, weights=scores)[0]], matched
+        if self.fallbacks:
+            return rng.choices(self.fallbacks, weights=[r.weight for r in self.fallbacks])[0], matched
+        return None, matched
+
+
+def _parse_reply(entry):
+    try:
+        weight = float(entry.get('weight', 1))
+        reply = Reply(str(entry['reply_id']), str(entry['reply']), weight)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError(f'Malformed chatbot reply: {entry!r}')
+    if weight <= 0:
+        raise ValueError(f'Reply {reply.reply_id} needs a positive weight')
+    return reply
+
+
+def corpus_path():
+    return Path(getattr(settings, 'CHATBOT_CORPUS', Path(settings.BASE_DIR) / 'database' / 'ChatbotReply.json'))
+
+
+def load_engine(path):
+    """Build an engine from a corpus file; an empty file gives an empty engine."""
+    text = Path(path).read_text(encoding='utf-8')
+    return ReplyEngine(json.loads(text) if text.strip() else {})
+
+
+_engine = None
+_engine_mtime = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the current engine, rebuilding it if the corpus file changed."""
+    global _engine, _engine_mtime, _checked_at
+    interval = getattr(settings, 'CHATBOT_RELOAD_INTERVAL', 2.0)
+    if _engine is not None and time.monotonic() - _checked_at < interval:
+        return _engine
+
+    with _lock:
+        if _engine is not None and time.monotonic() - _checked_at < interval:
+            return _engine
+        _checked_at = time.monotonic()
+        path = corpus_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if _engine is None or mtime != _engine_mtime:
+            try:
+                _engine = load_engine(path) if mtime is not None else ReplyEngine({})
+            except (OSError, ValueError) as e:
+                if _engine is None:
+                    raise
+                logger.error('Keeping the previous chatbot corpus; reloading %s failed: %s', path, e)
+            _engine_mtime = mtime
+    return _engine
+
+
+def reset():
+    """Forget the loaded engine so the next request reloads the corpus."""
+    global _engine, _engine_mtime
+    with _lock:
+        _engine = None
+        _engine_mtime = None
@@ -0,0 +1,205 @@
+"""
+In-process pub/sub hub behind the Server-Sent Events stream.
+
+Events are published to a channel: BROADCAST for every open tab, or
+user_channel(user_id) for one player's tabs. Each channel keeps its last
+SSE_HISTORY_SIZE events in a ring buffer (for at most SSE_MAX_CHANNELS
+channels), so a reconnecting client that sends Last-Event-ID gets what it
+missed. Event ids are "<epoch>-<seq>". The epoch
+changes whenever the process restarts, and a client holding an id from an
+older epoch is told to resync instead of getting a partial replay.
+
+Subscribers are bounded asyncio queues on the event loop of the connection
+that owns them. publish() may be called from any thread (for example from a
+sync view or a model signal) and hands events to each subscriber's loop.
+A subscriber whose queue fills up is marked overflowed and its stream ends;
+the client reconnects and replays from the ring buffer, so one slow tab
+cannot grow memory without bound.
+
+The hub is per process, and streams are only served by ASGI workers while
+redemptions usually happen in WSGI workers. Code that runs anywhere should
+therefore publish through events.relay, which writes to a table that every
+ASGI worker tails into its own hub. broadcast() and publish_to_user() here
+only reach the streams of the calling process. Event ids are per worker, so
+a client that reconnects to a different worker is told to resync.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+BROADCAST = 'broadcast'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Event:
+    __slots__ = ('seq', 'channel', 'name', 'data')
+
+    def __init__(self, seq, channel, name, data):
+        self.seq = seq
+        self.channel = channel
+        self.name = name
+        self.data = data  # already JSON-encoded
+
+
+class Subscriber:
+    """One open stream: its channels, loop and bounded queue."""
+
+    def __init__(self, channels, queue_size):
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+        self.closed = False
+
+    def _put(self, event):
+        # Runs on the subscriber's loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the stream so it can end and let the client resume
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class Hub:
+    def __init__(self, history_size, max_channels):
+        self.epoch = format(int(time.time() * 1000), 'x')
+        self._seq = itertools.count(1)
+        self._history_size = history_size
+        self._max_channels = max_channels
+        self._history = OrderedDict()  # {channel: deque of Event}, least recently published first
+        self._evicted = {}      # {channel: seq of the newest event dropped from its history}
+        self._dropped_seq = 0   # newest seq of any channel history dropped entirely
+        self._subscribers = {}  # {channel: set of Subscriber}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return self._count
+
+    def event_id(self, event):
+        return f'{self.epoch}-{event.seq}'
+
+    def publish(self, channel, name, data):
+        """Publish a JSON-serializable payload; safe to call from any thread."""
+        return self.publish_encoded(channel, name, json.dumps(data, separators=(',', ':')))
+
+    def publish_encoded(self, channel, name, encoded):
+        """Publish a payload that is already JSON text (one line)."""
+        with self._lock:
+            event = Event(next(self._seq), channel, name, encoded)
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self._history_size)
+                if len(self._history) > self._max_channels:
+                    self._drop_oldest_channel()
+            else:
+                self._history.move_to_end(channel)
+            if len(history) == history.maxlen:
+                self._evicted[channel] = history[0].seq
+            history.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is subscriber.loop:
+                subscriber._put(event)
+            elif not subscriber.loop.is_closed():
+                subscriber.loop.call_soon_threadsafe(subscriber._put, event)
+        return event
+
+    def _drop_oldest_channel(self):
+        # Bounds memory for per-user channels of players who are long gone
+        channel, history = self._history.popitem(last=False)
+        self._evicted.pop(channel, None)
+        if history:
+            self._dropped_seq = max(self._dropped_seq, history[-1].seq)
+
+    def subscribe(self, channels, last_event_id=None):
+        """
+        Register a subscriber; returns (subscriber, events to replay, needs_reset).
+
+        Registration and the history snapshot happen under one lock, so no
+        event is both replayed and queued, and none falls between the two.
+        """
+        subscriber = Subscriber(channels, _setting('SSE_QUEUE_SIZE', 64))
+        with self._lock:
+            for channel in subscriber.channels:
+                self._subscribers.setdefault(channel, set()).add(subscriber)
+            self._count += 1
+            replay, reset = self._replay(subscriber.channels, last_event_id)
+        return subscriber, replay, reset
+
+    def _replay(self, channels, last_event_id):
+        if not last_event_id:
+            return [], False
+        epoch, _, seq = last_event_id.partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return [], True
+        last_seq = int(seq)
+        replay = []
+        reset = False
+        for channel in channels:
+            # Events the client has not seen were already dropped from the buffer
+            history = self._history.get(channel)
+            evicted = self._evicted.get(channel, 0) if history is not None else self._dropped_seq
+            if evicted > last_seq:
+                reset = True
+            replay.extend(event for event in history or () if event.seq > last_seq)
+        replay.sort(key=lambda event: event.seq)
+        return replay, reset
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber; calling it again is a no-op."""
+        with self._lock:
+            if subscriber.closed:
+                return
+            subscriber.closed = True
+            for channel in subscriber.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[channel]
+            self._count -= 1
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = Hub(_setting('SSE_HISTORY_SIZE', 256), _setting('SSE_MAX_CHANNELS', 10000))
+    return _hub
+
+
+def broadcast(name, data):
+    """Send an event to every open stream in this process."""
+    return get_hub().publish(BROADCAST, name, data)
+
+
+def publish_to_user(user_id, name, data):
+    """Send an event to one player's open streams in this process."""
+    return get_hub().publish(user_channel(user_id), name, data)
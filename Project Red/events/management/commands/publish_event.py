@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events import relay
+
+
+class Command(BaseCommand):
+    help = (
+        'Pushes a popup message or a fake ad to every open game tab, or to the tabs of the given players, '
+        'through the event outbox. Works from any process; the ASGI workers relay it within a second.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', choices=['popup', 'ad'], help='popup shows a toast, ad spawns an ad.')
+        parser.add_argument('--message', default='', help='Text of a popup.')
+        parser.add_argument('--level', choices=['info', 'warn', 'error'], default='info', help='Popup style.')
+        parser.add_argument('--image', default=None, help='Static URL of the ad image; random when omitted.')
+        parser.add_argument('--user', action='append', default=[], help='Username to send to; repeatable.')
+
+    def handle(self, *args, **options):
+        if options['event'] == 'popup':
+            if not options['message'].strip():
+                raise CommandError('A popup needs --message')
+            data = {'message': options['message'], 'level': options['level']}
+        else:
+            data = {'image': options['image']} if options['image'] else {}
+
+        if not options['user']:
+            relay.broadcast(options['event'], data)
+            self.stdout.write(self.style.SUCCESS(f"Broadcast {options['event']} to every open stream"))
+            return
+        users = dict(get_user_model().objects.filter(username__in=options['user']).values_list('username', 'pk'))
+        missing = sorted(set(options['user']) - set(users))
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(missing)}")
+        for pk in users.values():
+            relay.publish_to_user(pk, options['event'], data)
+        self.stdout.write(self.style.SUCCESS(f"Sent {options['event']} to {len(users)} players"))
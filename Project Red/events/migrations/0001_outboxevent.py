@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(help_text="events.hub channel: 'broadcast' or 'user:<id>'.", max_length=64)),
+                ('name', models.CharField(help_text='SSE event name, e.g. reward, popup or ad.', max_length=32)),
+                ('data', models.TextField(help_text='JSON-encoded payload.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='When the event was published.')),
+            ],
+            options={
+                'verbose_name': 'Outbox Event',
+                'verbose_name_plural': 'Outbox Events',
+            },
+        ),
+    ]
@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+
+# Model for events on their way to the event streams of every ASGI worker
+class OutboxEvent(models.Model):
+    """
+    One event published from any process, waiting to be relayed.
+
+    Each ASGI worker tails this table (see events.relay) and hands new rows to
+    its in-process hub. Rows are deleted after SSE_OUTBOX_RETENTION seconds.
+    """
+    channel = models.CharField(
+        max_length=64,
+        help_text="events.hub channel: 'broadcast' or 'user:<id>'."
+    )
+    name = models.CharField(
+        max_length=32,
+        help_text="SSE event name, e.g. reward, popup or ad."
+    )
+    data = models.TextField(
+        help_text="JSON-encoded payload."
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        help_text="When the event was published."
+    )
+
+    class Meta:
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox Events"
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.name} -> {self.channel}"
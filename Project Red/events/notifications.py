@@ -0,0 +1,27 @@
+"""
+Pushes server-side game events to players' open event streams.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from database.models import RedeemedFish
+
+from .relay import publish_to_user
+
+
+def reward_payload(redemption):
+    reward = redemption.fish_reward
+    return {
+        'redemption_id': redemption.pk,
+        'fish_type': reward.fish_type if reward else None,
+        'message': reward.message if reward else None,
+        'media_url': reward.media_url if reward else None,
+        'redeemed_at': redemption.redeemed_at.isoformat(),
+    }
+
+
+@receiver(post_save, sender=RedeemedFish, dispatch_uid='events_notify_redemption')
+def _notify_redemption(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Written in the redemption's transaction, so it is only sent if that commits
+        publish_to_user(instance.user_id, 'reward', reward_payload(instance))
@@ -0,0 +1,135 @@
+"""
+Cross-process delivery of events to the Server-Sent Events streams.
+
+events.hub only reaches streams held by the process that publishes, but
+streams live in ASGI workers while most game actions (redemptions, store
+purchases, admin commands) run in WSGI workers or scripts. publish() here
+writes an OutboxEvent row instead, in the caller's transaction, so an event
+is only ever sent for work that committed.
+
+Each ASGI worker runs one relay task per event loop while it has open
+streams. Every SSE_RELAY_INTERVAL seconds it reads the rows after the last
+one it relayed and publishes them to its hub, so every worker sees every
+event and Last-Event-ID replay works as before. The task stops when the
+last stream closes and picks up where it left off when the next one opens.
+Rows older than SSE_OUTBOX_RETENTION seconds are deleted by the relay, and
+now and then by publish() so the table stays small without an ASGI server.
+
+SQLite hands out ids in commit order. On databases that do not, a row
+committed after a higher id was already relayed would be skipped.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import hub as event_hub
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Rows read per poll; a busier outbox is caught up over several polls
+FETCH_SIZE = 500
+
+# publish() prunes expired rows once every this many calls in a process
+PRUNE_EVERY = 256
+
+_publish_count = itertools.count(1)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def publish(channel, name, data):
+    """Queue an event for every worker's streams on channel; delivered once the transaction commits."""
+    OutboxEvent.objects.create(channel=channel, name=name, data=json.dumps(data, separators=(',', ':')))
+    if next(_publish_count) % PRUNE_EVERY == 0:
+        prune()
+
+
+def broadcast(name, data):
+    """Send an event to every open stream."""
+    publish(event_hub.BROADCAST, name, data)
+
+
+def publish_to_user(user_id, name, data):
+    """Send an event to one player's open streams."""
+    publish(event_hub.user_channel(user_id), name, data)
+
+
+def prune():
+    """Delete rows older than SSE_OUTBOX_RETENTION seconds."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('SSE_OUTBOX_RETENTION', 300))
+    return OutboxEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+def latest_id():
+    return OutboxEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def fetch_after(last_id, limit=FETCH_SIZE):
+    """(id, channel, name, data) of the rows after last_id, oldest first."""
+    return list(
+        OutboxEvent.objects.filter(pk__gt=last_id).order_by('pk')
+        .values_list('pk', 'channel', 'name', 'data')[:limit]
+    )
+
+
+class Relay:
+    """The task copying new outbox rows into this process's hub, bound to one event loop."""
+
+    def __init__(self, hub, last_id=None):
+        self.hub = hub
+        self.loop = asyncio.get_running_loop()
+        self.last_id = last_id
+        self.task = None
+
+    def ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._run())
+
+    async def poll(self):
+        """Relay the rows committed since the last poll; returns how many."""
+        if self.last_id is None:
+            # Start from now; rows from before the first stream opened have nobody to go to
+            self.last_id = await sync_to_async(latest_id)()
+            return 0
+        rows = await sync_to_async(fetch_after)(self.last_id)
+        for pk, channel, name, data in rows:
+            self.hub.publish_encoded(channel, name, data)
+            self.last_id = pk
+        return len(rows)
+
+    async def _run(self):
+        interval = _setting('SSE_RELAY_INTERVAL', 1.0)
+        prune_every = max(1, round(60 / interval))
+        for polls in itertools.count(1):
+            try:
+                while await self.poll() == FETCH_SIZE:
+                    pass
+                if polls % prune_every == 0:
+                    await sync_to_async(prune)()
+            except Exception:
+                # Keep relaying; a failed poll is retried on the next one
+                logger.exception('Relaying outbox events failed')
+            if not self.hub.subscriber_count:
+                return
+            await asyncio.sleep(interval)
+
+
+_relay = None
+
+
+def get_relay():
+    """Return the relay for the running event loop, creating it on first use."""
+    global _relay
+    if _relay is None or _relay.loop is not asyncio.get_running_loop():
+        last_id = _relay.last_id if _relay is not None else None
+        _relay = Relay(event_hub.get_hub(), last_id)
+    return _relay
@@ -1,3 +1,253 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from database.models import RedeemedFish
+
+from . import chatbot, relay, views
+from .hub import BROADCAST, Hub, get_hub, user_channel
+from .models import OutboxEvent
+
+
+class HubTests(SimpleTestCase):
+    async def test_replays_what_the_client_missed(self):
+        hub = Hub(history_size=8, max_channels=8)
+        first = hub.publish(BROADCAST, 'popup', {'n': 1})
+        hub.publish(BROADCAST, 'popup', {'n': 2})
+        hub.publish(user_channel(7), 'reward', {'n': 3})
+        hub.publish(user_channel(8), 'reward', {'n': 4})
+
+        subscriber, replay, reset = hub.subscribe([BROADCAST, user_channel(7)], hub.event_id(first))
+        self.assertFalse(reset)
+        self.assertEqual([event.data for event in replay], ['{"n":2}', '{"n":3}'])
+        hub.unsubscribe(subscriber)
+
+    async def test_ids_from_another_process_ask_for_a_reset(self):
+        hub = Hub(history_size=8, max_channels=8)
+        hub.publish(BROADCAST, 'popup', {})
+        subscriber, replay, reset = hub.subscribe([BROADCAST], '0-1')
+        self.assertEqual((replay, reset), ([], True))
+        hub.unsubscribe(subscriber)
+
+    async def test_events_gone_from_the_ring_buffer_ask_for_a_reset(self):
+        hub = Hub(history_size=2, max_channels=8)
+        first = hub.publish(BROADCAST, 'popup', {'n': 1})
+        for n in (2, 3, 4):
+            hub.publish(BROADCAST, 'popup', {'n': n})
+        subscriber, replay, reset = hub.subscribe([BROADCAST], hub.event_id(first))
+        self.assertTrue(reset)
+        self.assertEqual([event.data for event in replay], ['{"n":3}', '{"n":4}'])
+        hub.unsubscribe(subscriber)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    async def test_slow_subscriber_overflows_and_its_stream_ends(self):
+        hub = Hub(history_size=8, max_channels=8)
+        subscriber, replay, reset = hub.subscribe([BROADCAST])
+        for n in range(5):
+            hub.publish(BROADCAST, 'popup', {'n': n})
+        self.assertTrue(subscriber.overflowed)
+        self.assertEqual(subscriber.queue.qsize(), 2)  # the cap holds
+
+        chunks = [chunk async for chunk in views._stream(hub, subscriber, replay, reset)]
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertIn('data: {"n":1}', chunks[1])
+        self.assertEqual(len(chunks), 2)  # the wake-up marker ends the stream; the client resumes from n=1
+        self.assertEqual(hub.subscriber_count, 0)
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0.01)
+    async def test_idle_stream_sends_heartbeats(self):
+        hub = Hub(history_size=8, max_channels=8)
+        subscriber, replay, reset = hub.subscribe([BROADCAST])
+        stream = views._stream(hub, subscriber, replay, reset)
+        self.assertTrue((await anext(stream)).startswith('retry: '))
+        self.assertEqual(await anext(stream), ': ping\n\n')
+        hub.publish(BROADCAST, 'popup', {'n': 1})
+        self.assertIn('event: popup\n', await anext(stream))
+        await stream.aclose()
+        self.assertEqual(hub.subscriber_count, 0)
+
+
+class EventStreamViewTests(TestCase):
+    def test_wsgi_answers_not_implemented(self):
+        self.assertEqual(self.client.get('/events/api/stream/').status_code, 501)
+
+    async def test_resumes_from_last_event_id(self):
+        hub = get_hub()
+        seen = hub.publish(BROADCAST, 'popup', {'n': 1})
+        hub.publish(BROADCAST, 'popup', {'n': 2})
+        response = await AsyncClient().get('/events/api/stream/', headers={'last-event-id': hub.event_id(seen)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        await anext(stream)  # retry
+        self.assertIn(b'data: {"n":2}', await anext(stream))
+        response.close()
+        await relay.get_relay().task
+
+
+class RelayTests(TestCase):
+    def test_redemption_is_queued_for_the_player(self):
+        user = User.objects.create_user('angler')
+        redemption = RedeemedFish.objects.create(user=user, clicks_before_redeem=10)
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.channel, event.name), (user_channel(user.pk), 'reward'))
+        self.assertIn(f'"redemption_id":{redemption.pk}', event.data)
+
+    async def test_poll_relays_new_rows_into_the_hub(self):
+        await sync_to_async(relay.broadcast)('popup', {'message': 'before'})
+        hub = Hub(history_size=8, max_channels=8)
+        subscriber, _, _ = hub.subscribe([BROADCAST])
+        worker = relay.Relay(hub)
+        self.assertEqual(await worker.poll(), 0)  # starts after the rows already there
+
+        await sync_to_async(relay.broadcast)('popup', {'message': 'hello'})
+        await sync_to_async(relay.publish_to_user)(99, 'reward', {})
+        self.assertEqual(await worker.poll(), 2)
+        self.assertEqual(subscriber.queue.get_nowait().data, '{"message":"hello"}')
+        self.assertTrue(subscriber.queue.empty())  # user 99's event is not on this stream
+        self.assertEqual(await worker.poll(), 0)
+        hub.unsubscribe(subscriber)
+
+    async def test_relay_task_stops_with_the_last_stream(self):
+        hub = Hub(history_size=8, max_channels=8)
+        worker = relay.Relay(hub)
+        worker.ensure_running()
+        await asyncio.wait_for(worker.task, 1)
+        self.assertIsNotNone(worker.last_id)
+
+    @override_settings(SSE_OUTBOX_RETENTION=60)
+    def test_prune_deletes_expired_rows(self):
+        relay.broadcast('popup', {'message': 'old'})
+        relay.broadcast('popup', {'message': 'new'})
+        OutboxEvent.objects.filter(data__contains='old').update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(relay.prune(), 1)
+        self.assertEqual(list(OutboxEvent.objects.values_list('data', flat=True)), ['{"message":"new"}'])
+
+    def test_publish_event_command(self):
+        User.objects.create_user('angler')
+        call_command('publish_event', 'popup', '--message', 'Storm incoming', stdout=StringIO())
+        call_command('publish_event', 'ad', '--user', 'angler', stdout=StringIO())
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by('pk').values_list('channel', 'name')),
+            [(BROADCAST, 'popup'), (user_channel(User.objects.get().pk), 'ad')],
+        )
+        with self.assertRaisesMessage(CommandError, 'Unknown users: nobody'):
+            call_command('publish_event', 'ad', '--user', 'nobody', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'A popup needs --message'):
+            call_command('publish_event', 'popup', stdout=StringIO())
+
+
+class FirstChoice:
+    """Stand-in for random that records the weights and picks the first candidate."""
+
+    def choices(self, population, weights):
+        self.weights = list(weights)
+        return [population[0]]
+
+
+CORPUS = {
+    'chatbot_replies': [
+        {'reply_id': 'greet', 'keywords': ['hi', 'hello'], 'reply': 'Hi!', 'weight': 3},
+        {'reply_id': 'fish', 'keywords': ['fish', 'big fish', 'Golden  Marlin'], 'reply': 'Fish!', 'weight': 2},
+        {'reply_id': 'she', 'keywords': ['he', 'she', 'hers'], 'reply': 'Pronouns.'},
+    ],
+    'fallback_replies': [{'reply_id': 'huh', 'reply': 'Huh?'}],
+}
+
+
+class KeywordMatchTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = chatbot.ReplyEngine(CORPUS)
+
+    def matched(self, message):
+        return self.engine.match(chatbot.normalize(message))[1]
+
+    def test_overlapping_keywords_all_match(self):
+        automaton = chatbot.KeywordAutomaton({'he': [0], 'she': [1], 'hers': [2], 'his': [3]})
+        self.assertEqual(list(automaton.find('ushers')), [])  # all inside one word
+        self.assertEqual(
+            sorted((start, end) for start, end, _ in automaton.find('she, he: hers his')),
+            [(0, 3), (5, 7), (9, 13), (14, 17)],
+        )
+
+    def test_only_whole_words_and_phrases_count(self):
+        self.assertEqual(self.matched('Fishing? hi-five'), ('hi',))
+        self.assertEqual(self.matched('a BIG\tfish, a golden marlin!'), ('big fish', 'fish', 'golden marlin'))
+        # 'he' inside 'she' and 'hers' is not a word of its own
+        self.assertEqual(self.matched('she said hers'), ('hers', 'she'))
+
+    def test_score_is_weight_times_distinct_keywords(self):
+        rng = FirstChoice()
+        reply, matched = self.engine.reply('hello hi hello, big fish', rng=rng)
+        self.assertEqual(reply.reply_id, 'greet')
+        self.assertEqual(rng.weights, [3 * 2, 2 * 2])
+
+    def test_fallback_when_nothing_matches(self):
+        reply, matched = self.engine.reply('zzz', rng=FirstChoice())
+        self.assertEqual((reply.reply_id, matched), ('huh', ()))
+        self.assertEqual(chatbot.ReplyEngine({}).reply('hi'), (None, ()))
+
+    def test_malformed_corpus_is_rejected(self):
+        for corpus in (
+            {'chatbot_replies': [{'reply_id': 'x', 'reply': 'no keywords'}]},
+            {'chatbot_replies': [{'reply_id': 'x', 'keywords': ['a'], 'reply': 'r', 'weight': 0}]},
+            {'fallback_replies': [{'reply': 'no id'}]},
+        ):
+            with self.subTest(corpus=corpus), self.assertRaises(ValueError):
+                chatbot.ReplyEngine(corpus)
+
+
+class ChatbotReloadTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'replies.json')
+        self.write(CORPUS, mtime_ns=1_000_000_000)
+        settings_override = override_settings(CHATBOT_CORPUS=self.path, CHATBOT_RELOAD_INTERVAL=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        chatbot.reset()
+        self.addCleanup(chatbot.reset)
+
+    def write(self, corpus, mtime_ns):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(corpus if isinstance(corpus, str) else json.dumps(corpus))
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_edited_corpus_is_picked_up(self):
+        engine = chatbot.get_engine()
+        self.assertIs(chatbot.get_engine(), engine)  # unchanged file, same engine
+        self.write({'chatbot_replies': [{'reply_id': 'new', 'keywords': ['storm'], 'reply': 'Storm!'}]}, 2_000_000_000)
+        reloaded = chatbot.get_engine()
+        self.assertIsNot(reloaded, engine)
+        self.assertEqual(reloaded.reply('a storm')[0].reply_id, 'new')
+
+    def test_broken_corpus_keeps_the_previous_engine(self):
+        engine = chatbot.get_engine()
+        self.write('{"chatbot_replies": [', 2_000_000_000)
+        with self.assertLogs('events.chatbot', 'ERROR'):
+            self.assertIs(chatbot.get_engine(), engine)
+        self.assertIs(chatbot.get_engine(), engine)  # not retried until the file changes again
+
+    @override_settings(CHATBOT_RELOAD_INTERVAL=3600)
+    def test_file_is_only_checked_every_interval(self):
+        engine = chatbot.get_engine()
+        self.write({}, 2_000_000_000)
+        self.assertIs(chatbot.get_engine(), engine)
+
+    def test_reply_endpoint(self):
+        response = self.client.post('/events/api/chatbot/', {'message': 'Hello there'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['reply_id'], response.json()['matched']), ('greet', ['hello']))
+        self.assertEqual(
+            self.client.post('/events/api/chatbot/', {'message': ' '}, content_type='application/json').status_code, 400
+        )
+        self.assertEqual(self.client.get('/events/api/chatbot/').status_code, 405)
@@ -0,0 +1,11 @@
+# import library
+from django.urls import path
+from . import views
+
+app_name = 'events'
+
+# URLs for chatbot interruptions and the event stream
+urlpatterns = [
+    path('api/chatbot/', views.chatbot_reply, name='chatbot_reply'),
+    path('api/stream/', views.event_stream, name='event_stream'),
+]
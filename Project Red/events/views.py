@@ -1,3 +1,131 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+import asyncio
+import json
 
-# Create your views here.
+from gameplay import players
+
+from . import chatbot, hub as event_hub, relay
+
+# Longest message the chatbot will read
+MAX_MESSAGE_LENGTH = 500
+
+# Milliseconds a client waits before reconnecting a dropped stream
+SSE_RETRY_MS = 3000
+
+@csrf_exempt
+async def chatbot_reply(request):
+    """
+    API endpoint for chatbot interruptions.
+
+    Accepts {"message": "..."} and answers with a reply picked by keyword.
+    Matching is in-memory and never blocks, so it runs on the event loop.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        message = payload.get('message') if isinstance(payload, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            raise ValueError('message is required')
+        if len(message) > MAX_MESSAGE_LENGTH:
+            raise ValueError(f'message must be at most {MAX_MESSAGE_LENGTH} characters')
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    reply, matched = chatbot.get_engine().reply(message)
+    return JsonResponse({
+        'success': True,
+        'reply': reply.text if reply else None,
+        'reply_id': reply.reply_id if reply else None,
+        'matched': list(matched),
+    })
+
+
+@require_safe
+async def event_stream(request):
+    """
+    Server-Sent Events stream of broadcast events and the player's own.
+
+    Needs the ASGI application: each open stream is a coroutine waiting on a
+    queue, not a thread. Events published with events.relay from any process
+    reach it through the outbox relay. Reconnecting clients send Last-Event-ID
+    (or ?lastEventId=) and get the events they missed, or a "reset" event when
+    those are no longer buffered.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'error': 'Event stream requires the ASGI server'}, status=501)
+
+    hub = event_hub.get_hub()
+    if hub.subscriber_count >= getattr(settings, 'SSE_MAX_CONNECTIONS', 10000):
+        return JsonResponse({'success': False, 'error': 'Too many open streams'}, status=503)
+
+    user = await request.auser()
+    channels = [event_hub.BROADCAST]
+    if user.is_authenticated:
+        channels.append(event_hub.user_channel(user.pk))
+    else:
+        # Guests get their session-bound player's events (gameplay.players)
+        guest_id = await request.session.aget(players.SESSION_KEY)
+        if guest_id is not None:
+            channels.append(event_hub.user_channel(guest_id))
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('lastEventId')
+    subscriber, replay, reset = hub.subscribe(channels, last_event_id)
+    relay.get_relay().ensure_running()
+
+    response = EventStreamResponse(
+        hub, subscriber, _stream(hub, subscriber, replay, reset), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """
+    Streaming response that unsubscribes its hub subscriber when closed.
+
+    The server closes the response when the client disconnects, even if the
+    generator never started, in which case its finally block never runs.
+    """
+
+    def __init__(self, hub, subscriber, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hub = hub
+        self.subscriber = subscriber
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.hub.unsubscribe(self.subscriber)
+
+
+def _format_event(hub, event):
+    return f'id: {hub.event_id(event)}\nevent: {event.name}\ndata: {event.data}\n\n'
+
+
+async def _stream(hub, subscriber, replay, reset):
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    try:
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        if reset:
+            yield f'event: reset\ndata: {{"epoch":"{hub.epoch}"}}\n\n'
+        for event in replay:
+            yield _format_event(hub, event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': ping\n\n'
+                continue
+            if event is None:
+                break  # fell behind; the client reconnects and resumes from its last id
+            yield _format_event(hub, event)
+    finally:
+        hub.unsubscribe(subscriber)
@@ -0,0 +1,68 @@
+"""
+Render cache for the mostly static frontend pages.
+
+The frontend templates render the same bytes for every visitor, so the first
+render of each page is kept in memory together with a strong ETag. Later
+requests reuse the body, and requests whose If-None-Match matches get a 304
+without a body.
+
+Anything a page really varies on is passed as ``vary`` and becomes part of
+the cache key. Pages whose render used the CSRF token are never cached,
+because the token is per visitor. Cached pages are dropped when a template
+file changes under the autoreloader or when the static index is rebuilt,
+since pages embed fingerprinted static URLs.
+"""
+import hashlib
+import threading
+
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.autoreload import file_changed
+from django.utils.http import parse_etags
+
+from core import staticserve
+
+# Upper bound on cached (template, vary) combinations
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_pages = {}  # {(template_name, vary, static generation): (body, etag)}
+
+
+def render_cached(request, template_name, vary=()):
+    """Drop-in replacement for render() for pages without per-visitor context."""
+    key = (template_name, tuple(vary), staticserve.index_generation())
+    cached = _pages.get(key)
+    if cached is None:
+        body = render_to_string(template_name, request=request).encode('utf-8')
+        etag = f'"{hashlib.sha1(body, usedforsecurity=False).hexdigest()}"'
+        cached = (body, etag)
+        if not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            with _lock:
+                if len(_pages) >= MAX_ENTRIES:
+                    _pages.clear()
+                _pages[key] = cached
+    body, etag = cached
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body)
+    response['ETag'] = etag
+    # Let browsers keep the page but check back each time with If-None-Match
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def clear():
+    """Forget every cached page."""
+    with _lock:
+        _pages.clear()
+
+
+@receiver(file_changed, dispatch_uid='frontend_render_cache_file_changed')
+def _clear_on_template_change(sender, file_path, **kwargs):
+    if file_path.suffix == '.html':
+        clear()
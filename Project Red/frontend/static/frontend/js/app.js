@@ -28,10 +28,10 @@
     setTimeout(spawnAd, delay);
   }
 
-  // create new ad
-  function spawnAd() {
-    if (live >= MAX_LIVE) { scheduleNext(); return; }
-    const imgPath = ads[rand(0, ads.length - 1)];
+  // create new ad; pushed ads come from the server's event stream and do not reschedule
+  function spawnAd(image, pushed) {
+    if (live >= MAX_LIVE) { if (!pushed) scheduleNext(); return; }
+    const imgPath = (typeof image === 'string' && image.startsWith('/static/')) ? image : ads[rand(0, ads.length - 1)];
     const imgEl = new Image();
     imgEl.alt = 'Advertisement';
     imgEl.src = imgPath;
@@ -64,7 +64,7 @@
       closeBtn.setAttribute('aria-label', 'Close');
       closeBtn.setAttribute('title', 'Close');
       closeBtn.textContent = '×';
-      closeBtn.addEventListener('click', () => { el.remove(); live--; scheduleNext(); });
+      closeBtn.addEventListener('click', () => { el.remove(); live--; if (!pushed) scheduleNext(); });
 
       el.appendChild(closeBtn);
       el.appendChild(imgEl);
@@ -82,7 +82,7 @@
       live++;
       // auto-despawn after ~25-40s
       setTimeout(() => { if (el.isConnected) { el.remove(); live--; } }, 25000 + rand(0, 15000));
-      scheduleNext();
+      if (!pushed) scheduleNext();
     };
 
     imgEl.addEventListener('load', () => mountAd(imgEl.naturalWidth, imgEl.naturalHeight));
@@ -91,6 +91,7 @@
 
   // start after an initial delay
   scheduleNext();
+  window.addEventListener('server:ad', (e) => spawnAd(e.detail && e.detail.image, true));
 })();
 
 // Global coin chip sync across pages
@@ -128,6 +129,26 @@
   };
 })();
 
+// Server-pushed events: reward notifications, popups and ads (events app, /events/api/stream/)
+(function () {
+  if (!window.EventSource) return;
+  const source = new EventSource('/events/api/stream/');
+  function parse(e) {
+    try { return JSON.parse(e.data) || {}; } catch (err) { return {}; }
+  }
+  source.addEventListener('reward', (e) => {
+    const d = parse(e);
+    if (window.showToast) showToast(d.message || ('Reward redeemed: ' + (d.fish_type || 'fish')), 'info', 3200);
+  });
+  source.addEventListener('popup', (e) => {
+    const d = parse(e);
+    if (d.message && window.showToast) showToast(d.message, d.level || 'info', 3200);
+  });
+  source.addEventListener('ad', (e) => window.dispatchEvent(new CustomEvent('server:ad', { detail: parse(e) })));
+  // EventSource reconnects by itself (sending Last-Event-ID) after a dropped stream. A 501 from a
+  // WSGI-only deployment or a 503 when the server is full closes it for good, so there is no retry loop
+})();
+
 // Konami code easter egg: spawn aquarium mode
 (function () {
   const reduceMotion = window.matchMedia && window.matchMedia('(prefers-reduced-motion: reduce)').matches;
@@ -268,8 +268,8 @@ function jumpFishNearTitle() {
     setTimeout(() => f.remove(), 1600);
 }
 
-// Fishing roll using progression and rarity
-function startFishing() {
+// Fishing roll using progression and rarity, for when the server can't be reached
+function rollCastLocally() {
     const { catchChance, rarityWeights, coinMultiplier } = computePlayerStats();
     const rollCatch = Math.random();
     if (rollCatch > catchChance) {
@@ -279,15 +279,128 @@ function startFishing() {
             'The fish swiped left.',
             'Something tugged… and fled.'
         ];
-        setGameMessage(missMsgs[roll(0, missMsgs.length - 1)], 'info');
-        return;
+        return { caught: false, message: missMsgs[roll(0, missMsgs.length - 1)], coins: 0 };
     }
 
     const rarity = sampleRarity(rarityWeights);
     const cat = fishCatalog[rarity];
     const name = cat.names[roll(0, cat.names.length - 1)];
     const base = roll(cat.coins[0], cat.coins[1]);
-    const reward = Math.max(1, Math.round(base * coinMultiplier));
+    return { caught: true, fish: name, rarity, coins: Math.max(1, Math.round(base * coinMultiplier)) };
+}
+
+// Casts rolled locally while the server was unreachable, reported later in batches to /api/cast-events/.
+// Each gets a per-device seq, so a batch resent after a lost response is not stored twice
+const offlineCasts = (() => {
+    const KEY = 'pendingCastEvents';
+    const MAX_PENDING = 500; // one request's worth; the oldest are dropped beyond that
+    let clientId = localStorage.getItem('castClientId');
+    if (!clientId) {
+        clientId = Array.from(crypto.getRandomValues(new Uint8Array(12)), b => b.toString(16).padStart(2, '0')).join('');
+        localStorage.setItem('castClientId', clientId);
+    }
+    let retryAt = 0;
+    let sending = false;
+
+    function pending() {
+        try { return JSON.parse(localStorage.getItem(KEY)) || []; } catch { return []; }
+    }
+
+    function record(result) {
+        const seq = (parseInt(localStorage.getItem('castEventSeq')) || 0) + 1;
+        localStorage.setItem('castEventSeq', seq);
+        const events = pending();
+        events.push({ seq, timestamp: Date.now(), outcome: result.caught ? result.rarity : 'miss' });
+        localStorage.setItem(KEY, JSON.stringify(events.slice(-MAX_PENDING)));
+    }
+
+    function flush() {
+        const events = pending();
+        if (!events.length || sending || Date.now() < retryAt) return;
+        sending = true;
+        fetch('/api/cast-events/', {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+            body: JSON.stringify({ client_id: clientId, events })
+        })
+            .then(response => {
+                if (response.status === 429) {
+                    // Queue full or rate limited: back off as told
+                    retryAt = Date.now() + 1000 * (parseInt(response.headers.get('Retry-After')) || 1);
+                    return;
+                }
+                if (response.status === 202 || response.status === 400) {
+                    // Accepted, or a batch the server will never take; keep only what was recorded since
+                    const sent = new Set(events.map(event => event.seq));
+                    localStorage.setItem(KEY, JSON.stringify(pending().filter(event => !sent.has(event.seq))));
+                }
+            })
+            .catch(() => { })
+            .finally(() => { sending = false; });
+    }
+
+    return { record, flush };
+})();
+
+// Set by loadPlayerState() once the server's balance is the one shown
+let serverBalance = false;
+
+// Take the player's coins and inventory from the server (guests included)
+function loadPlayerState() {
+    return fetch('/api/player-state/', { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || !data.success) return;
+            serverBalance = true;
+            offlineCasts.flush();
+            coins = data.coins;
+            localStorage.setItem('fishCoins', coins);
+            localStorage.setItem('fishingInventory', JSON.stringify(data.inventory || []));
+            updateCoinsDisplay();
+            updateAutoButtonLabel();
+        })
+        .catch(() => { });
+}
+
+// Resolve a cast on the server, which credits the player's coins.
+// Falls back to a local roll when the request fails, queued in offlineCasts.
+function startFishing() {
+    return fetch('/api/start-fishing/', {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+        body: JSON.stringify({ casts: 1 })
+    })
+        .then(response => {
+            if (response.status === 429) return null;
+            return response.ok ? response.json() : Promise.reject(response.status);
+        })
+        .then(data => {
+            if (data === null) {
+                setGameMessage('Easy there! The fish need a moment.', 'warn');
+                return;
+            }
+            showCast(data.casts[0]);
+            offlineCasts.flush();
+        })
+        .catch(() => {
+            const result = rollCastLocally();
+            offlineCasts.record(result);
+            showCast(result);
+        });
+}
+
+// Render one cast result: {caught, message} or {caught, fish, rarity, coins}
+function showCast(result) {
+    if (!result.caught) {
+        setGameMessage(result.message, 'info');
+        return;
+    }
+
+    const rarity = result.rarity;
+    const name = result.fish;
+    const reward = result.coins;
     coins += reward;
     updateCoinsDisplay();
     // Visual: coin fly-out trail to the coin counter
@@ -479,7 +592,8 @@ function performCast(e, { auto = false } = {}) {
 
     // Milestone chest bonus every 10 casts
     const goal = 10;
-    if (count % goal === 0) {
+    // Chest coins are only local, so they are skipped while the balance is the server's
+    if (count % goal === 0 && !serverBalance) {
         const { coinMultiplier } = computePlayerStats();
         const bonusBase = roll(8, 20);
         const bonus = Math.max(1, Math.round(bonusBase * coinMultiplier));
@@ -524,6 +638,7 @@ if (castButton) {
 // Initialize coins display
 updateCoinsDisplay();
 updateStreakAndProgress();
+loadPlayerState();
 
 // Auto-cast implementation tied to Auto-Clicker (id=7) and Speed Enhancer (id=9)
 const autoBtn = document.getElementById('autoToggle');
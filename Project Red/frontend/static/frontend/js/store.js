@@ -1,7 +1,8 @@
 // Store JavaScript
 // Enhanced Product Catalog & Inventory Management
 // Product catalog (store items) with category, visuals, and unique effects
-// Each object represents a purchasable store item
+// Each object represents a purchasable store item. This list is the offline
+// fallback; loadCatalog() replaces it with the server catalog on page load.
 
 const products = [
     // Baits
@@ -143,7 +144,9 @@ function closePopup() {
 document.addEventListener('DOMContentLoaded', function () {
     updateCoinDisplay();
     displayProducts('all');
+    loadCatalog();
     displayInventory();
+    loadPlayerState();
     setupCategoryFilters();
     setupSortAndFilters();
     wirePurchaseAnimationHelpers();
@@ -164,6 +167,20 @@ document.addEventListener('DOMContentLoaded', function () {
     })();
 });
 
+// Replace the built-in catalog with the server's and re-render the current category
+function loadCatalog() {
+    return fetch('/store/api/catalog/', { headers: { 'Accept': 'application/json' } })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || !Array.isArray(data.products)) return;
+            products.splice(0, products.length, ...data.products);
+            displayInventory();
+            const activeCatBtn = document.querySelector('.store-nav .category-btn.active');
+            displayProducts(activeCatBtn ? activeCatBtn.getAttribute('data-category') : 'all');
+        })
+        .catch(() => { });
+}
+
 // Update coin display from localStorage
 function updateCoinDisplay() {
     const coins = parseInt(localStorage.getItem('fishCoins')) || 0;
@@ -177,6 +194,7 @@ function getOwnedCount(productId) {
 }
 
 function isNonStackable(product) {
+    if (typeof product.stackable === 'boolean') return !product.stackable;
     return product.category === 'rods';
 }
 
@@ -271,50 +289,97 @@ function createProductCard(product) {
     return card;
 }
 
-// Handle the purchase of an item
-function purchaseItem(productId, sourceButton) {
-    const product = products.find(p => p.id === productId);
-    const currentCoins = parseInt(localStorage.getItem('fishCoins')) || 0;
-    const priceNow = getDynamicPrice(product);
+// Read a cookie value (Django's csrftoken for POSTs)
+function getCookie(name) {
+    const match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+    return match ? decodeURIComponent(match[1]) : null;
+}
 
-    // Check if player can afford the item
-    if (currentCoins >= priceNow) {
-        // Deduct coins
-        const newCoinTotal = currentCoins - priceNow;
-        localStorage.setItem('fishCoins', newCoinTotal);
+// Load the player's coins and owned items from the server (guests included)
+function loadPlayerState() {
+    return fetch('/api/player-state/', { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || !data.success) return;
+            applyServerState(data.coins, data.inventory);
+        })
+        .catch(() => { });
+}
 
-        // Animations BEFORE re-render/popup (sourceButton is still in DOM)
+// Make the server's balance and inventory the ones shown (and the ones game.js reads)
+function applyServerState(coins, items) {
+    localStorage.setItem('fishCoins', coins);
+    if (Array.isArray(items)) {
+        inventory = items.map(item => ({ ...item }));
+        localStorage.setItem('fishingInventory', JSON.stringify(inventory));
         try {
-            launchConfetti(sourceButton);
-            animateCoinFlyout(sourceButton);
+            window.dispatchEvent(new CustomEvent('inventoryChanged', { detail: { inventory } }));
         } catch { }
+    }
+    updateCoinDisplay();
+    displayInventory();
+    const activeCatBtn = document.querySelector('.store-nav .category-btn.active');
+    displayProducts(activeCatBtn ? activeCatBtn.getAttribute('data-category') : 'all');
+}
 
-        // Add to inventory
-        addToInventory(product);
-
-        // Update relevant UI
-        updateCoinDisplay();
-        displayInventory();
-        // Re-render products to update badges/disabled states keeping current filters
-        const activeCatBtn = document.querySelector('.store-nav .category-btn.active');
-        const currentCat = activeCatBtn ? activeCatBtn.getAttribute('data-category') : 'all';
-        displayProducts(currentCat);
+// Handle the purchase of an item. The server checks the balance and charges
+// it; the page only renders the balance and inventory it answers with.
+function purchaseItem(productId, sourceButton) {
+    const product = products.find(p => p.id === productId);
+    if (sourceButton) sourceButton.disabled = true;
+
+    fetch('/store/api/purchase/', {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken') || ''
+        },
+        body: JSON.stringify({ product_id: productId })
+    })
+        .then(response => response.json().catch(() => ({})).then(data => ({ status: response.status, data })))
+        .then(({ status, data }) => {
+            if (sourceButton) sourceButton.disabled = false;
+            if (status === 200 && data.success) {
+                // Animations BEFORE re-render/popup (sourceButton is still in DOM)
+                try {
+                    launchConfetti(sourceButton);
+                    animateCoinFlyout(sourceButton);
+                } catch { }
+
+                const items = inventory.filter(item => item.id !== data.product_id);
+                items.push({ id: data.product_id, quantity: data.quantity });
+                items.sort((a, b) => a.id - b.id);
+                applyServerState(data.coins, items);
+
+                // Slight delay so animations are visible before popup overlay
+                setTimeout(() => {
+                    showPopup('Purchase Successful!',
+                        `You bought ${product.name} ( ${isNonStackable(product) ? 'Single' : `Tier ${data.quantity}`} ) for ${data.price} coins!`);
+                }, 650);
+            } else if (status === 402) {
+                showPopup('Insufficient Funds', `${data.error || 'Not enough coins'} to buy ${product.name}.`);
+                // The balance shown may be stale; show the server's
+                loadPlayerState();
+                shakeButton(sourceButton);
+            } else {
+                showPopup('Purchase Failed', data.error || 'Something went wrong, please try again.');
+                if (status === 409) loadPlayerState();
+                shakeButton(sourceButton);
+            }
+        })
+        .catch(() => {
+            if (sourceButton) sourceButton.disabled = false;
+            showPopup('Purchase Failed', 'Could not reach the store, please try again.');
+        });
+}
 
-        // Slight delay so animations are visible before popup overlay
-        setTimeout(() => {
-            showPopup('Purchase Successful!',
-                `You bought ${product.name} ( ${nonStackable(product) ? 'Single' : `Tier ${getOwnedCount(product.id)}`} ) for ${priceNow} coins!`);
-        }, 650);
-    } else {
-        const needed = priceNow - currentCoins;
-        showPopup('Insufficient Funds',
-            `You need ${needed} more coins to buy ${product.name}.`);
-        // gentle shake on button if provided
-        if (sourceButton) {
-            sourceButton.classList.add('btn-shake');
-            setTimeout(() => sourceButton.classList.remove('btn-shake'), 450);
-        }
-    }
+// Gentle shake on a button, if provided
+function shakeButton(button) {
+    if (!button) return;
+    button.classList.add('btn-shake');
+    setTimeout(() => button.classList.remove('btn-shake'), 450);
 }
 
 // Add item to inventory
@@ -356,6 +421,8 @@ function displayInventory() {
 
 // Create inventory card element
 function createInventoryCard(item) {
+    // Server inventory only carries id and quantity
+    item = { ...products.find(p => p.id === item.id), ...item };
     const card = document.createElement('div');
     card.className = 'inventory-card';
     card.innerHTML = `
@@ -1,19 +1,22 @@
 from django.shortcuts import render
 
+from .rendercache import render_cached
+
 # Create your views here.
+# These pages have no per-visitor content, so they are served from the render cache
 
 def index(request):
     """Home page with login and skip to fishing options"""
-    return render(request, "frontend/index.html")
+    return render_cached(request, "frontend/index.html")
 
 def game(request):
-    return render(request, "frontend/game.html")
+    return render_cached(request, "frontend/game.html")
 
 def login(request):
-    return render(request, "frontend/login.html")
+    return render_cached(request, "frontend/login.html")
 
 def start(request):
-    return render(request, "frontend/start.html")
+    return render_cached(request, "frontend/start.html")
 
 '''
 def function(request):
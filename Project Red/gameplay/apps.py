@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GameplayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gameplay'
+
+    def ready(self):
+        # Connect the leaderboard's redemption signal
+        from . import leaderboard  # noqa: F401
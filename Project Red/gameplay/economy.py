@@ -0,0 +1,177 @@
+"""
+Economy model for balancing catch rates against store prices.
+
+A cast's coin payout only depends on the loadout, so its whole distribution
+can be written down exactly: a miss (0 coins), or a rarity times a uniform
+base value, scaled by the rod multiplier and rounded like game.js. This gives
+exact expected coins and variance per cast, plus the expected number of
+casts needed to save up for a price, without any sampling.
+
+simulate() checks those numbers by Monte Carlo, sampling casts from the same
+distribution. With NumPy installed it draws whole chunks of casts as arrays.
+Otherwise it falls back to a pure-Python loop over an alias table, which is
+much slower, so use fewer casts there.
+"""
+import math
+import random
+
+from .engine import (
+    CRYSTAL_LURES, FISH_CATALOG, LUCK_BOOSTER, LUCKY_ANCHOR, MAGIC_WORMS, MYSTIC_ROD, RAINBOW_FLIES, RARITIES,
+    STEEL_ROD, WOODEN_ROD, AliasTable, compute_player_stats, js_round,
+)
+
+try:
+    import numpy as np
+except ImportError:  # optional; only makes simulate() faster
+    np = None
+
+# Casts simulated per array chunk, which bounds memory with NumPy
+CHUNK_SIZE = 1_000_000
+
+# z-score of the 90th percentile, for the normal approximation of casts-to-afford
+Z_90 = 1.2815515655446004
+
+STACKING_GRID_ITEMS = (MAGIC_WORMS, CRYSTAL_LURES, RAINBOW_FLIES, LUCK_BOOSTER, LUCKY_ANCHOR)
+ROD_CHOICES = (None, WOODEN_ROD, STEEL_ROD, MYSTIC_ROD)
+
+
+def loadout_grid(max_stack, rods=ROD_CHOICES):
+    """Every loadout with 0..max_stack of each stacking item and at most one rod."""
+    loadouts = [()]
+    for item_id in STACKING_GRID_ITEMS:
+        loadouts = [loadout + ((item_id, n),) if n else loadout
+                    for loadout in loadouts for n in range(max_stack + 1)]
+    grid = []
+    for loadout in loadouts:
+        for rod in rods:
+            items = loadout + ((rod, 1),) if rod else loadout
+            grid.append(tuple(sorted(items)))
+    return grid
+
+
+def cast_distribution(loadout):
+    """
+    Exact payout distribution of one cast: (coin values, probabilities).
+
+    Values are sorted and distinct; a miss is the value 0.
+    """
+    stats = compute_player_stats(loadout)
+    total_weight = sum(stats.rarity_weights.values())
+    probabilities = {0: 1.0 - stats.catch_chance}
+    for rarity in RARITIES:
+        rarity_p = stats.catch_chance * stats.rarity_weights[rarity] / total_weight
+        low, high = FISH_CATALOG[rarity]['coins']
+        per_base = rarity_p / (high - low + 1)
+        for base in range(low, high + 1):
+            coins = max(1, js_round(base * stats.coin_multiplier))
+            probabilities[coins] = probabilities.get(coins, 0.0) + per_base
+    values = tuple(sorted(probabilities))
+    return values, tuple(probabilities[v] for v in values)
+
+
+def moments(distribution):
+    """Exact (mean, variance) of coins per cast."""
+    values, probabilities = distribution
+    mean = sum(v * p for v, p in zip(values, probabilities))
+    variance = sum(p * (v - mean) ** 2 for v, p in zip(values, probabilities))
+    return mean, variance
+
+
+def expected_casts_to_afford(distribution, price):
+    """
+    Exact expected casts for a player starting at 0 coins to reach `price`.
+
+    m(x) = 1 + sum_k p_k m(x - k) for x > 0 with m(x <= 0) = 0; the miss term
+    is moved to the left-hand side. O(price * distinct payouts).
+    """
+    if price <= 0:
+        return 0.0
+    values, probabilities = distribution
+    miss = probabilities[0] if values[0] == 0 else 0.0
+    payouts = [(v, p) for v, p in zip(values, probabilities) if v > 0]
+    needed = [0.0] * (price + 1)
+    for x in range(1, price + 1):
+        total = 1.0
+        for value, p in payouts:
+            if value >= x:
+                break
+            total += p * needed[x - value]
+        needed[x] = total / (1.0 - miss)
+    return needed[price]
+
+
+def casts_to_afford_p90(mean, variance, price):
+    """90th percentile of casts to reach `price`, by the normal approximation of the coin total."""
+    if price <= 0:
+        return 0
+    sd = math.sqrt(variance)
+    # Smallest n with mean*n - Z_90*sd*sqrt(n) >= price, solved as a quadratic in sqrt(n)
+    root = (Z_90 * sd + math.sqrt(Z_90 ** 2 * variance + 4 * mean * price)) / (2 * mean)
+    return math.ceil(root ** 2)
+
+
+def simulate(distribution, casts, seed=None):
+    """
+    Monte Carlo estimate of (mean, variance) of coins per cast over `casts` casts.
+
+    Uses NumPy when available, drawing CHUNK_SIZE casts per array.
+    """
+    values, probabilities = distribution
+    total = 0.0
+    total_sq = 0.0
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        value_array = np.asarray(values, dtype=np.float64)
+        p = np.asarray(probabilities, dtype=np.float64)
+        p /= p.sum()
+        remaining = casts
+        while remaining:
+            size = min(CHUNK_SIZE, remaining)
+            coins = value_array[rng.choice(len(values), size=size, p=p)]
+            total += float(coins.sum())
+            total_sq += float(np.dot(coins, coins))
+            remaining -= size
+    else:
+        rng = random.Random(seed)
+        table = AliasTable(values, probabilities)
+        sample = table.sample
+        draw = rng.random
+        for _ in range(casts):
+            coins = sample(draw())
+            total += coins
+            total_sq += coins * coins
+    mean = total / casts
+    return mean, max(0.0, total_sq / casts - mean * mean)
+
+
+def evaluate(job):
+    """Everything reported for one loadout; runs in a worker process."""
+    loadout, prices, casts, seed = job
+    distribution = cast_distribution(loadout)
+    mean, variance = moments(distribution)
+    sim_mean, sim_variance = simulate(distribution, casts, seed) if casts else (None, None)
+    return {
+        'loadout': [list(item) for item in loadout],
+        'catch_chance': compute_player_stats(loadout).catch_chance,
+        'mean': mean,
+        'variance': variance,
+        'simulated_mean': sim_mean,
+        'simulated_variance': sim_variance,
+        'casts_to_afford': {
+            product_id: {
+                'price': price,
+                'expected_casts': round(expected_casts_to_afford(distribution, price), 1),
+                'p90_casts': casts_to_afford_p90(mean, variance, price),
+            }
+            for product_id, price in prices
+        },
+    }
+
+
+def describe_loadout(loadout):
+    """Compact label such as 'W2 L1 rod:steel'."""
+    letters = {MAGIC_WORMS: 'W', CRYSTAL_LURES: 'L', RAINBOW_FLIES: 'F', LUCK_BOOSTER: 'B', LUCKY_ANCHOR: 'A'}
+    rods = {WOODEN_ROD: 'wood', STEEL_ROD: 'steel', MYSTIC_ROD: 'mystic'}
+    parts = [f'{letters[item_id]}{n}' for item_id, n in loadout if item_id in letters]
+    parts += [f'rod:{rods[item_id]}' for item_id, _ in loadout if item_id in rods]
+    return ' '.join(parts) or 'empty'
@@ -0,0 +1,296 @@
+"""
+Server-side catch engine.
+
+Mirrors computePlayerStats, sampleRarity and fishCatalog from
+frontend/static/frontend/js/game.js so casts can be resolved on the server.
+Rarity sampling uses a precomputed alias table per inventory loadout, and the
+tables are kept in a small LRU cache because most players share a handful of
+loadouts.
+"""
+import math
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+# Rarity tiers in the same order game.js iterates them
+RARITIES = ('common', 'uncommon', 'rare', 'epic', 'legendary')
+
+# Base rarity weights before any store upgrades are applied
+BASE_RARITY_WEIGHTS = {'common': 70, 'uncommon': 20, 'rare': 8, 'epic': 1.9, 'legendary': 0.1}
+
+# Fish names and coin ranges per rarity (keep in sync with game.js)
+FISH_CATALOG = {
+    'common': {
+        'names': ['Minnow', 'Puddle Bass', 'Tin Carp', 'Street Trout', 'Bubble Guppy', 'Pond Perch', 'Brook Stickleback'],
+        'coins': (1, 5),
+    },
+    'uncommon': {
+        'names': ['Shimmer Perch', 'Spotty Pike', 'Neon Guppy', 'Copper Sunfish', 'Jade Barb', 'Amber Tetra'],
+        'coins': (4, 10),
+    },
+    'rare': {
+        'names': ['Azure Snapper', 'Crystal Cod', 'Gilded Sunfish', 'Prism Angelfish', 'Sapphire Bass', 'Moonstone Trout'],
+        'coins': (10, 25),
+    },
+    'epic': {
+        'names': ['Phantom Koi', 'Storm Barracuda', 'Crimson Swordfish', 'Void Shark', 'Thunder Pike'],
+        'coins': (25, 60),
+    },
+    'legendary': {
+        'names': ['Mythic Leviathan', 'Golden Marlin', 'Celestial Dragon Fish', 'Prismatic Whale Shark', 'Astral Manta'],
+        'coins': (60, 150),
+    },
+}
+
+MISS_MESSAGES = [
+    'Nothing bit this time…',
+    'Ripples only. Try again!',
+    'The fish swiped left.',
+    'Something tugged… and fled.',
+]
+
+# Store item ids that affect fishing (see products in store.js)
+MAGIC_WORMS = 1
+CRYSTAL_LURES = 2
+RAINBOW_FLIES = 3
+WOODEN_ROD = 4
+STEEL_ROD = 5
+MYSTIC_ROD = 6
+LUCK_BOOSTER = 8
+LUCKY_ANCHOR = 11
+
+# Items whose quantity changes the stats; rods only count as owned / not owned
+STACKING_ITEMS = (MAGIC_WORMS, CRYSTAL_LURES, RAINBOW_FLIES, LUCK_BOOSTER, LUCKY_ANCHOR)
+ROD_ITEMS = (WOODEN_ROD, STEEL_ROD, MYSTIC_ROD)
+
+# Number of distinct loadouts whose samplers are kept in memory
+SAMPLER_CACHE_SIZE = 256
+
+# Uniforms consumed per cast, whether it is a catch or a miss
+DRAWS_PER_CAST = 4
+
+# Largest float below 1.0, for samplers that expect draws in [0, 1)
+MAX_UNIFORM = 1.0 - 2 ** -53
+
+PlayerStats = namedtuple('PlayerStats', ['catch_chance', 'rarity_weights', 'coin_multiplier'])
+
+
+def normalize_loadout(inventory):
+    """
+    Reduce an inventory to a hashable loadout key.
+
+    Accepts the localStorage format ([{'id': 1, 'quantity': 2}, ...]) or a
+    plain {id: quantity} mapping. Only items that affect fishing are kept, so
+    players with different decorations still share a cached sampler. Like
+    getItemCount() in game.js (inv.find), the first entry for an id counts
+    and later duplicates are ignored.
+    """
+    if not inventory:
+        return ()
+
+    if isinstance(inventory, dict):
+        items = inventory.items()
+    else:
+        items = []
+        for entry in inventory:
+            if not isinstance(entry, dict):
+                raise ValueError('Inventory entries must be objects with id and quantity')
+            items.append((entry.get('id'), entry.get('quantity', 0)))
+
+    counts = {}
+    seen = set()
+    for item_id, quantity in items:
+        try:
+            item_id = int(item_id)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            raise ValueError('Inventory id and quantity must be integers')
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        if quantity <= 0:
+            continue
+        if item_id in ROD_ITEMS:
+            counts[item_id] = 1
+        elif item_id in STACKING_ITEMS:
+            counts[item_id] = quantity
+
+    return tuple(sorted(counts.items()))
+
+
+def encode_loadout(loadout):
+    """Compact text form of a normalized loadout, e.g. '1x2,5x1'; empty for no items."""
+    return ','.join(f'{item_id}x{quantity}' for item_id, quantity in loadout)
+
+
+def decode_loadout(text):
+    """Inverse of encode_loadout()."""
+    if not text:
+        return ()
+    return tuple(tuple(int(part) for part in item.split('x')) for item in text.split(','))
+
+
+def compute_player_stats(loadout):
+    """Python port of computePlayerStats() from game.js."""
+    counts = dict(loadout)
+    magic_worms = counts.get(MAGIC_WORMS, 0)
+    crystal_lures = counts.get(CRYSTAL_LURES, 0)
+    rainbow_flies = counts.get(RAINBOW_FLIES, 0)
+    steel_rod = counts.get(STEEL_ROD, 0)
+    mystic_rod = counts.get(MYSTIC_ROD, 0)
+    luck_booster = counts.get(LUCK_BOOSTER, 0)
+    lucky_anchor = counts.get(LUCKY_ANCHOR, 0)
+
+    # Catch chance bonuses, capped to avoid a guaranteed catch
+    catch_chance = 0.25
+    catch_chance += crystal_lures * 0.07
+    catch_chance += luck_booster * 0.15
+    catch_chance += lucky_anchor * 0.02
+    catch_chance = min(0.85, catch_chance)
+
+    # Rarity adjustments (multiplicative on weights)
+    weights = dict(BASE_RARITY_WEIGHTS)
+    if magic_worms > 0:
+        weights['rare'] *= 1 + 0.15 * magic_worms
+        weights['epic'] *= 1 + 0.08 * magic_worms
+        weights['legendary'] *= 1 + 0.02 * magic_worms
+    if rainbow_flies > 0:
+        weights['epic'] *= 1 + 0.2 * rainbow_flies
+        weights['legendary'] *= 1 + 0.05 * rainbow_flies
+    if mystic_rod > 0:
+        weights['legendary'] *= 1.5
+
+    # Coin multiplier from best rod owned
+    coin_multiplier = 1.0
+    if mystic_rod > 0:
+        coin_multiplier *= 1.3
+    elif steel_rod > 0:
+        coin_multiplier *= 1.1
+
+    return PlayerStats(catch_chance, weights, coin_multiplier)
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table for sampling from a discrete distribution.
+
+    Building the table is O(n); every draw afterwards is O(1) and needs a
+    single uniform random number.
+    """
+
+    def __init__(self, outcomes, weights):
+        if len(outcomes) != len(weights) or not outcomes:
+            raise ValueError('Outcomes and weights must be non-empty and the same length')
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError('Weights must sum to a positive value')
+
+        n = len(outcomes)
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            lo = small.pop()
+            hi = large.pop()
+            prob[lo] = scaled[lo]
+            alias[lo] = hi
+            scaled[hi] = (scaled[hi] + scaled[lo]) - 1.0
+            (small if scaled[hi] < 1.0 else large).append(hi)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in large + small:
+            prob[i] = 1.0
+
+        self.outcomes = tuple(outcomes)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+
+    def sample(self, u):
+        """Map one uniform number in [0, 1) to an outcome."""
+        scaled = u * len(self.prob)
+        column = int(scaled)
+        if scaled - column < self.prob[column]:
+            return self.outcomes[column]
+        return self.outcomes[self.alias[column]]
+
+
+class CatchSampler:
+    """Precomputed stats and rarity alias table for one loadout."""
+
+    def __init__(self, loadout):
+        self.loadout = loadout
+        self.stats = compute_player_stats(loadout)
+        self.rarity_table = AliasTable(RARITIES, [self.stats.rarity_weights[r] for r in RARITIES])
+
+    def resolve(self, casts, rng=random):
+        """
+        Resolve a batch of casts in one pass.
+
+        Stats and the alias table are shared across the whole batch, so the
+        per-cast work is a few table lookups instead of recomputing stats for
+        every click.
+        """
+        draw = rng.random
+        return self.resolve_draws([draw() for _ in range(casts * DRAWS_PER_CAST)])
+
+    def resolve_draws(self, draws):
+        """
+        Resolve one cast per DRAWS_PER_CAST uniforms.
+
+        The draws are: the catch roll, then the rarity (or the miss message),
+        the fish name and the coin value. A miss leaves its last two unused,
+        so cast n always starts at draw n * DRAWS_PER_CAST and a logged run of
+        casts can be replayed from any point (see gameplay.rng).
+        """
+        catch_chance = self.stats.catch_chance
+        coin_multiplier = self.stats.coin_multiplier
+        sample_rarity = self.rarity_table.sample
+
+        results = []
+        rolls = (draws[i::DRAWS_PER_CAST] for i in range(DRAWS_PER_CAST))
+        for catch_roll, rarity_roll, name_roll, coin_roll in zip(*rolls):
+            if catch_roll > catch_chance:
+                results.append({
+                    'caught': False,
+                    'message': MISS_MESSAGES[_index(rarity_roll, len(MISS_MESSAGES))],
+                    'coins': 0,
+                })
+                continue
+
+            rarity = sample_rarity(min(rarity_roll, MAX_UNIFORM))
+            entry = FISH_CATALOG[rarity]
+            names = entry['names']
+            low, high = entry['coins']
+            name = names[_index(name_roll, len(names))]
+            base = low + _index(coin_roll, high - low + 1)
+            results.append({
+                'caught': True,
+                'fish': name,
+                'rarity': rarity,
+                'coins': max(1, js_round(base * coin_multiplier)),
+            })
+        return results
+
+
+def _index(u, n):
+    # seededRandom() can return exactly 1.0; game.js would index past the end there
+    return min(int(u * n), n - 1)
+
+
+def js_round(value):
+    """Round half up like JavaScript's Math.round (Python's round() is banker's)."""
+    return int(math.floor(value + 0.5))
+
+
+@lru_cache(maxsize=SAMPLER_CACHE_SIZE)
+def get_sampler(loadout):
+    """Return the cached CatchSampler for a normalized loadout."""
+    return CatchSampler(loadout)
+
+
+def resolve_casts(inventory, casts=1, rng=random):
+    """Resolve `casts` casts for the given inventory and return one result per cast."""
+    return get_sampler(normalize_loadout(inventory)).resolve(casts, rng=rng)
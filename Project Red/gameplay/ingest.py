@@ -0,0 +1,140 @@
+"""
+Asynchronous ingestion of client cast events.
+
+The ingest endpoint validates a batch, puts it on a bounded asyncio.Queue and
+acknowledges straight away. Background consumer tasks running on the same
+event loop drain the queue and persist events with bulk_create. When the
+queue cannot take a whole batch the endpoint answers 429 so clients back off
+instead of piling up requests.
+
+The queue lives on the server's event loop, so it only exists under ASGI.
+Under WSGI each async view gets a throwaway loop, so batches are written
+inline instead. Events still queued when a worker stops are lost unless
+drain() is awaited first.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import CastEvent
+
+logger = logging.getLogger(__name__)
+
+# Largest batch a single request may submit
+MAX_EVENTS_PER_REQUEST = 500
+
+OUTCOMES = frozenset(outcome for outcome, _ in CastEvent.OUTCOME_CHOICES)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def parse_events(raw_events, user_id, client_id):
+    """
+    Validate raw event dicts and turn them into unsaved CastEvents.
+
+    Each event needs seq (non-negative int), timestamp (ms since the epoch,
+    as from Date.now()) and outcome (miss or a rarity). Raises ValueError.
+    """
+    if not isinstance(raw_events, list) or not raw_events:
+        raise ValueError('events must be a non-empty array')
+    if len(raw_events) > MAX_EVENTS_PER_REQUEST:
+        raise ValueError(f'At most {MAX_EVENTS_PER_REQUEST} events per request')
+
+    events = []
+    for raw in raw_events:
+        if not isinstance(raw, dict):
+            raise ValueError('Each event must be an object')
+        outcome = raw.get('outcome')
+        if outcome not in OUTCOMES:
+            raise ValueError(f'Unknown outcome: {outcome!r}')
+        try:
+            seq = int(raw['seq'])
+            cast_at = datetime.fromtimestamp(float(raw['timestamp']) / 1000, tz=dt_timezone.utc)
+        except (KeyError, TypeError, ValueError, OverflowError, OSError):
+            raise ValueError('Each event needs an integer seq and a numeric timestamp')
+        if seq < 0:
+            raise ValueError('seq must not be negative')
+        events.append(CastEvent(
+            user_id=user_id, client_id=client_id, client_seq=seq, outcome=outcome, cast_at=cast_at,
+        ))
+    return events
+
+
+def persist(events):
+    """Write events in bulk; duplicates of already stored (client_id, seq) pairs are skipped."""
+    CastEvent.objects.bulk_create(events, batch_size=500, ignore_conflicts=True)
+
+
+class CastEventQueue:
+    """A bounded queue plus the consumer tasks draining it, bound to one event loop."""
+
+    def __init__(self, maxsize, batch_size, consumers):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.consumers = [asyncio.create_task(self._consume()) for _ in range(consumers)]
+
+    def offer(self, events):
+        """Enqueue the whole batch, or nothing if it does not fit. Returns True on success."""
+        if self.queue.maxsize - self.queue.qsize() < len(events):
+            return False
+        for event in events:
+            self.queue.put_nowait(event)
+        return True
+
+    async def _consume(self):
+        write = sync_to_async(persist)
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await write(batch)
+            except Exception:
+                # Keep consuming; a bad batch must not stall ingestion
+                logger.exception('Persisting %d cast events failed', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def drain(self):
+        """Wait until everything queued so far has been persisted."""
+        await self.queue.join()
+
+
+_queue = None
+
+
+def get_queue():
+    """Return the queue for the running event loop, creating it on first use."""
+    global _queue
+    if _queue is None or _queue.loop is not asyncio.get_running_loop():
+        _queue = CastEventQueue(
+            maxsize=_setting('CAST_EVENT_QUEUE_SIZE', 10000),
+            batch_size=_setting('CAST_EVENT_BATCH_SIZE', 500),
+            consumers=_setting('CAST_EVENT_CONSUMERS', 2),
+        )
+    return _queue
+
+
+async def submit(events, queued=True):
+    """
+    Accept a batch of events. Returns False when the queue is full.
+
+    With queued=False (WSGI) the batch is written before returning.
+    """
+    if not queued:
+        await sync_to_async(persist)(events)
+        return True
+    return get_queue().offer(events)
+
+
+async def drain():
+    """Flush the current loop's queue, e.g. before a graceful shutdown."""
+    if _queue is not None and _queue.loop is asyncio.get_running_loop():
+        await _queue.drain()
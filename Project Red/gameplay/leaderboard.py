@@ -0,0 +1,174 @@
+"""
+Leaderboards over catches and redemptions.
+
+Scores live in LeaderboardScore, one row per (board, window, period, user),
+and are incremented in place. Redemptions are recorded as they are saved;
+catches are counted by the PlayerState write-behind buffer and applied in
+one batch per flush (gameplay.writebehind), so casting never waits on a
+leaderboard write. Each worker keeps the top TOP_K entries of the current period of every board in
+memory, updates them from its own writes and reloads them from the indexed
+table every LEADERBOARD_REFRESH_SECONDS to pick up other workers' writes.
+Serving a leaderboard therefore never touches more than TOP_K rows, however
+large RedeemedFish grows.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from database.models import RedeemedFish
+
+from .models import LeaderboardScore
+
+BOARDS = tuple(board for board, _ in LeaderboardScore.BOARD_CHOICES)
+WINDOWS = tuple(window for window, _ in LeaderboardScore.WINDOW_CHOICES)
+
+# Entries kept in memory per board; also the largest page the API serves
+TOP_K = 100
+
+# Users per UPDATE statement, well below SQLite's bound variable limit
+UPDATE_CHUNK_SIZE = 200
+
+_lock = threading.Lock()
+_tops = {}  # {(board, window): TopK}
+
+
+def _refresh_seconds():
+    return getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 5)
+
+
+def period_key(window, when=None):
+    """Return the period a timestamp falls in, e.g. 2025-10-18, 2025-W42 or all."""
+    return day_periods(timezone.localdate(when))[window]
+
+
+def day_periods(day):
+    """{window: period} for a local date."""
+    year, week, _ = day.isocalendar()
+    return {'daily': day.isoformat(), 'weekly': f'{year}-W{week:02d}', 'all_time': 'all'}
+
+
+class TopK:
+    """The highest scores of one leaderboard period."""
+
+    def __init__(self, period, entries, size=TOP_K):
+        self.period = period
+        self.size = size
+        self.loaded_at = time.monotonic()
+        self.scores = {user_id: (score, username) for user_id, username, score in entries}
+        self._floor = None
+        self._ranked = None
+
+    def offer(self, user_id, username, score):
+        """Record a user's new total, evicting the lowest entry if they now make the cut."""
+        if user_id not in self.scores and len(self.scores) >= self.size:
+            if self._floor is None:
+                self._floor = min(self.scores, key=lambda uid: (self.scores[uid][0], -uid))
+            if score <= self.scores[self._floor][0]:
+                return
+            del self.scores[self._floor]
+        self.scores[user_id] = (score, username)
+        self._floor = None
+        self._ranked = None
+
+    def ranked(self):
+        """Entries as (user_id, username, score), best first."""
+        if self._ranked is None:
+            self._ranked = sorted(
+                ((user_id, username, score) for user_id, (score, username) in self.scores.items()),
+                key=lambda entry: (-entry[2], entry[0]),
+            )
+        return self._ranked
+
+
+def _load(board, window, period):
+    """Read the top of a period from the table with one indexed query."""
+    entries = (
+        LeaderboardScore.objects
+        .filter(board=board, window=window, period=period)
+        .order_by('-score', 'user_id')
+        .values_list('user_id', 'user__username', 'score')[:TOP_K]
+    )
+    return TopK(period, list(entries))
+
+
+def top(board, window, limit=10):
+    """Return (period, [(user_id, username, score), ...]) for the current period."""
+    period = period_key(window)
+    current = _tops.get((board, window))
+    if (current is None or current.period != period
+            or time.monotonic() - current.loaded_at > _refresh_seconds()):
+        current = _load(board, window, period)
+        with _lock:
+            _tops[(board, window)] = current
+    return period, current.ranked()[:limit]
+
+
+def record(board, user, amount=1, when=None):
+    """Add `amount` to a user's score on every window of a board."""
+    record_many(board, {user.pk: amount}, timezone.localdate(when))
+
+
+def record_many(board, amounts, day=None):
+    """
+    Add {user_id: amount} to users' scores on every window of a board, for the periods of `day`.
+
+    Missing rows are inserted first, ignoring the ones that exist; then each
+    chunk of users gets one UPDATE that bumps all their windows with a CASE
+    on user_id. A batch therefore costs the same few statements however many
+    users it covers. The in-memory tops are updated once the transaction
+    commits.
+    """
+    amounts = {user_id: amount for user_id, amount in amounts.items() if amount > 0}
+    if not amounts:
+        return
+    periods = day_periods(day or timezone.localdate())
+    match = Q()
+    for window, period in periods.items():
+        match |= Q(window=window, period=period)
+    user_ids = list(amounts)
+
+    with transaction.atomic():
+        LeaderboardScore.objects.bulk_create(
+            [
+                LeaderboardScore(board=board, window=window, period=period, user_id=user_id)
+                for user_id in user_ids
+                for window, period in periods.items()
+            ],
+            ignore_conflicts=True,
+        )
+        scores = []
+        for start in range(0, len(user_ids), UPDATE_CHUNK_SIZE):
+            chunk = user_ids[start:start + UPDATE_CHUNK_SIZE]
+            rows = LeaderboardScore.objects.filter(match, board=board, user_id__in=chunk)
+            rows.update(score=F('score') + Case(
+                *[When(user_id=user_id, then=Value(amounts[user_id])) for user_id in chunk],
+                default=Value(0),
+            ))
+            scores += rows.values_list('user_id', 'user__username', 'window', 'score')
+
+        def offer():
+            with _lock:
+                for user_id, username, window, score in scores:
+                    current = _tops.get((board, window))
+                    if current is not None and current.period == periods[window]:
+                        current.offer(user_id, username, score)
+
+        transaction.on_commit(offer)
+
+
+def invalidate():
+    """Forget the in-memory leaderboards so they are reloaded on next read."""
+    with _lock:
+        _tops.clear()
+
+
+@receiver(post_save, sender=RedeemedFish, dispatch_uid='leaderboard_record_redemption')
+def _record_redemption(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record('redemptions', instance.user, when=instance.redeemed_at)
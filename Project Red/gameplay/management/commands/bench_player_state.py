@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from gameplay.models import PlayerState
+from gameplay.writebehind import CoalescingBuffer
+
+BENCH_USER_PREFIX = 'bench_player_'
+
+
+class Command(BaseCommand):
+    help = 'Compares per-event PlayerState writes with the write-behind buffer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of simulated players.')
+        parser.add_argument('--events', type=int, default=20000, help='Number of cast events to apply.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the event stream.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark users afterwards.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['events'] < 1:
+            raise CommandError('--users and --events must be at least 1')
+
+        User = get_user_model()
+        User.objects.bulk_create(
+            [User(username=f'{BENCH_USER_PREFIX}{i}') for i in range(options['users'])],
+            ignore_conflicts=True,
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=BENCH_USER_PREFIX).values_list('pk', flat=True)
+        )
+        rng = random.Random(options['seed'])
+        events = [(rng.choice(user_ids), rng.randint(0, 25)) for _ in range(options['events'])]
+
+        try:
+            PlayerState.objects.filter(user_id__in=user_ids).delete()
+            PlayerState.objects.bulk_create([PlayerState(user_id=user_id) for user_id in user_ids])
+
+            # Baseline: one UPDATE per cast, as a naive per-click write would do
+            started = time.perf_counter()
+            for user_id, coins in events:
+                PlayerState.objects.filter(user_id=user_id).update(
+                    coins=F('coins') + coins, cast_count=F('cast_count') + 1
+                )
+            direct = time.perf_counter() - started
+
+            # Write-behind: coalesce in memory, flush in batches
+            buffer = CoalescingBuffer(max_users=options['users'], max_age=1.0)
+            started = time.perf_counter()
+            for user_id, coins in events:
+                buffer.add(user_id, coins=coins, casts=1)
+            buffer.flush()
+            buffered = time.perf_counter() - started
+
+            expected = 2 * sum(coins for _, coins in events)
+            actual = sum(PlayerState.objects.filter(user_id__in=user_ids).values_list('coins', flat=True))
+            if actual != expected:
+                raise CommandError(f'Coin totals do not match: expected {expected}, got {actual}')
+        finally:
+            if not options['keep']:
+                User.objects.filter(pk__in=user_ids).delete()
+
+        count = len(events)
+        self.stdout.write(f'Direct UPDATE per event: {count / direct:,.0f} events/s ({direct:.3f}s)')
+        self.stdout.write(f'Write-behind buffer:     {count / buffered:,.0f} events/s ({buffered:.3f}s)')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {direct / buffered:.1f}x over {count} events'))
@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from gameplay.players import GUEST_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes guest players that have not played for longer than a session lives, together with their '
+        'coins, items and cast logs, in small chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=None,
+            help='Idle days before a guest is deleted. Defaults to SESSION_COOKIE_AGE, after which the '
+                 "guest's session has expired and nobody can reach the player any more.",
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Guests deleted per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Count the guests without deleting them.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or (options['days'] is not None and options['days'] < 0):
+            raise CommandError('--chunk-size must be at least 1 and --days must not be negative')
+        age = timedelta(days=options['days']) if options['days'] is not None else timedelta(
+            seconds=settings.SESSION_COOKIE_AGE
+        )
+        cutoff = timezone.now() - age
+
+        # Last activity is the last coin or cast write, or sign-up for guests that never got that far
+        idle = get_user_model().objects.filter(username__startswith=GUEST_PREFIX).filter(
+            Q(player_state__updated_at__lt=cutoff)
+            | Q(player_state__isnull=True, date_joined__lt=cutoff)
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{idle.count()} guest players idle since before {cutoff:%Y-%m-%d %H:%M}')
+            return
+
+        started = time.perf_counter()
+        deleted = 0
+        while True:
+            ids = list(idle.order_by('pk').values_list('pk', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                get_user_model().objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if len(ids) < options['chunk_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} guest players in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,69 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from database import archive
+from gameplay import leaderboard
+from gameplay.models import LeaderboardScore
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the redemptions leaderboard from RedeemedFish history, archived months included.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            action='append',
+            choices=leaderboard.WINDOWS,
+            help='Window to rebuild (repeatable). Defaults to all windows.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows fetched per round trip while streaming history.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk_create batch when writing scores.',
+        )
+
+    def handle(self, *args, **options):
+        windows = options['window'] or list(leaderboard.WINDOWS)
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size and --batch-size must be at least 1')
+
+        # Only redemptions have a history to rebuild from; catch scores are
+        # recorded live and cannot be recomputed.
+        started = time.perf_counter()
+        counts = Counter()
+        rows = 0
+        history = archive.iter_redemptions(
+            columns=('user_id', 'redeemed_at'),
+            chunk_size=options['chunk_size'],
+        )
+        for user_id, redeemed_at in history:
+            rows += 1
+            for window in windows:
+                counts[(window, leaderboard.period_key(window, redeemed_at), user_id)] += 1
+        streamed = time.perf_counter()
+
+        scores = (
+            LeaderboardScore(board='redemptions', window=window, period=period, user_id=user_id, score=score)
+            for (window, period, user_id), score in counts.items()
+        )
+        with transaction.atomic():
+            LeaderboardScore.objects.filter(board='redemptions', window__in=windows).delete()
+            LeaderboardScore.objects.bulk_create(scores, batch_size=options['batch_size'])
+        leaderboard.invalidate()
+        finished = time.perf_counter()
+
+        self.stdout.write(
+            f'Streamed {rows} redemptions in {streamed - started:.3f}s, '
+            f'wrote {len(counts)} scores in {finished - streamed:.3f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt redemptions leaderboard for: {", ".join(windows)}'))
@@ -0,0 +1,81 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay import economy
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports expected coins per cast, variance and casts-to-afford for every store item across a grid of '
+        'inventory loadouts, with a Monte Carlo check of the exact figures. NumPy makes the simulation much '
+        'faster but is optional.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-stack',
+            type=int,
+            default=1,
+            help='Highest quantity of each stacking item (worms, lures, flies, booster, anchor) in the grid.',
+        )
+        parser.add_argument('--casts', type=int, default=100_000, help='Simulated casts per loadout (0 skips).')
+        parser.add_argument('--seed', type=int, default=0, help='Base seed; loadout i uses seed + i.')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (defaults to CPUs).')
+        parser.add_argument('--json', dest='json_path', help='Also write the full results to this file.')
+
+    def handle(self, *args, **options):
+        if options['max_stack'] < 0 or options['casts'] < 0:
+            raise CommandError('--max-stack and --casts must not be negative')
+        products = list(Product.objects.filter(is_active=True).order_by('id'))
+        if not products:
+            raise CommandError('No active products; run migrate to seed the store catalog')
+
+        grid = economy.loadout_grid(options['max_stack'])
+        jobs = []
+        for index, loadout in enumerate(grid):
+            owned = dict(loadout)
+            prices = [(product.id, product.price_for(owned.get(product.id, 0))) for product in products]
+            jobs.append((loadout, prices, options['casts'], options['seed'] + index))
+
+        backend = 'NumPy' if economy.np is not None else 'pure Python (NumPy is in requirements-optional.txt)'
+        self.stdout.write(
+            f"{len(grid)} loadouts x {options['casts']:,} simulated casts using {backend}"
+        )
+        started = time.perf_counter()
+        if options['workers'] == 1 or len(jobs) == 1:
+            results = [economy.evaluate(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(economy.evaluate, jobs, chunksize=max(1, len(jobs) // 64)))
+        elapsed = time.perf_counter() - started
+
+        header = f"{'loadout':<28} {'catch':>5} {'coins/cast':>10} {'var':>8} {'sim':>7} " + ' '.join(
+            f'{f"#{product.id}":>6}' for product in products
+        )
+        self.stdout.write(header)
+        for loadout, result in zip(grid, results):
+            simulated = '' if result['simulated_mean'] is None else f"{result['simulated_mean']:.3f}"
+            casts = ' '.join(
+                f"{result['casts_to_afford'][product.id]['expected_casts']:>6.0f}" for product in products
+            )
+            self.stdout.write(
+                f"{economy.describe_loadout(loadout):<28} {result['catch_chance']:>5.2f} "
+                f"{result['mean']:>10.3f} {result['variance']:>8.1f} {simulated:>7} {casts}"
+            )
+        self.stdout.write('Columns #N: expected casts to afford the next unit of product N from 0 coins.')
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump({
+                    'products': {product.id: product.name for product in products},
+                    'casts_per_loadout': options['casts'],
+                    'results': results,
+                }, file, indent=2)
+
+        total_casts = len(grid) * options['casts']
+        rate = f' ({total_casts / elapsed:,.0f} casts/s)' if total_casts else ''
+        self.stdout.write(self.style.SUCCESS(f'Simulated {total_casts:,} casts in {elapsed:.2f}s{rate}'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('catches', 'Fish Caught'), ('redemptions', 'Fish Redeemed')], help_text='What is being counted, e.g. catches or redemptions.', max_length=16)),
+                ('window', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('all_time', 'All Time')], help_text='The time window of the leaderboard.', max_length=8)),
+                ('period', models.CharField(help_text='The window instance, e.g. 2025-10-18, 2025-W42 or all.', max_length=10)),
+                ('score', models.PositiveBigIntegerField(default=0, help_text="The user's total for this period.")),
+                ('user', models.ForeignKey(help_text='The user this score belongs to.', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Score',
+                'verbose_name_plural': 'Leaderboard Scores',
+                'indexes': [models.Index(fields=['board', 'window', 'period', '-score'], name='leaderboard_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'window', 'period', 'user'), name='unique_leaderboard_score')],
+            },
+        ),
+    ]
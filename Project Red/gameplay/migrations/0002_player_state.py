@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gameplay', '0001_leaderboard_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerState',
+            fields=[
+                ('user', models.OneToOneField(help_text='The player this state belongs to.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='player_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('coins', models.BigIntegerField(default=0, help_text="The player's coin balance.")),
+                ('cast_count', models.PositiveBigIntegerField(default=0, help_text='Total casts the player has made.')),
+                ('inventory', models.JSONField(blank=True, default=list, help_text="Owned store items as [{'id': ..., 'quantity': ...}].")),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the state was last written.')),
+            ],
+            options={
+                'verbose_name': 'Player State',
+                'verbose_name_plural': 'Player States',
+            },
+        ),
+    ]
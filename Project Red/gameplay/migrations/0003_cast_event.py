@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0002_player_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CastEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(help_text='The user id for signed-in players, otherwise an id chosen by the client.', max_length=64)),
+                ('client_seq', models.PositiveBigIntegerField(help_text='Sequence number assigned by the client.')),
+                ('outcome', models.CharField(choices=[('miss', 'Miss'), ('common', 'Common'), ('uncommon', 'Uncommon'), ('rare', 'Rare'), ('epic', 'Epic'), ('legendary', 'Legendary')], help_text='Miss, or the rarity of the fish caught.', max_length=9)),
+                ('cast_at', models.DateTimeField(help_text='When the client says the cast happened.')),
+                ('received_at', models.DateTimeField(auto_now_add=True, help_text='When the server accepted the event.')),
+                ('user', models.ForeignKey(blank=True, db_index=False, help_text='The signed-in player, if any.', null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cast Event',
+                'verbose_name_plural': 'Cast Events',
+                'constraints': [models.UniqueConstraint(fields=('client_id', 'client_seq'), name='unique_cast_event_seq')],
+            },
+        ),
+    ]
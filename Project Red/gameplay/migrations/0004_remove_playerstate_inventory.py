@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+from django.db import migrations
+
+
+def copy_inventory_to_store(apps, schema_editor):
+    """Move inventories stored as JSON on PlayerState into store.InventoryItem rows."""
+    PlayerState = apps.get_model('gameplay', 'PlayerState')
+    Product = apps.get_model('store', 'Product')
+    InventoryItem = apps.get_model('store', 'InventoryItem')
+    db_alias = schema_editor.connection.alias
+
+    product_ids = set(Product.objects.using(db_alias).values_list('id', flat=True))
+    items = []
+    for user_id, inventory in PlayerState.objects.using(db_alias).values_list('user_id', 'inventory').iterator():
+        for entry in inventory or []:
+            try:
+                product_id, quantity = int(entry['id']), int(entry.get('quantity', 1))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            if product_id in product_ids and quantity > 0:
+                items.append(InventoryItem(user_id=user_id, product_id=product_id, quantity=quantity))
+    InventoryItem.objects.using(db_alias).bulk_create(items, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0003_cast_event'),
+        ('store', '0002_seed_products'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_inventory_to_store, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='playerstate',
+            name='inventory',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0004_remove_playerstate_inventory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CastLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.PositiveIntegerField(help_text="32-bit seed of the player's random stream.")),
+                ('start_counter', models.PositiveBigIntegerField(help_text="Position in the stream of the run's first cast, counted in casts.")),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of casts in the run.')),
+                ('loadout', models.CharField(blank=True, help_text="The fishing loadout the casts were rolled with, e.g. '1x2,5x1'.", max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the run started.')),
+                ('user', models.ForeignKey(help_text='The player who made the casts.', on_delete=django.db.models.deletion.CASCADE, related_name='cast_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cast Log',
+                'verbose_name_plural': 'Cast Logs',
+            },
+        ),
+    ]
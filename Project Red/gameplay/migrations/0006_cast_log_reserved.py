@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:22
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def reserve_played_casts(apps, schema_editor):
+    """Runs logged before blocks were reserved claimed exactly the casts they played."""
+    CastLog = apps.get_model('gameplay', 'CastLog')
+    CastLog.objects.using(schema_editor.connection.alias).update(reserved=F('count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0005_cast_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='castlog',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0, help_text='Casts claimed for the run; the next run starts after them.'),
+        ),
+        migrations.RunPython(reserve_played_casts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,319 @@
-from django.db import models
+import secrets
+import threading
+from collections import OrderedDict
 
-# Create your models here.
+from django.conf import settings
+from django.db import models, transaction
+
+from . import engine, rng
+
+
+# Model to persist leaderboard scores per board, time window and period
+class LeaderboardScore(models.Model):
+    """
+    One user's score on one leaderboard period, e.g. catches for 2025-10-18.
+
+    Rows are incremented in place as catches and redemptions happen, so the
+    top of any period is an indexed ORDER BY score DESC LIMIT K.
+    """
+    BOARD_CHOICES = [
+        ('catches', 'Fish Caught'),
+        ('redemptions', 'Fish Redeemed'),
+    ]
+    WINDOW_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('all_time', 'All Time'),
+    ]
+
+    board = models.CharField(
+        max_length=16,
+        choices=BOARD_CHOICES,
+        help_text="What is being counted, e.g. catches or redemptions."
+    )
+    window = models.CharField(
+        max_length=8,
+        choices=WINDOW_CHOICES,
+        help_text="The time window of the leaderboard."
+    )
+    period = models.CharField(
+        max_length=10,
+        help_text="The window instance, e.g. 2025-10-18, 2025-W42 or all."
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        help_text="The user this score belongs to."
+    )
+    score = models.PositiveBigIntegerField(
+        default=0,
+        help_text="The user's total for this period."
+    )
+
+    class Meta:
+        verbose_name = "Leaderboard Score"
+        verbose_name_plural = "Leaderboard Scores"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'window', 'period', 'user'],
+                name='unique_leaderboard_score',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['board', 'window', 'period', '-score'], name='leaderboard_top_idx'),
+        ]
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.board}/{self.window}/{self.period}: user {self.user_id} = {self.score}"
+
+
+# Model to persist a player's coins and cast count on the server
+class PlayerState(models.Model):
+    """
+    Server-side copy of the counters game.js and store.js keep in localStorage.
+    Owned items live in store.InventoryItem.
+
+    Coins and casts are not written per click: gameplay.writebehind coalesces
+    increments in memory and applies them in batched UPDATEs.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='player_state',
+        help_text="The player this state belongs to."
+    )
+    coins = models.BigIntegerField(
+        default=0,
+        help_text="The player's coin balance."
+    )
+    cast_count = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Total casts the player has made."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the state was last written."
+    )
+
+    class Meta:
+        verbose_name = "Player State"
+        verbose_name_plural = "Player States"
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.user_id}: {self.coins} coins, {self.cast_count} casts"
+
+
+# Model to store individual cast events reported by game clients
+class CastEvent(models.Model):
+    """
+    One cast reported by a client, ingested in batches by gameplay.ingest.
+
+    (client_id, client_seq) is unique so a batch that is retried after a
+    timeout does not create duplicate rows.
+    """
+    OUTCOME_CHOICES = [
+        ('miss', 'Miss'),
+        ('common', 'Common'),
+        ('uncommon', 'Uncommon'),
+        ('rare', 'Rare'),
+        ('epic', 'Epic'),
+        ('legendary', 'Legendary'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,  # lookups go through client_id
+        help_text="The signed-in player, if any."
+    )
+    client_id = models.CharField(
+        max_length=64,
+        help_text="The user id for signed-in players, otherwise an id chosen by the client."
+    )
+    client_seq = models.PositiveBigIntegerField(
+        help_text="Sequence number assigned by the client."
+    )
+    outcome = models.CharField(
+        max_length=9,
+        choices=OUTCOME_CHOICES,
+        help_text="Miss, or the rarity of the fish caught."
+    )
+    cast_at = models.DateTimeField(
+        help_text="When the client says the cast happened."
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the server accepted the event."
+    )
+
+    class Meta:
+        verbose_name = "Cast Event"
+        verbose_name_plural = "Cast Events"
+        constraints = [
+            models.UniqueConstraint(fields=['client_id', 'client_seq'], name='unique_cast_event_seq'),
+        ]
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.client_id} #{self.client_seq}: {self.outcome}"
+
+
+# Model to log a run of server-resolved casts as a seed and a counter range
+class CastLog(models.Model):
+    """
+    A run of consecutive casts rolled from one gameplay.rng stream.
+
+    Cast n of the run used draws (start_counter + n) * DRAWS_PER_CAST onwards
+    of seededRandom(seed), so every outcome can be replayed or checked later
+    without storing a row per cast.
+
+    A run is a block of `reserved` casts claimed by one worker process, which
+    then hands them out from memory (see reserve()), so casting does not
+    write to the database on every click. `count` is how many of them were
+    played; it is written behind with the player's coins and can lag by up
+    to PLAYER_STATE_FLUSH_INTERVAL. The rest of a block is never played: the
+    player's next run continues the same stream after `reserved`.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='cast_logs',
+        help_text="The player who made the casts."
+    )
+    seed = models.PositiveIntegerField(
+        help_text="32-bit seed of the player's random stream."
+    )
+    start_counter = models.PositiveBigIntegerField(
+        help_text="Position in the stream of the run's first cast, counted in casts."
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of casts in the run."
+    )
+    reserved = models.PositiveIntegerField(
+        default=0,
+        help_text="Casts claimed for the run; the next run starts after them."
+    )
+    loadout = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="The fishing loadout the casts were rolled with, e.g. '1x2,5x1'."
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the run started."
+    )
+
+    class Meta:
+        verbose_name = "Cast Log"
+        verbose_name_plural = "Cast Logs"
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.user_id}: casts {self.start_counter}+{self.count} of seed {self.seed}"
+
+    @classmethod
+    def reserve(cls, user, loadout, casts):
+        """
+        Claim the next `casts` casts of a player's stream for a loadout.
+
+        Returns (log, offset): the casts are log.replay(offset, casts). They
+        come from the block this process holds for the player when it has
+        room and the loadout is unchanged; otherwise a new block is claimed.
+        The caller records offset + casts as the run's count through the
+        write-behind buffer.
+        """
+        encoded = engine.encode_loadout(loadout)
+        claimed = _blocks.take(user.pk, encoded, casts)
+        if claimed is not None:
+            return claimed
+        log = cls._claim_block(user, encoded, max(casts, getattr(settings, 'CAST_LOG_BLOCK_SIZE', 256)))
+        _blocks.hold(user.pk, log, casts)
+        return log, 0
+
+    @classmethod
+    def _claim_block(cls, user, encoded, size):
+        """Start a run of `size` reserved casts after the player's last one, in one write transaction."""
+        with transaction.atomic():
+            last = cls.objects.select_for_update().filter(user=user).order_by('-pk').first()
+            if last is not None:
+                seed, start = last.seed, last.start_counter + last.reserved
+            else:
+                seed, start = rng.hash_string(f'{user.pk}:{secrets.token_hex(16)}'), 0
+            return cls.objects.create(
+                user=user, seed=seed, start_counter=start, count=0, reserved=size, loadout=encoded
+            )
+
+    def replay(self, offset=0, count=None):
+        """Recompute casts offset .. offset + count - 1 of the run, as start_fishing returned them."""
+        if count is None:
+            count = self.count - offset
+        draws = rng.cast_draws(self.seed, self.start_counter + offset, count)
+        return engine.get_sampler(engine.decode_loadout(self.loadout)).resolve_draws(draws)
+
+    def verify(self, claims, offset=0):
+        """
+        Check claimed casts against the replay; returns the indices that do not match.
+
+        A claim is an outcome ('miss' or a rarity), or a dict that may carry
+        'caught', 'rarity', 'fish' and 'coins'. Claims past the end of the run never match.
+        """
+        available = max(0, min(len(claims), self.count - offset))
+        results = self.replay(offset, available)
+        mismatches = []
+        for index, claim in enumerate(claims):
+            if index >= available or not _claim_matches(claim, results[index]):
+                mismatches.append(index)
+        return mismatches
+
+
+class _BlockTable:
+    """Per-process LRU of {user_id: [CastLog, next offset]} for the blocks this worker holds."""
+
+    def __init__(self, size=10000):
+        self._size = size
+        self._lock = threading.Lock()
+        self._blocks = OrderedDict()
+
+    def take(self, user_id, encoded, casts):
+        """(log, offset) for the next `casts` casts of the held block, or None if it cannot serve them."""
+        with self._lock:
+            block = self._blocks.get(user_id)
+            if block is None:
+                return None
+            log, offset = block
+            if log.loadout != encoded or offset + casts > log.reserved:
+                return None
+            block[1] = offset + casts
+            self._blocks.move_to_end(user_id)
+            return log, offset
+
+    def hold(self, user_id, log, used):
+        with self._lock:
+            self._blocks[user_id] = [log, used]
+            self._blocks.move_to_end(user_id)
+            while len(self._blocks) > self._size:
+                self._blocks.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+
+_blocks = _BlockTable()
+
+
+def _claim_matches(claim, result):
+    outcome = result['rarity'] if result['caught'] else 'miss'
+    if isinstance(claim, str):
+        return claim == outcome
+    if 'caught' in claim and claim['caught'] != result['caught']:
+        return False
+    if claim.get('rarity') is not None and claim['rarity'] != outcome:
+        return False
+    return all(claim[key] == result.get(key) for key in ('fish', 'coins') if key in claim)
@@ -0,0 +1,51 @@
+"""
+Server-side players for guests.
+
+The site has no real sign-in, so most players are anonymous. A guest gets an
+ordinary auth User the first time they cast or buy, remembered in their
+session. PlayerState, InventoryItem, CastLog and the write-behind buffer then
+treat guests and signed-in players alike, and a guest's purchases are charged
+with the same conditional UPDATE as anyone's.
+
+Guest users have no usable password and a username starting with
+GUEST_PREFIX; they are left off the leaderboards. Each request that finds
+its guest marks the session modified, so the session (and with it the guest)
+lives SESSION_COOKIE_AGE past the last visit; core.sessions keeps that from
+costing a write per request. purge_guest_players deletes guests whose
+sessions have expired.
+"""
+import secrets
+
+from django.contrib.auth import get_user_model
+
+GUEST_PREFIX = 'guest-'
+
+# Session key holding the guest's user id
+SESSION_KEY = '_guest_player_id'
+
+
+def is_guest(user):
+    return user.get_username().startswith(GUEST_PREFIX)
+
+
+def player_for(request, create=False):
+    """
+    The user whose coins and items a request plays with.
+
+    That is the signed-in user, else the session's guest. A guest without a
+    player yet gets None, or a new guest user when create is true.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    User = get_user_model()
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is not None:
+        user = User.objects.filter(pk=user_id, username__startswith=GUEST_PREFIX).first()
+        if user is not None:
+            request.session.modified = True
+            return user
+    if not create:
+        return None
+    user = User.objects.create_user(f'{GUEST_PREFIX}{secrets.token_hex(8)}')
+    request.session[SESSION_KEY] = user.pk
+    return user
@@ -0,0 +1,180 @@
+"""
+Token-bucket rate limiting shared by every worker process on the host.
+
+Buckets live in a fixed-size table in a memory-mapped file (RATE_LIMIT_FILE),
+so a client's budget holds across processes without a network service. Each
+slot is 24 bytes: the 64-bit hash of (route, client), the tokens left and
+the time of the last update. A key probes up to PROBES slots from its hash
+position. When it has no slot yet, it takes an empty one or evicts the
+least recently used of those. An evicted bucket would have refilled if it
+was idle; if not, that client starts again from a full burst.
+
+A check is a hash, a few struct reads and writes on the mapping and an
+flock() pair, a few microseconds in total.
+
+@rate_limit('start_fishing') looks up RATE_LIMITS['start_fishing'] =
+{'rate': tokens per second, 'burst': bucket size}. Clients are keyed by user
+id when signed in, otherwise by REMOTE_ADDR (or the first
+X-Forwarded-For address when RATE_LIMIT_TRUST_FORWARDED is set behind a
+proxy). Rejected requests get a 429 with Retry-After. Set
+RATE_LIMIT_ENABLED = False to turn limiting off.
+"""
+import fcntl
+import functools
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+MAGIC = b'RLTB0001'
+_HEADER = struct.Struct('<8sI')   # MAGIC, slot count
+_SLOT = struct.Struct('<Qdd')     # key hash, tokens, last update (epoch seconds)
+HEADER_SIZE = 16
+
+# Slots examined per key before evicting
+PROBES = 8
+
+# Used for routes missing from RATE_LIMITS
+DEFAULT_LIMIT = {'rate': 10.0, 'burst': 20.0}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BucketTable:
+    """The shared table; one instance per process, reopened after fork."""
+
+    def __init__(self, path, slots):
+        self.path = Path(path)
+        self.slots = slots
+        self.pid = os.getpid()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = HEADER_SIZE + slots * _SLOT.size
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size != size or os.pread(self.fd, _HEADER.size, 0) != _HEADER.pack(MAGIC, slots):
+                # New file or a different size: start from empty buckets
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, _HEADER.pack(MAGIC, slots), 0)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.map = mmap.mmap(self.fd, size)
+        # flock() does not exclude threads sharing the descriptor
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1.0, now=None):
+        """Spend `cost` tokens from a bucket; returns (allowed, seconds until it would be allowed)."""
+        now = time.time() if now is None else now
+        buffer = self.map
+        unpack_from, pack_into = _SLOT.unpack_from, _SLOT.pack_into
+        first = key % self.slots
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                target = None
+                oldest = None
+                for probe in range(PROBES):
+                    offset = HEADER_SIZE + ((first + probe) % self.slots) * _SLOT.size
+                    slot_key, tokens, last = unpack_from(buffer, offset)
+                    if slot_key == key:
+                        target = offset
+                        tokens = min(burst, tokens + max(0.0, now - last) * rate)
+                        break
+                    if slot_key == 0:
+                        target, tokens = offset, burst
+                        break
+                    if oldest is None or last < oldest[1]:
+                        oldest = (offset, last)
+                else:
+                    target, tokens = oldest[0], burst
+
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                pack_into(buffer, target, key, tokens, now)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    global _table
+    table = _table
+    if table is None or table.pid != os.getpid():
+        with _table_lock:
+            if _table is None or _table.pid != os.getpid():
+                path = _setting('RATE_LIMIT_FILE', Path(settings.BASE_DIR) / 'ratelimit.bin')
+                _table = BucketTable(path, _setting('RATE_LIMIT_SLOTS', 65536))
+            table = _table
+    return table
+
+
+def bucket_key(route, client):
+    """Nonzero 64-bit hash of a (route, client) pair; zero marks an empty slot."""
+    digest = hashlib.blake2b(f'{route}\0{client}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def client_id(request, user):
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    if _setting('RATE_LIMIT_TRUST_FORWARDED', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def check(route, request, user):
+    """Return a 429 response if the client is over its limit for route, else None."""
+    if not _setting('RATE_LIMIT_ENABLED', True):
+        return None
+    limit = {**DEFAULT_LIMIT, **_setting('RATE_LIMITS', {}).get(route, {})}
+    allowed, wait = get_table().take(
+        bucket_key(route, client_id(request, user)), float(limit['rate']), float(limit['burst'])
+    )
+    if allowed:
+        return None
+    response = JsonResponse({'success': False, 'error': 'Too many requests'}, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def rate_limit(route):
+    """Decorator applying the RATE_LIMITS entry for `route` to a sync or async view."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                limited = check(route, request, await request.auser())
+                if limited is not None:
+                    return limited
+                return await view(request, *args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                limited = check(route, request, getattr(request, 'user', None))
+                if limited is not None:
+                    return limited
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
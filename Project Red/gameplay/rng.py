@@ -0,0 +1,163 @@
+"""
+Counter-based port of hashString and seededRandom from
+frontend/static/frontend/js/game.js.
+
+seededRandom is xorshift32, which is linear over GF(2): one step multiplies
+the 32-bit state by a fixed 32x32 bit matrix. The draw at any counter can
+therefore be reached by jumping ahead with precomputed powers of that
+matrix instead of stepping through every earlier draw. Together with a seed,
+a start counter and a count, this describes any run of casts exactly, which
+is what gameplay.models.CastLog stores instead of a row per cast.
+
+With NumPy installed, uniforms() splits long runs into lanes that are jumped
+to their offsets and stepped together as arrays.
+"""
+import sys
+from array import array
+from functools import lru_cache
+
+from .engine import DRAWS_PER_CAST
+
+try:
+    import numpy as np
+except ImportError:  # optional; only makes uniforms() faster
+    np = None
+
+UINT32 = 0xFFFFFFFF
+
+# xorshift32 never leaves the all-zero state, and every other state is on a cycle of this length
+PERIOD = UINT32
+
+# seededRandom(seed) falls back to this when the seed is falsy
+DEFAULT_SEED = 123456789
+
+FNV_OFFSET_BASIS = 2166136261
+FNV_PRIME = 16777619
+
+# Lanes stepped side by side by the NumPy path, and the shortest run worth splitting
+LANES = 64
+MIN_LANE_RUN = 4096
+
+
+def hash_string(text):
+    """hashString() from game.js: 32-bit FNV-1a over UTF-16 code units, as JavaScript strings are."""
+    units = array('H', text.encode('utf-16-le'))
+    if sys.byteorder == 'big':
+        units.byteswap()
+    h = FNV_OFFSET_BASIS
+    for unit in units:
+        h = ((h ^ unit) * FNV_PRIME) & UINT32
+    return h
+
+
+def initial_state(seed):
+    """The xorshift state seededRandom(seed) starts from."""
+    return int(seed) & UINT32 if seed else DEFAULT_SEED
+
+
+def step(x):
+    """One xorshift32 step, as in seededRandom()."""
+    x ^= (x << 13) & UINT32
+    x ^= x >> 17
+    x ^= (x << 5) & UINT32
+    return x
+
+
+class SeededRandom:
+    """seededRandom(seed) as an object with a random() method, usable wherever random.Random is."""
+
+    def __init__(self, seed, counter=0):
+        self.state = jump(initial_state(seed), counter)
+
+    def random(self):
+        """Next draw; unlike random.random() this can return exactly 1.0."""
+        self.state = step(self.state)
+        return self.state / UINT32
+
+
+def _apply(columns, x):
+    """Multiply a state by a bit matrix given as the images of its 32 basis bits."""
+    result = 0
+    bit = 0
+    while x:
+        if x & 1:
+            result ^= columns[bit]
+        x >>= 1
+        bit += 1
+    return result
+
+
+@lru_cache(maxsize=None)
+def _jump_tables():
+    """
+    Byte lookup tables for M**(2**k), k = 0..31, where M is one xorshift step.
+
+    Multiplying a state by a power of M then takes four table lookups.
+    """
+    columns = tuple(step(1 << bit) for bit in range(32))
+    tables = []
+    for _ in range(32):
+        tables.append(tuple(
+            tuple(_apply(columns[8 * byte:8 * byte + 8], value) for value in range(256))
+            for byte in range(4)
+        ))
+        columns = tuple(_apply(columns, column) for column in columns)
+    return tuple(tables)
+
+
+def jump(x, steps):
+    """The state reached from x after `steps` xorshift steps, in O(log steps)."""
+    if not x:
+        return 0
+    steps %= PERIOD
+    tables = _jump_tables()
+    k = 0
+    while steps:
+        if steps & 1:
+            t0, t1, t2, t3 = tables[k]
+            x = t0[x & 0xFF] ^ t1[(x >> 8) & 0xFF] ^ t2[(x >> 16) & 0xFF] ^ t3[x >> 24]
+        steps >>= 1
+        k += 1
+    return x
+
+
+def state_at(seed, counter):
+    """The state after `counter` draws from seededRandom(seed)."""
+    return jump(initial_state(seed), counter)
+
+
+def uniforms(seed, counter, count):
+    """
+    Draws counter .. counter + count - 1 of seededRandom(seed), as a list of floats.
+
+    Draw n is the (n + 1)th value the JavaScript generator would return.
+    """
+    state = state_at(seed, counter)
+    if np is not None and count >= MIN_LANE_RUN and state:
+        return _uniforms_numpy(state, count)
+    draws = [0.0] * count
+    x = state
+    for i in range(count):
+        x ^= (x << 13) & UINT32
+        x ^= x >> 17
+        x ^= (x << 5) & UINT32
+        draws[i] = x / UINT32
+    return draws
+
+
+def _uniforms_numpy(state, count):
+    # Lane j starts j * run draws in and they all step together; the last lane may overshoot
+    run = -(-count // LANES)
+    x = np.array([jump(state, j * run) for j in range(LANES)], dtype=np.uint32)
+    out = np.empty((run, LANES), dtype=np.uint32)
+    for i in range(run):
+        x ^= x << np.uint32(13)
+        x ^= x >> np.uint32(17)
+        x ^= x << np.uint32(5)
+        out[i] = x
+    return (out.T.reshape(-1)[:count] / float(UINT32)).tolist()
+
+
+def cast_draws(seed, start_counter, count):
+    """The uniforms behind `count` casts starting at cast number start_counter."""
+    return uniforms(seed, start_counter * DRAWS_PER_CAST, count * DRAWS_PER_CAST)
@@ -1,3 +1,515 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.http import JsonResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from database.models import FishReward, RedeemedFish
+
+from . import engine, ingest, leaderboard, models, players, ratelimit, rng
+from .models import CastEvent, CastLog, LeaderboardScore, PlayerState
+from .writebehind import CoalescingBuffer, buffer as player_state_buffer
+
+
+class SeededRandomTests(SimpleTestCase):
+    """
+    Draws pinned to what seededRandom() and hashString() in game.js return
+    under node, so a broken jump-ahead table can't pass as a port that only
+    agrees with itself.
+    """
+
+    SEED = 1168618206  # hashString('angler')
+    OFFSET = 1000003
+
+    # First four draws at counter 0 and at OFFSET, for SEED and for the default seed
+    JS_DRAWS = {
+        (SEED, 0): [0.7987260298800483, 0.33683014994879024, 0.757189099154712, 0.5462629076899641],
+        (SEED, OFFSET): [0.8390686879491128, 0.48259323520646275, 0.5253281352402009, 0.6703453875776253],
+        (0, 0): [0.6321277193799912, 0.5212643641329521, 0.2910563352729791, 0.8894364202603317],
+        (0, OFFSET): [0.3983963926784686, 0.29209146236351025, 0.765969415606458, 0.8666242425950766],
+    }
+
+    def test_hash_string_matches_js(self):
+        self.assertEqual(rng.hash_string('angler'), self.SEED)
+        self.assertEqual(rng.hash_string('fisher \U0001f3a3 \u00fc'), 1496649257)
+
+    def test_uniforms_match_js(self):
+        for (seed, counter), draws in self.JS_DRAWS.items():
+            with self.subTest(seed=seed, counter=counter):
+                self.assertEqual(rng.uniforms(seed, counter, 4), draws)
+
+    def test_seeded_random_matches_js(self):
+        for (seed, counter), draws in self.JS_DRAWS.items():
+            with self.subTest(seed=seed, counter=counter):
+                generator = rng.SeededRandom(seed, counter)
+                self.assertEqual([generator.random() for _ in draws], draws)
+
+    def test_long_runs_agree_with_jumping(self):
+        # Long enough for the NumPy lanes when NumPy is installed
+        draws = rng.uniforms(self.SEED, self.OFFSET - 5000, 5004)
+        self.assertEqual(draws[-4:], self.JS_DRAWS[(self.SEED, self.OFFSET)])
+
+
+class CatchEngineTests(SimpleTestCase):
+    """
+    computePlayerStats() and the cast rolls pinned to game.js under node, fed
+    with the seededRandom() draws that SeededRandomTests pins.
+    """
+
+    # {name: (inventory, catchChance, rarityWeights, coinMultiplier)} from computePlayerStats()
+    JS_STATS = {
+        'none': ([], 0.25, {'common': 70, 'uncommon': 20, 'rare': 8, 'epic': 1.9, 'legendary': 0.1}, 1),
+        'worms, flies and mystic rod': (
+            [{'id': 1, 'quantity': 3}, {'id': 3, 'quantity': 2}, {'id': 6, 'quantity': 1}],
+            0.25,
+            {
+                'common': 70, 'uncommon': 20, 'rare': 11.6,
+                'epic': 3.2983999999999996, 'legendary': 0.17490000000000003,
+            },
+            1.3,
+        ),
+        'catch bonuses and steel rod': (
+            [{'id': 2, 'quantity': 2}, {'id': 8, 'quantity': 1}, {'id': 11, 'quantity': 4}, {'id': 5, 'quantity': 1}],
+            0.62, {'common': 70, 'uncommon': 20, 'rare': 8, 'epic': 1.9, 'legendary': 0.1}, 1.1,
+        ),
+        'capped catch chance': (
+            [{'id': 2, 'quantity': 9}], 0.85, {'common': 70, 'uncommon': 20, 'rare': 8, 'epic': 1.9, 'legendary': 0.1}, 1,
+        ),
+        # getItemCount() uses inv.find(), so the first entry for an id wins
+        'duplicate id': (
+            [{'id': 1, 'quantity': 1}, {'id': 1, 'quantity': 5}, {'id': 2, 'quantity': 1}],
+            0.32, {'common': 70, 'uncommon': 20, 'rare': 9.2, 'epic': 2.052, 'legendary': 0.10200000000000001}, 1,
+        ),
+    }
+
+    # Twelve casts with the 'catch bonuses and steel rod' inventory from seededRandom(hashString('angler')):
+    # misses, names and coins are the rollCastLocally() formulas, Math.round included
+    JS_CASTS = [
+        {'caught': False, 'message': 'Ripples only. Try again!', 'coins': 0},
+        {'caught': True, 'fish': 'Street Trout', 'rarity': 'common', 'coins': 3},
+        {'caught': True, 'fish': 'Brook Stickleback', 'rarity': 'common', 'coins': 2},
+        {'caught': True, 'fish': 'Moonstone Trout', 'rarity': 'rare', 'coins': 15},
+        {'caught': True, 'fish': 'Pond Perch', 'rarity': 'common', 'coins': 6},
+        {'caught': False, 'message': 'The fish swiped left.', 'coins': 0},
+        {'caught': True, 'fish': 'Pond Perch', 'rarity': 'common', 'coins': 6},
+        {'caught': True, 'fish': 'Bubble Guppy', 'rarity': 'common', 'coins': 3},
+        {'caught': True, 'fish': 'Puddle Bass', 'rarity': 'common', 'coins': 6},
+        {'caught': True, 'fish': 'Minnow', 'rarity': 'common', 'coins': 3},
+        {'caught': True, 'fish': 'Street Trout', 'rarity': 'common', 'coins': 6},
+        {'caught': False, 'message': 'Nothing bit this time…', 'coins': 0},
+    ]
+
+    def test_stats_match_js(self):
+        for name, (inventory, catch_chance, weights, multiplier) in self.JS_STATS.items():
+            with self.subTest(name):
+                stats = engine.compute_player_stats(engine.normalize_loadout(inventory))
+                self.assertEqual(stats, (catch_chance, weights, multiplier))
+
+    def test_alias_table_keeps_the_js_weights(self):
+        for name, (inventory, _, weights, _) in self.JS_STATS.items():
+            with self.subTest(name):
+                table = engine.get_sampler(engine.normalize_loadout(inventory)).rarity_table
+                # Each column is its own outcome with probability prob, else its alias
+                share = dict.fromkeys(table.outcomes, 0.0)
+                for column, outcome in enumerate(table.outcomes):
+                    share[outcome] += table.prob[column]
+                    share[table.outcomes[table.alias[column]]] += 1 - table.prob[column]
+                total = sum(weights.values())
+                for outcome in engine.RARITIES:
+                    self.assertAlmostEqual(share[outcome] / len(table.outcomes), weights[outcome] / total, places=12)
+
+    def test_seeded_casts_match_js(self):
+        inventory = self.JS_STATS['catch bonuses and steel rod'][0]
+        results = engine.resolve_casts(inventory, casts=12, rng=rng.SeededRandom(rng.hash_string('angler')))
+        self.assertEqual(results, self.JS_CASTS)
+
+    def test_normalize_loadout(self):
+        self.assertEqual(engine.normalize_loadout({'6': 2, 1: '3', 9: 4, 2: 0}), ((1, 3), (6, 1)))
+        self.assertEqual(engine.normalize_loadout([{'id': 2, 'quantity': 0}, {'id': 2, 'quantity': 3}]), ())
+        with self.assertRaises(ValueError):
+            engine.normalize_loadout([{'id': 'worms', 'quantity': 1}])
+
+    def test_js_round_rounds_halves_up(self):
+        self.assertEqual([engine.js_round(v) for v in (0.5, 1.5, 2.5, -0.5)], [1, 2, 3, 0])
+
+
+class CoalescingBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('angler')
+        self.buffer = CoalescingBuffer(max_users=1000, max_age=3600)
+
+    def test_recreates_a_row_deleted_between_flushes(self):
+        self.buffer.add(self.user.pk, coins=5, casts=1)
+        self.buffer.flush()
+        PlayerState.objects.filter(user=self.user).delete()
+
+        self.buffer.add(self.user.pk, coins=3, casts=1)
+        self.buffer.flush()
+        state = PlayerState.objects.get(user=self.user)
+        self.assertEqual((state.coins, state.cast_count), (3, 1))
+
+    def test_failed_flush_keeps_increments_and_does_not_raise(self):
+        self.buffer.add(self.user.pk, coins=5, casts=1)
+        with mock.patch.object(CoalescingBuffer, '_write', side_effect=RuntimeError('database is locked')):
+            with self.assertLogs('gameplay.writebehind', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending_for(self.user.pk), (5, 1))
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(PlayerState.objects.get(user=self.user).coins, 5)
+
+    def test_deleted_users_are_dropped_after_a_failed_flush(self):
+        gone = User.objects.create_user('gone')
+        self.buffer.add(gone.pk, coins=1)
+        self.buffer.add(self.user.pk, coins=2)
+        gone.delete()
+        with mock.patch.object(CoalescingBuffer, '_write', side_effect=RuntimeError('FOREIGN KEY constraint failed')):
+            with self.assertLogs('gameplay.writebehind', 'ERROR'):
+                self.buffer.flush()
+        self.assertEqual(self.buffer.pending_for(gone.pk), (0, 0))
+        self.assertEqual(self.buffer.pending_for(self.user.pk), (2, 0))
+
+
+@override_settings(CAST_LOG_BLOCK_SIZE=8)
+class CastLogReserveTests(TestCase):
+    def setUp(self):
+        models._blocks.clear()
+        self.user = User.objects.create_user('caster')
+
+    def test_casts_inside_a_block_need_no_queries(self):
+        log, offset = CastLog.reserve(self.user, [], 3)
+        self.assertEqual((offset, log.reserved), (0, 8))
+        with self.assertNumQueries(0):
+            again, offset = CastLog.reserve(self.user, [], 5)
+        self.assertEqual((again.pk, offset), (log.pk, 3))
+
+    def test_next_block_continues_the_stream_after_the_reserved_casts(self):
+        first, _ = CastLog.reserve(self.user, [], 6)
+        second, offset = CastLog.reserve(self.user, [], 6)
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual((second.seed, second.start_counter, offset), (first.seed, 8, 0))
+
+        changed, offset = CastLog.reserve(self.user, [{'id': 5, 'quantity': 1}], 1)
+        self.assertEqual((changed.start_counter, offset), (16, 0))
+
+    def test_played_count_is_written_behind(self):
+        buffer = CoalescingBuffer(max_users=1000, max_age=3600)
+        log, offset = CastLog.reserve(self.user, [], 2)
+        buffer.add(self.user.pk, casts=2, cast_log=(log.pk, offset + 2))
+        log, offset = CastLog.reserve(self.user, [], 3)
+        buffer.add(self.user.pk, casts=3, cast_log=(log.pk, offset + 3))
+        self.assertEqual(CastLog.objects.get(pk=log.pk).count, 0)
+
+        buffer.flush()
+        log.refresh_from_db()
+        self.assertEqual(log.count, 5)
+        self.assertEqual(log.verify([r['rarity'] if r['caught'] else 'miss' for r in log.replay()]), [])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], RATE_LIMIT_ENABLED=False)
+class GuestPlayerTests(TestCase):
+    def cast(self, casts=1):
+        response = self.client.post('/api/start-fishing/', {'casts': casts}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_guest_has_an_empty_state_until_the_first_cast(self):
+        self.assertEqual(
+            self.client.get('/api/player-state/').json(),
+            {'success': True, 'coins': 0, 'cast_count': 0, 'inventory': []},
+        )
+        self.assertFalse(User.objects.filter(username__startswith=players.GUEST_PREFIX).exists())
+
+    def test_casts_credit_one_guest_player_per_session(self):
+        earned = sum(self.cast(casts=5)['coins_earned'] for _ in range(3))
+        guests = User.objects.filter(username__startswith=players.GUEST_PREFIX)
+        self.assertEqual([guest.pk for guest in guests], [self.client.session[players.SESSION_KEY]])
+
+        state = self.client.get('/api/player-state/').json()
+        self.assertEqual((state['coins'], state['cast_count']), (earned, 15))
+        player_state_buffer.flush()
+        self.assertEqual(PlayerState.objects.get(user=guests[0]).coins, earned)
+        self.assertFalse(LeaderboardScore.objects.exists())
+
+    def test_purge_deletes_only_idle_guests(self):
+        self.cast()
+        active = User.objects.get(pk=self.client.session[players.SESSION_KEY])
+        player_state_buffer.flush()
+        long_ago = timezone.now() - timedelta(days=30)
+        idle = User.objects.create_user(f'{players.GUEST_PREFIX}idle', date_joined=long_ago)
+        PlayerState.objects.create(user=idle)
+        PlayerState.objects.filter(user=idle).update(updated_at=long_ago)
+        User.objects.create_user(f'{players.GUEST_PREFIX}never', date_joined=long_ago)
+        member = User.objects.create_user('member', date_joined=long_ago)
+
+        call_command('purge_guest_players', days=14, stdout=StringIO())
+        self.assertEqual(set(User.objects.values_list('pk', flat=True)), {active.pk, member.pk})
+
+
+class TopKTests(SimpleTestCase):
+    def test_keeps_the_best_scores_and_evicts_the_lowest(self):
+        top = leaderboard.TopK('all', [(1, 'a', 5), (2, 'b', 3)], size=2)
+        top.offer(3, 'c', 3)  # ties the floor, so it does not make the cut
+        self.assertEqual(top.ranked(), [(1, 'a', 5), (2, 'b', 3)])
+        top.offer(3, 'c', 4)
+        self.assertEqual(top.ranked(), [(1, 'a', 5), (3, 'c', 4)])
+        top.offer(3, 'c', 9)
+        self.assertEqual(top.ranked(), [(3, 'c', 9), (1, 'a', 5)])
+
+    def test_ties_rank_by_user_id(self):
+        top = leaderboard.TopK('all', [(7, 'g', 2), (4, 'd', 2), (9, 'i', 3)])
+        self.assertEqual([user_id for user_id, _, _ in top.ranked()], [9, 4, 7])
+
+
+class LeaderboardRecordTests(TestCase):
+    def setUp(self):
+        leaderboard.invalidate()
+        self.addCleanup(leaderboard.invalidate)
+        self.ann = User.objects.create_user('ann')
+        self.bob = User.objects.create_user('bob')
+
+    def test_record_adds_to_every_window(self):
+        leaderboard.record('catches', self.ann, 2)
+        leaderboard.record('catches', self.ann, 3)
+        scores = LeaderboardScore.objects.filter(board='catches', user=self.ann)
+        self.assertEqual(sorted(scores.values_list('window', 'score')), [('all_time', 5), ('daily', 5), ('weekly', 5)])
+
+    def test_a_batch_costs_the_same_statements_for_any_number_of_users(self):
+        with self.assertNumQueries(5) as one:
+            leaderboard.record_many('catches', {self.ann.pk: 1})
+        with self.assertNumQueries(len(one.captured_queries)):
+            leaderboard.record_many('catches', {self.ann.pk: 2, self.bob.pk: 4})
+        _, entries = leaderboard.top('catches', 'daily')
+        self.assertEqual(entries, [(self.bob.pk, 'bob', 4), (self.ann.pk, 'ann', 3)])
+
+    def test_loaded_top_is_updated_on_commit(self):
+        leaderboard.top('catches', 'weekly')
+        with self.captureOnCommitCallbacks(execute=True):
+            leaderboard.record_many('catches', {self.bob.pk: 2})
+        with self.assertNumQueries(0):
+            _, entries = leaderboard.top('catches', 'weekly')
+        self.assertEqual(entries, [(self.bob.pk, 'bob', 2)])
+
+    def test_buffered_catches_land_on_the_day_they_were_made(self):
+        buffer = CoalescingBuffer(max_users=1000, max_age=3600)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        with mock.patch('gameplay.writebehind.timezone.localdate', return_value=yesterday):
+            buffer.add(self.ann.pk, coins=1, casts=2, catches=2)
+        buffer.add(self.ann.pk, coins=1, casts=1, catches=1)
+        self.assertFalse(LeaderboardScore.objects.exists())
+
+        buffer.flush()
+        daily = dict(LeaderboardScore.objects.filter(window='daily').values_list('period', 'score'))
+        self.assertEqual(daily, {yesterday.isoformat(): 2, timezone.localdate().isoformat(): 1})
+        self.assertEqual(LeaderboardScore.objects.get(window='all_time').score, 3)
+
+    def test_rebuild_recounts_redemptions_and_keeps_catches(self):
+        reward = FishReward.objects.create(fish_type='TEXT', message='One fish')
+        for user in (self.ann, self.bob, self.bob):
+            RedeemedFish.objects.create(user=user, fish_reward=reward)
+        leaderboard.record_many('catches', {self.ann.pk: 7})
+        LeaderboardScore.objects.filter(board='redemptions', user=self.bob).update(score=99)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(REDEMPTION_ARCHIVE_DIR=directory):
+            call_command('rebuild_leaderboard', stdout=StringIO())
+        redemptions = LeaderboardScore.objects.filter(board='redemptions', window='all_time')
+        self.assertEqual(dict(redemptions.values_list('user_id', 'score')), {self.ann.pk: 1, self.bob.pk: 2})
+        self.assertEqual(LeaderboardScore.objects.get(board='catches', window='all_time').score, 7)
+
+
+class BucketTableTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ratelimit.bin')
+        self.table = self.open(16)
+
+    def open(self, slots):
+        table = ratelimit.BucketTable(self.path, slots)
+        self.addCleanup(table.close)
+        return table
+
+    def test_burst_then_refill(self):
+        for _ in range(3):
+            self.assertEqual(self.table.take(5, rate=2.0, burst=3.0, now=100.0), (True, 0.0))
+        self.assertEqual(self.table.take(5, rate=2.0, burst=3.0, now=100.0), (False, 0.5))
+        self.assertEqual(self.table.take(5, rate=2.0, burst=3.0, now=100.5), (True, 0.0))
+
+    def test_refill_stops_at_the_burst(self):
+        self.table.take(5, rate=2.0, burst=3.0, now=100.0)
+        allowed = [self.table.take(5, rate=2.0, burst=3.0, now=1000.0)[0] for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_colliding_keys_keep_their_own_buckets(self):
+        # 5 and 21 hash to the same first slot of 16
+        self.assertTrue(self.table.take(5, rate=1.0, burst=1.0, now=100.0)[0])
+        self.assertTrue(self.table.take(21, rate=1.0, burst=1.0, now=100.0)[0])
+        self.assertFalse(self.table.take(5, rate=1.0, burst=1.0, now=100.0)[0])
+        self.assertFalse(self.table.take(21, rate=1.0, burst=1.0, now=100.0)[0])
+
+    def test_full_probe_window_evicts_the_least_recently_used(self):
+        # Keys that are multiples of 16 all start probing at slot 0
+        keys = [16 * n for n in range(1, ratelimit.PROBES + 2)]
+        for when, key in enumerate(keys[:ratelimit.PROBES], start=1):
+            self.assertTrue(self.table.take(key, rate=0.001, burst=1.0, now=float(when))[0])
+        self.assertFalse(self.table.take(keys[1], rate=0.001, burst=1.0, now=20.0)[0])
+
+        # A new key takes the slot of keys[0], the least recently used
+        self.assertTrue(self.table.take(keys[-1], rate=0.001, burst=1.0, now=21.0)[0])
+        self.assertFalse(self.table.take(keys[-1], rate=0.001, burst=1.0, now=21.0)[0])
+        # keys[0] lost its drained bucket and starts again from a full burst
+        self.assertTrue(self.table.take(keys[0], rate=0.001, burst=1.0, now=22.0)[0])
+
+    def test_buckets_are_shared_through_the_file(self):
+        other = self.open(16)
+        self.assertTrue(self.table.take(5, rate=1.0, burst=1.0, now=100.0)[0])
+        self.assertFalse(other.take(5, rate=1.0, burst=1.0, now=100.0)[0])
+
+    def test_different_slot_count_starts_empty(self):
+        self.table.take(5, rate=1.0, burst=1.0, now=100.0)
+        resized = self.open(32)
+        self.assertTrue(resized.take(5, rate=1.0, burst=1.0, now=100.0)[0])
+
+    def test_reopened_after_fork(self):
+        self.addCleanup(setattr, ratelimit, '_table', None)
+        with override_settings(RATE_LIMIT_FILE=self.path, RATE_LIMIT_SLOTS=16):
+            ratelimit._table = None
+            parent = ratelimit.get_table()
+            self.addCleanup(parent.close)
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    child = ratelimit.get_table()
+                    fresh = child is not parent and child.pid == os.getpid()
+                    child.take(5, rate=0.001, burst=1.0)
+                finally:
+                    os._exit(0 if fresh else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            self.assertIs(ratelimit.get_table(), parent)
+            # The child's spend landed in the shared file
+            self.assertFalse(parent.take(5, rate=0.001, burst=1.0)[0])
+
+
+@override_settings(RATE_LIMITS={'test': {'rate': 0.25, 'burst': 1}}, RATE_LIMIT_SLOTS=16)
+class RateLimitDecoratorTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(RATE_LIMIT_FILE=os.path.join(directory.name, 'ratelimit.bin'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ratelimit._table = None
+        self.addCleanup(setattr, ratelimit, '_table', None)
+        self.addCleanup(lambda: ratelimit._table and ratelimit._table.close())
+
+    def request(self, address='203.0.113.5'):
+        request = RequestFactory().post('/api/test/', REMOTE_ADDR=address)
+        request.user = AnonymousUser()
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    def test_rejection_carries_retry_after(self):
+        self.assertIsNone(ratelimit.check('test', self.request(), None))
+        response = ratelimit.check('test', self.request(), None)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '4')  # one token at 0.25 per second
+        # Another client has its own bucket
+        self.assertIsNone(ratelimit.check('test', self.request('203.0.113.6'), None))
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertIsNone(ratelimit.check('test', self.request(), None))
+
+    def test_sync_view(self):
+        view = ratelimit.rate_limit('test')(lambda request: JsonResponse({'success': True}))
+        self.assertEqual(view(self.request()).status_code, 200)
+        self.assertEqual(view(self.request()).status_code, 429)
+
+    async def test_async_view(self):
+        async def view(request):
+            return JsonResponse({'success': True})
+
+        limited = ratelimit.rate_limit('test')(view)
+        self.assertEqual((await limited(self.request())).status_code, 200)
+        self.assertEqual((await limited(self.request())).status_code, 429)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class CastEventIngestTests(TestCase):
+    URL = '/api/cast-events/'
+
+    def setUp(self):
+        ingest._queue = None
+        self.addCleanup(self.stop_queue)
+
+    def stop_queue(self):
+        if ingest._queue is not None:
+            for task in ingest._queue.consumers:
+                task.cancel()
+        ingest._queue = None
+
+    def batch(self, *seqs, client_id='tab-1'):
+        return {'client_id': client_id, 'events': [
+            {'seq': seq, 'timestamp': 1700000000000 + seq, 'outcome': 'rare' if seq % 2 else 'miss'} for seq in seqs
+        ]}
+
+    def test_wsgi_writes_the_batch_before_answering(self):
+        response = self.client.post(self.URL, self.batch(1, 2), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'success': True, 'accepted': 2})
+        self.assertEqual(
+            list(CastEvent.objects.order_by('client_seq').values_list('client_id', 'client_seq', 'outcome')),
+            [('anon:tab-1', 1, 'rare'), ('anon:tab-1', 2, 'miss')],
+        )
+
+    def test_resent_events_are_stored_once(self):
+        self.client.post(self.URL, self.batch(1, 2), content_type='application/json')
+        # A retry after a lost response overlaps the first batch
+        response = self.client.post(self.URL, self.batch(2, 3), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(list(CastEvent.objects.order_by('client_seq').values_list('client_seq', flat=True)), [1, 2, 3])
+        # The same seq from another client is a different event
+        self.client.post(self.URL, self.batch(1, client_id='tab-2'), content_type='application/json')
+        self.assertEqual(CastEvent.objects.filter(client_seq=1).count(), 2)
+
+    def test_signed_in_players_are_keyed_by_user(self):
+        user = User.objects.create_user('angler')
+        self.client.force_login(user)
+        self.client.post(self.URL, {'events': self.batch(1)['events']}, content_type='application/json')
+        self.assertEqual(CastEvent.objects.get().client_id, str(user.pk))
+
+    def test_invalid_batches_are_rejected(self):
+        for payload in ({'events': self.batch(1)['events']}, self.batch(), {'client_id': 'tab-1', 'events': [
+            {'seq': 1, 'timestamp': 1700000000000, 'outcome': 'whale'}
+        ]}):
+            self.assertEqual(self.client.post(self.URL, payload, content_type='application/json').status_code, 400)
+        self.assertFalse(CastEvent.objects.exists())
+
+    async def test_asgi_queues_the_batch_for_the_consumers(self):
+        response = await AsyncClient().post(self.URL, self.batch(1, 2, 3), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        await ingest.drain()
+        self.assertEqual(await CastEvent.objects.acount(), 3)
+
+    @override_settings(CAST_EVENT_QUEUE_SIZE=2)
+    async def test_full_queue_answers_429_with_retry_after(self):
+        client = AsyncClient()
+        response = await client.post(self.URL, self.batch(1, 2, 3), content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        # Nothing of a rejected batch is queued, so a smaller one still fits
+        response = await client.post(self.URL, self.batch(4, 5), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        await ingest.drain()
+        self.assertEqual([event.client_seq async for event in CastEvent.objects.order_by('client_seq')], [4, 5])
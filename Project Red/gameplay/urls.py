@@ -6,4 +6,7 @@ app_name = 'gameplay'
 urlpatterns = [
     path('api/start-fishing/', views.start_fishing, name='start_fishing'),
     path('api/status/', views.game_status, name='game_status'),
+    path('api/cast-events/', views.ingest_cast_events, name='ingest_cast_events'),
+    path('api/player-state/', views.player_state, name='player_state'),
+    path('api/leaderboard/', views.get_leaderboard, name='leaderboard'),
 ]
\ No newline at end of file
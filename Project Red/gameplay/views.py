@@ -1,28 +1,163 @@
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.csrf import csrf_exempt
 import json
-import random
+
+from store.models import InventoryItem
+
+from . import engine, ingest, leaderboard, players
+from .ratelimit import rate_limit
+from .models import CastLog, PlayerState
+from .writebehind import buffer as player_state_buffer
+
+# Upper bound on casts resolved by a single request
+MAX_CASTS_PER_REQUEST = 100
+
+# Entries returned by the leaderboard API when no limit is given
+DEFAULT_LEADERBOARD_LIMIT = 10
+
+
+def _load_json_body(request):
+    """Parse a JSON request body; non-JSON or empty bodies count as an empty object."""
+    if request.content_type != 'application/json' or not request.body:
+        return {}
+    payload = json.loads(request.body)
+    if not isinstance(payload, dict):
+        raise ValueError('Expected a JSON object')
+    return payload
+
 
 @csrf_exempt
+@rate_limit('start_fishing')
 def start_fishing(request):
-    """API endpoint for starting fishing"""
+    """
+    API endpoint for starting fishing.
+
+    Accepts an optional JSON body: {"casts": N} and resolves all N casts in
+    one pass with the server-side catch engine. Players fish with the
+    inventory they bought in the store, and their casts are drawn from their
+    logged random stream (see CastLog) so they can be replayed later. Guests
+    get a server-side player on their first cast (see gameplay.players).
+    """
     if request.method == 'POST':
         try:
-            # Simulate fishing results
-            fishing_result = {
-                'success': True,
-                'fish_caught': random.choice(['Salmon', 'Trout', 'Bass', 'Cod', 'Rare Golden Fish']),
-                'coins_earned': random.randint(5, 25),
-                'message': 'Great catch!'
-            }
-            return JsonResponse(fishing_result)
+            payload = _load_json_body(request)
+            casts = int(payload.get('casts', 1))
+            if not 1 <= casts <= MAX_CASTS_PER_REQUEST:
+                raise ValueError(f'casts must be between 1 and {MAX_CASTS_PER_REQUEST}')
+            player = players.player_for(request, create=True)
+            loadout = engine.normalize_loadout(InventoryItem.owned_by(player))
+            log, offset = CastLog.reserve(player, loadout, casts)
+            results = log.replay(offset, casts)
+        except (ValueError, TypeError) as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=500)
-    
+
+        catches = [r for r in results if r['caught']]
+        coins_earned = sum(r['coins'] for r in results)
+        # Guests play anonymously, so their catches stay off the leaderboards
+        player_state_buffer.add(
+            player.pk, coins=coins_earned, casts=casts, cast_log=(log.pk, offset + casts),
+            catches=len(catches) if request.user.is_authenticated else 0,
+        )
+
+        fishing_result = {
+            'success': True,
+            'fish_caught': catches[0]['fish'] if catches else None,
+            'coins_earned': coins_earned,
+            'message': 'Great catch!' if catches else results[0]['message'],
+            'casts': results,
+        }
+        return JsonResponse(fishing_result)
+
     return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
 
-@csrf_exempt  
+@csrf_exempt
+@rate_limit('cast_events')
+async def ingest_cast_events(request):
+    """
+    API endpoint for batched cast events.
+
+    Accepts {"client_id": "...", "events": [{"seq": 1, "timestamp": 1700000000000, "outcome": "rare"}, ...]}.
+    Events are queued and persisted in the background; the response is 202
+    once queued, or 429 with Retry-After when the queue is full.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
+
+    user = await request.auser()
+    try:
+        payload = _load_json_body(request)
+        if user.is_authenticated:
+            user_id, client_id = user.pk, str(user.pk)
+        else:
+            user_id, client_id = None, payload.get('client_id')
+            if not isinstance(client_id, str) or not 1 <= len(client_id) <= 59:
+                raise ValueError('client_id is required for anonymous players (1-59 characters)')
+            client_id = f'anon:{client_id}'
+        events = ingest.parse_events(payload.get('events'), user_id, client_id)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if not await ingest.submit(events, queued=isinstance(request, ASGIRequest)):
+        response = JsonResponse({'success': False, 'error': 'Ingestion queue is full'}, status=429)
+        response['Retry-After'] = '1'
+        return response
+    return JsonResponse({'success': True, 'accepted': len(events)}, status=202)
+
+def player_state(request):
+    """API endpoint for the player's coins, cast count and inventory; all zero for a guest who has not played"""
+    player = players.player_for(request)
+    if player is None:
+        return JsonResponse({'success': True, 'coins': 0, 'cast_count': 0, 'inventory': []})
+
+    state = PlayerState.objects.filter(user=player).first() or PlayerState(user=player)
+    # Include increments still waiting in the write-behind buffer
+    pending_coins, pending_casts = player_state_buffer.pending_for(player.pk)
+    return JsonResponse({
+        'success': True,
+        'coins': state.coins + pending_coins,
+        'cast_count': state.cast_count + pending_casts,
+        'inventory': InventoryItem.owned_by(player),
+    })
+
+def get_leaderboard(request):
+    """
+    API endpoint for leaderboards.
+
+    Query parameters: board (catches or redemptions), window (daily, weekly
+    or all_time) and limit (1 to 100).
+    """
+    board = request.GET.get('board', 'catches')
+    window = request.GET.get('window', 'all_time')
+    if board not in leaderboard.BOARDS:
+        return JsonResponse({'success': False, 'error': f'Unknown board: {board}'}, status=400)
+    if window not in leaderboard.WINDOWS:
+        return JsonResponse({'success': False, 'error': f'Unknown window: {window}'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LEADERBOARD_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= leaderboard.TOP_K:
+        return JsonResponse(
+            {'success': False, 'error': f'limit must be between 1 and {leaderboard.TOP_K}'}, status=400
+        )
+
+    period, entries = leaderboard.top(board, window, limit)
+    return JsonResponse({
+        'success': True,
+        'board': board,
+        'window': window,
+        'period': period,
+        'entries': [
+            {'rank': rank, 'user_id': user_id, 'username': username, 'score': score}
+            for rank, (user_id, username, score) in enumerate(entries, start=1)
+        ],
+    })
+
+@csrf_exempt
 def game_status(request):
     """API endpoint for game status"""
     return JsonResponse({
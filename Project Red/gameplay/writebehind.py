@@ -0,0 +1,207 @@
+"""
+Write-behind buffer for PlayerState counters.
+
+Every cast changes a player's coins and cast count. Writing a row per click
+would serialize all players on SQLite's single writer, so increments are
+coalesced per user in memory and applied in batched UPDATEs of the form
+``SET coins = coins + CASE user_id WHEN ... END``. The same flush records
+how far into their current CastLog run each player has cast, as the run's
+count (a high-water mark, so only the largest value per run is kept), and
+adds the catches made since the last flush to the catches leaderboard,
+under the day they were made.
+
+A flush happens when PLAYER_STATE_FLUSH_SIZE users have pending changes, when
+the oldest pending change is PLAYER_STATE_FLUSH_INTERVAL seconds old (checked
+on every add and by a background thread), and at interpreter exit. A failed
+flush is logged and its increments go back into the buffer for the next one;
+it never raises into the request that triggered it. Increments that have not
+been flushed yet are lost if the process is killed outright, so only counters
+that can tolerate that belong here.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from . import leaderboard
+from .models import CastLog, PlayerState
+
+logger = logging.getLogger(__name__)
+
+# Users per UPDATE statement, well below SQLite's bound variable limit
+UPDATE_CHUNK_SIZE = 200
+
+
+class CoalescingBuffer:
+    """Accumulates per-user coin and cast increments and flushes them in batches."""
+
+    def __init__(self, max_users=None, max_age=None):
+        self._max_users = max_users
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}       # {user_id: [coins, casts, {cast_log_id: count}, {day: catches}]}
+        self._oldest = None      # monotonic time of the oldest pending change
+        self._timer = None
+
+    @property
+    def max_users(self):
+        if self._max_users is None:
+            return getattr(settings, 'PLAYER_STATE_FLUSH_SIZE', 200)
+        return self._max_users
+
+    @property
+    def max_age(self):
+        if self._max_age is None:
+            return getattr(settings, 'PLAYER_STATE_FLUSH_INTERVAL', 1.0)
+        return self._max_age
+
+    def add(self, user_id, coins=0, casts=0, cast_log=None, catches=0):
+        """
+        Queue an increment; flushes inline if a threshold has been reached.
+
+        cast_log is an optional (CastLog id, casts played in the run) pair.
+        catches are counted towards the catches leaderboard.
+        """
+        day = timezone.localdate() if catches else None
+        with self._lock:
+            entry = self._pending.get(user_id)
+            if entry is None:
+                entry = self._pending[user_id] = [0, 0, {}, {}]
+            entry[0] += coins
+            entry[1] += casts
+            if cast_log is not None:
+                log_id, count = cast_log
+                entry[2][log_id] = max(entry[2].get(log_id, 0), count)
+            if catches:
+                entry[3][day] = entry[3].get(day, 0) + catches
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = self._is_due()
+        self._ensure_timer()
+        if due:
+            self.flush()
+
+    def pending_for(self, user_id):
+        """Return (coins, casts) not yet written for a user."""
+        with self._lock:
+            coins, casts, _, _ = self._pending.get(user_id, (0, 0, None, None))
+        return coins, casts
+
+    def _is_due(self):
+        return bool(self._pending) and (
+            len(self._pending) >= self.max_users
+            or time.monotonic() - self._oldest >= self.max_age
+        )
+
+    def flush(self):
+        """Write all pending increments; returns the number of users flushed (0 if the write failed)."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._oldest = None
+            if not pending:
+                return 0
+            try:
+                self._write(pending)
+            except Exception:
+                logger.exception('Flushing %d player states failed; keeping them pending', len(pending))
+                self._requeue(self._without_deleted_users(pending))
+                return 0
+            return len(pending)
+
+    def _write(self, pending):
+        user_ids = list(pending)
+        with transaction.atomic():
+            # Rows can be deleted behind our back, so every flush makes sure they exist
+            PlayerState.objects.bulk_create(
+                [PlayerState(user_id=user_id) for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+            for start in range(0, len(user_ids), UPDATE_CHUNK_SIZE):
+                chunk = user_ids[start:start + UPDATE_CHUNK_SIZE]
+                PlayerState.objects.filter(user_id__in=chunk).update(
+                    coins=F('coins') + Case(
+                        *[When(user_id=user_id, then=Value(pending[user_id][0])) for user_id in chunk],
+                        default=Value(0),
+                    ),
+                    cast_count=F('cast_count') + Case(
+                        *[When(user_id=user_id, then=Value(pending[user_id][1])) for user_id in chunk],
+                        default=Value(0),
+                    ),
+                    updated_at=Now(),
+                )
+            counts = {log_id: count for _, _, logs, _ in pending.values() for log_id, count in logs.items()}
+            log_ids = list(counts)
+            for start in range(0, len(log_ids), UPDATE_CHUNK_SIZE):
+                chunk = log_ids[start:start + UPDATE_CHUNK_SIZE]
+                CastLog.objects.filter(pk__in=chunk).update(count=Greatest(F('count'), Case(
+                    *[When(pk=log_id, then=Value(counts[log_id])) for log_id in chunk],
+                    default=Value(0),
+                )))
+            catches = {}  # {day: {user_id: catches}}
+            for user_id, (_, _, _, days) in pending.items():
+                for day, count in days.items():
+                    catches.setdefault(day, {})[user_id] = count
+            for day, amounts in catches.items():
+                leaderboard.record_many('catches', amounts, day)
+
+    def _without_deleted_users(self, pending):
+        """Drop users that no longer exist, whose rows would fail every later flush too."""
+        try:
+            existing = set(get_user_model().objects.filter(pk__in=list(pending)).values_list('pk', flat=True))
+        except Exception:
+            return pending
+        dropped = [user_id for user_id in pending if user_id not in existing]
+        if dropped:
+            logger.warning('Dropping pending player state of deleted users %s', dropped)
+        return {user_id: entry for user_id, entry in pending.items() if user_id in existing}
+
+    def _requeue(self, pending):
+        with self._lock:
+            for user_id, (coins, casts, logs, days) in pending.items():
+                entry = self._pending.setdefault(user_id, [0, 0, {}, {}])
+                entry[0] += coins
+                entry[1] += casts
+                for log_id, count in logs.items():
+                    entry[2][log_id] = max(entry[2].get(log_id, 0), count)
+                for day, count in days.items():
+                    entry[3][day] = entry[3].get(day, 0) + count
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def _ensure_timer(self):
+        if self._timer is None or not self._timer.is_alive():
+            with self._lock:
+                if self._timer is None or not self._timer.is_alive():
+                    self._timer = threading.Thread(
+                        target=self._run_timer, name='player-state-flush', daemon=True
+                    )
+                    self._timer.start()
+
+    def _run_timer(self):
+        """Flush buffers that stopped receiving traffic before reaching a threshold."""
+        while True:
+            time.sleep(self.max_age)
+            with self._lock:
+                due = self._is_due()
+            if due:
+                try:
+                    self.flush()
+                finally:
+                    connections.close_all()
+
+
+buffer = CoalescingBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    buffer.flush()
@@ -2,6 +2,10 @@
 ASGI config for project_red project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve this module (for example with uvicorn or daphne) for the events stream
+at /events/api/stream/; under WSGI that endpoint answers 501. WSGI workers can
+serve everything else alongside it: events published through events.relay
+reach the ASGI workers' streams through the outbox table.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -14,3 +18,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_red.settings')
 
 application = get_asgi_application()
+
+# Build URL resolvers, templates, caches and the DB connection before the first request
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()
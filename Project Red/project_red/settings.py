@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from core import dbconfig
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.metrics_middleware',  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,14 +46,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Database sessions behind a per-process memory tier that skips no-op writes (core/sessions.py)
+SESSION_ENGINE = 'core.sessions'
+
 ROOT_URLCONF = 'project_red.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / "frontend" / "templates"],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Keep compiled templates in memory even with DEBUG on; the
+            # autoreloader still resets them when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -65,13 +78,17 @@ WSGI_APPLICATION = 'project_red.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Persistent WAL-mode connections with busy timeouts; see core/dbconfig.py.
+# Pragmas can be overridden with SQLITE_PRAGMAS = {'busy_timeout': 10000, ...}
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dbconfig.sqlite(BASE_DIR / 'db.sqlite3'),
 }
 
+# Optional: serve gameplay reads from a separate read-only connection
+if os.environ.get('GAMEPLAY_READ_CONNECTION') == '1':
+    DATABASES[dbconfig.READ_ALIAS] = dbconfig.sqlite(BASE_DIR / 'db.sqlite3', read_only=True)
+    DATABASE_ROUTERS = ['core.dbconfig.GameplayReadRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -103,10 +120,48 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "frontend" / "static"]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Serve static files through core.staticserve: {% static %} emits content-hashed
+# names, which are cached as immutable; see the compress_static command. The
+# last finder lets runserver resolve those names as well
+STATIC_FINGERPRINT_URLS = True
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'core.staticserve.FingerprintFinder',
+]
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.staticserve.IndexedStaticFilesStorage'},
+}
+
+# Page JS/CSS bundles and font subsets written by the build_assets command
+# (core/assets.py). {% bundle %} emits them when a manifest exists. Set
+# ASSET_USE_BUNDLES=0 in the environment while editing frontend sources to load
+# them one by one without a rebuild
+ASSET_USE_BUNDLES = os.environ.get('ASSET_USE_BUNDLES', '1') != '0'
+
 # Media files (optional, avoids AttributeError in urls.py when DEBUG)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Request metrics (core/metrics.py), scraped from /metrics. Each worker process
+# writes its counters to METRICS_DIR so the endpoint can report all of them
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_SAMPLE_RATE = 1.0
+# Bearer token a scraper must send; without one only local requests are answered
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Per-client token buckets for gameplay APIs, shared by all workers through
+# RATE_LIMIT_FILE (gameplay/ratelimit.py). rate is tokens per second
+RATE_LIMIT_FILE = BASE_DIR / 'ratelimit.bin'
+RATE_LIMITS = {
+    'start_fishing': {'rate': 8, 'burst': 20},
+    'cast_events': {'rate': 2, 'burst': 10},
+}
+
+# Old RedeemedFish months moved out by the archive_redemptions command (database/archive.py)
+REDEMPTION_ARCHIVE_DIR = BASE_DIR / 'archive'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -14,11 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+# Import re for escaping the static URL prefix
+import re
+
 # Import Django admin interface
 from django.contrib import admin
 
 # Import path and include functions for routing URLs to views or other URL configurations
-from django.urls import path, include
+from django.urls import path, re_path, include
 
 # Import settings and static helpers for serving media/static files during development
 from django.conf import settings
@@ -27,6 +30,12 @@ from django.conf.urls.static import static
 # Import views from the frontend app (used for main site pages)
 from frontend import views
 
+# Import the indexed static file server (fingerprinted, precompressed, cacheable)
+from core import staticserve
+
+# Import the Prometheus scrape endpoint for request metrics
+from core import metrics
+
 # Define all URL patterns for the project
 urlpatterns = [
     path('admin/', admin.site.urls), # Django admin panel route
@@ -35,11 +44,16 @@ urlpatterns = [
     path("login/", views.login, name="login"), # Route for the login page
     path("start/", views.start, name="start"), # Route for the start page
     path("store/", include('store.urls')), # Include URL configurations from the store app
+    path("events/", include('events.urls')), # Include chatbot and interruption endpoints
     path("", include('gameplay.urls')),  # Include gameplay API endpoints
+    path("metrics", metrics.metrics_view, name="metrics"), # Prometheus metrics for all workers
 ]
 
-# # Serve static and media files during development (when DEBUG = True)
-if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT) # Serve static files (CSS, JS, images in STATIC directory)
+# Serve static files from the in-memory index in every environment
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), staticserve.serve, name='static'),
+]
 
+# # Serve media files during development (when DEBUG = True)
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) # Serve user-uploaded media files (in MEDIA directory)
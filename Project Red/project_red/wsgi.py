@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_red.settings')
 
 application = get_wsgi_application()
+
+# Build URL resolvers, templates, caches and the DB connection before the first request
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,244 @@
+"""
+In-process load and latency benchmarks.
+
+Scenarios are driven through Django's test clients, so the full middleware
+stack and URLconf run without a server: ``Client`` (one per worker thread)
+for WSGI, and ``AsyncClient`` tasks on one event loop for ASGI. Reward
+redemption has no HTTP endpoint, so that scenario saves RedeemedFish through
+the ORM from worker threads.
+
+Every scenario reports throughput, p50/p95/p99 latency and the average
+number of queries per request. Results can be saved as a JSON baseline and
+compared against it later; see the benchmark command.
+"""
+import asyncio
+import json
+import math
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import AsyncClient, Client
+
+# name: (method, path, JSON body or None)
+HTTP_SCENARIOS = {
+    'status': ('GET', '/api/status/', None),
+    'start_fishing': ('POST', '/api/start-fishing/', {'casts': 1}),
+    'start_fishing_batch': ('POST', '/api/start-fishing/', {'casts': 25}),
+    'page_index': ('GET', '/', None),
+    'page_game': ('GET', '/game/', None),
+    'page_login': ('GET', '/login/', None),
+    'page_start': ('GET', '/start/', None),
+    'page_store': ('GET', '/store/', None),
+    'store_catalog': ('GET', '/store/api/catalog/', None),
+}
+
+# Scenarios that call Python code directly instead of going through a handler
+ORM_SCENARIOS = ('redeem',)
+
+SCENARIOS = (*HTTP_SCENARIOS, *ORM_SCENARIOS)
+
+INTERFACES = ('wsgi', 'asgi')
+
+# Username of the player the redemption scenario writes for
+BENCH_USERNAME = 'qa_benchmark'
+
+
+class QueryCounter:
+    """An execute wrapper counting queries on every connection it is installed on."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, **kwargs):
+        """Attach to the current thread's default connection (idempotent)."""
+        conn = connections[DEFAULT_DB_ALIAS]
+        if self not in conn.execute_wrappers:
+            conn.execute_wrappers.append(self)
+            with self._lock:
+                self._connections.append(conn)
+
+    def __enter__(self):
+        # Handlers send request_started on the thread that runs the view's queries
+        request_started.connect(self.install, dispatch_uid=f'qa_query_counter_{id(self)}')
+        return self
+
+    def __exit__(self, *exc):
+        request_started.disconnect(dispatch_uid=f'qa_query_counter_{id(self)}')
+        for conn in self._connections:
+            if self in conn.execute_wrappers:
+                conn.execute_wrappers.remove(self)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed, queries, errors):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput': round(count / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries_per_request': round(queries / count, 2) if count else 0.0,
+    }
+
+
+def _client_kwargs(body):
+    if body is None:
+        return {}
+    return {'data': json.dumps(body), 'content_type': 'application/json'}
+
+
+def _is_error(status_code):
+    return status_code >= 400
+
+
+def run_wsgi(scenario, requests, concurrency):
+    """Run an HTTP scenario through the WSGI handler from `concurrency` threads."""
+    method, path, body = HTTP_SCENARIOS[scenario]
+    local = threading.local()
+    errors = 0
+    errors_lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        started = time.perf_counter()
+        response = getattr(client, method.lower())(path, **_client_kwargs(body))
+        latency = time.perf_counter() - started
+        if _is_error(response.status_code):
+            with errors_lock:
+                errors += 1
+        return latency
+
+    with QueryCounter() as counter, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, counter.count, errors)
+
+
+def run_asgi(scenario, requests, concurrency):
+    """Run an HTTP scenario through the ASGI handler with `concurrency` requests in flight."""
+    method, path, body = HTTP_SCENARIOS[scenario]
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await getattr(client, method.lower())(path, **_client_kwargs(body))
+                latency = time.perf_counter() - started
+            if _is_error(response.status_code):
+                errors += 1
+            return latency
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(requests)))
+        return latencies, time.perf_counter() - started, errors
+
+    with QueryCounter() as counter:
+        latencies, elapsed, errors = asyncio.run(main())
+    return summarize(latencies, elapsed, counter.count, errors)
+
+
+def run_redeem(requests, concurrency):
+    """Save RedeemedFish rows (reward pick plus stats update) from `concurrency` threads."""
+    from django.contrib.auth import get_user_model
+    from database.models import RedeemedFish
+
+    user, _ = get_user_model().objects.get_or_create(username=BENCH_USERNAME)
+    counter = QueryCounter()
+    errors = 0
+    errors_lock = threading.Lock()
+
+    def one(n):
+        nonlocal errors
+        counter.install()
+        started = time.perf_counter()
+        try:
+            RedeemedFish.objects.create(user=user, clicks_before_redeem=(n * 37) % 400)
+        except Exception:
+            with errors_lock:
+                errors += 1
+        return time.perf_counter() - started
+
+    try:
+        with counter, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            latencies = list(pool.map(one, range(requests)))
+            elapsed = time.perf_counter() - started
+    finally:
+        user.delete()
+        connections.close_all()
+    return summarize(latencies, elapsed, counter.count, errors)
+
+
+def run(scenario, interface, requests, concurrency):
+    """Run one scenario and return its summary."""
+    if scenario in ORM_SCENARIOS:
+        return run_redeem(requests, concurrency)
+    if interface == 'asgi':
+        return run_asgi(scenario, requests, concurrency)
+    return run_wsgi(scenario, requests, concurrency)
+
+
+def environment():
+    """Metadata stored with a baseline so comparisons across machines are visible."""
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results, baseline, tolerance, query_tolerance=0.5):
+    """
+    Return regressions of results against a baseline as readable strings.
+
+    Throughput may drop and p95 may grow by `tolerance` (a fraction); queries
+    per request may grow by `query_tolerance`. Errors never may.
+    """
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if current['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {current['throughput']}/s < baseline {base['throughput']}/s")
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {current['p95_ms']} ms > baseline {base['p95_ms']} ms")
+        if current['queries_per_request'] > base['queries_per_request'] + query_tolerance:
+            regressions.append(
+                f"{key}: {current['queries_per_request']} queries/request > baseline {base['queries_per_request']}"
+            )
+        if current['errors'] > base['errors']:
+            regressions.append(f"{key}: {current['errors']} errors > baseline {base['errors']}")
+    return regressions
@@ -0,0 +1,95 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from qa import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs in-process WSGI/ASGI load benchmarks and reports throughput, p50/p95/p99 and queries per request. '
+        'Use --save to write a JSON baseline and --compare to fail on regressions against one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            choices=benchmark.SCENARIOS,
+            help='Scenario to run (repeatable, default: all).',
+        )
+        parser.add_argument(
+            '--interface',
+            choices=[*benchmark.INTERFACES, 'both'],
+            default='both',
+            help='Handler to drive HTTP scenarios through.',
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once.')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests before each scenario.')
+        parser.add_argument('--save', help='Write the results to this JSON baseline file.')
+        parser.add_argument('--compare', help='Compare against this JSON baseline and fail on regressions.')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed throughput drop / p95 growth as a fraction of the baseline (default 0.25).',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        scenarios = options['scenarios'] or list(benchmark.SCENARIOS)
+        interfaces = list(benchmark.INTERFACES) if options['interface'] == 'both' else [options['interface']]
+
+        results = {}
+        # The test clients send Host: testserver, all from one address that rate limits would throttle
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], RATE_LIMIT_ENABLED=False):
+            for scenario in scenarios:
+                for interface in interfaces:
+                    if scenario in benchmark.ORM_SCENARIOS:
+                        interface = 'orm'
+                    key = f'{interface}:{scenario}'
+                    if key in results:
+                        continue
+                    if options['warmup']:
+                        benchmark.run(scenario, interface, options['warmup'], options['concurrency'])
+                    results[key] = benchmark.run(scenario, interface, options['requests'], options['concurrency'])
+                    self.report(key, results[key])
+
+        if options['save']:
+            Path(options['save']).write_text(json.dumps({
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'environment': benchmark.environment(),
+                'settings': {'requests': options['requests'], 'concurrency': options['concurrency']},
+                'results': results,
+            }, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['save']}"))
+
+        if baseline is not None:
+            regressions = benchmark.compare(results, baseline, options['tolerance'])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(line))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def report(self, key, result):
+        self.stdout.write(
+            f"{key:<28} {result['throughput']:>9,.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  "
+            f"{result['queries_per_request']:>5.2f} q/req  errors {result['errors']}"
+        )
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, time as day_start, timezone
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from qa import scaledata
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic users, fish rewards and redemptions for scale testing with chunked bulk_create, '
+        'and reports rows per second. The same --seed and --end give the same data. The redemptions '
+        'leaderboard is only rebuilt with --leaderboard, since that takes longer than generating the rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Users to create.')
+        parser.add_argument('--rewards', type=int, default=0,
+                            help='FishReward rows to create (default: use the existing rewards).')
+        parser.add_argument('--redemptions', type=int, default=1000000, help='RedeemedFish rows to create.')
+        parser.add_argument('--days', type=int, default=365, help='Days the redemptions are spread over.')
+        parser.add_argument('--end', help='Date (YYYY-MM-DD, UTC) the redemptions end at; default today.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--chunk-size', type=int, default=scaledata.DEFAULT_CHUNK_SIZE,
+                            help='Rows per bulk_create and transaction.')
+        parser.add_argument('--no-stats', action='store_true',
+                            help='Do not build UserRedemptionStats rows for the new users.')
+        parser.add_argument('--leaderboard', action='store_true',
+                            help='Rebuild the redemptions leaderboard afterwards; timed separately.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to write to.')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['rewards'], options['redemptions']) < 0:
+            raise CommandError('Row counts must not be negative')
+        if options['chunk_size'] < 1 or options['days'] < 1:
+            raise CommandError('--chunk-size and --days must be at least 1')
+        try:
+            end = datetime.fromisoformat(options['end']).date() if options['end'] else datetime.now(timezone.utc).date()
+        except ValueError:
+            raise CommandError(f"--end must be a date like 2026-01-31, not {options['end']!r}")
+        # Midnight, so runs on the same day with the same seed produce the same timestamps
+        end = datetime.combine(end, day_start(), tzinfo=timezone.utc)
+
+        last_report = [0.0]
+
+        def progress(table, done, total, seconds):
+            if done == total or seconds - last_report[0] >= 5:
+                last_report[0] = seconds
+                self.stdout.write(f'{table}: {done:,}/{total:,} rows, {done / max(seconds, 1e-9):,.0f} rows/s')
+
+        generator = scaledata.Generator(
+            seed=options['seed'], chunk_size=options['chunk_size'], using=options['database'], progress=progress,
+        )
+        started = time.perf_counter()
+        try:
+            generator.generate(
+                users=options['users'],
+                rewards=options['rewards'],
+                redemptions=options['redemptions'],
+                end=end,
+                days=options['days'],
+                stats=not options['no_stats'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('')
+        total_rows = 0
+        for table, (rows, seconds) in generator.timings.items():
+            total_rows += rows
+            count = f'{rows:>12,} rows' if rows else ''
+            rate = f'{rows / seconds:>12,.0f} rows/s' if rows and seconds else ''
+            self.stdout.write(f'{table:<28} {count:>17} {seconds:>8.2f}s {rate}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {total_rows:,} rows in {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s overall)'
+        ))
+        for warning in generator.warnings:
+            self.stdout.write(self.style.WARNING(warning))
+
+        if not options['redemptions']:
+            return
+        if not options['leaderboard'] or options['database'] != DEFAULT_DB_ALIAS:
+            # rebuild_leaderboard only works on the default database
+            self.stdout.write(self.style.WARNING(
+                'The redemptions leaderboard does not include the new redemptions; run rebuild_leaderboard'
+            ))
+            return
+        # Timed apart from the rows above: on large runs it takes several times as long as generating them
+        started = time.perf_counter()
+        call_command('rebuild_leaderboard', stdout=self.stdout, stderr=self.stderr)
+        self.stdout.write(f'Leaderboard rebuild took {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,294 @@
+"""
+Synthetic users, rewards and redemptions for scale testing.
+
+Rows are built in chunks, one transaction per chunk, with foreign key checks
+disabled until the end (the way loaddata does it). Users and rewards go
+through bulk_create. Redemptions, the table that gets millions of rows, are
+written as prepared value tuples with executemany instead. bulk_create
+managed about 12k rows/s there, mostly spent building model instances and
+preparing each field, so a 10M-row run would have taken a quarter of an
+hour. All randomness comes from one random.Random(seed), so the same seed and
+end date give the same rows.
+
+The distributions follow how the game is played:
+
+- Tiers come from clicks_before_redeem exactly as in
+  RedeemedFish.assign_fish_reward (TEXT below 150, IMG up to 300, GIF
+  above). Most redemptions come from short sessions, so TIER_WEIGHTS favours
+  TEXT, and clicks inside each tier are skewed towards the low end with a
+  long tail for GIF.
+- Player activity is heavy-tailed: a few users account for most
+  redemptions (USER_SKEW).
+- redeemed_at rises with the primary key, as it does in production, spread
+  evenly over the requested number of days.
+
+Neither path runs RedeemedFish.save() or signals, so no UserRedemptionStats
+updates or reward notifications happen per row.
+rebuild_stats() computes the stats rows of newly generated users afterwards
+with grouped queries. Redemptions added to existing users leave their stats
+as they were, since recomputing them would drop archived redemptions;
+generate() adds a warning to Generator.warnings when that happens. The
+redemptions leaderboard is not touched either; generate_scale_data
+--leaderboard rebuilds it afterwards and times that on its own.
+"""
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, IntegerField, Max, Sum
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from database import reward_pool
+from database.models import FishReward, RedeemedFish, UserRedemptionStats
+
+# Share of redemptions per tier
+TIER_WEIGHTS = {'TEXT': 0.70, 'IMG': 0.22, 'GIF': 0.08}
+
+# Share of generated rewards per tier
+REWARD_WEIGHTS = {'TEXT': 0.6, 'IMG': 0.25, 'GIF': 0.15}
+
+# clicks_before_redeem range per tier, inclusive; GIF is open-ended
+TIER_CLICKS = {'TEXT': (1, 149), 'IMG': (150, 300), 'GIF': (301, None)}
+
+# Mean of the exponential tail above 300 clicks
+GIF_TAIL_MEAN = 120.0
+
+# User index = users * random() ** USER_SKEW; higher means more concentrated activity
+USER_SKEW = 3.0
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Ids per IN (...) lookup, well under SQLite's bound parameter limit
+LOOKUP_BATCH = 5000
+
+# SQLite settings for the duration of a run. A crash mid-run can lose the
+# last chunks, which is fine for generated data; the index B-trees of a
+# multi-million row table need far more than the usual 20 MB of cache.
+BULK_LOAD_PRAGMAS = {'synchronous': 'OFF', 'cache_size': -512 * 1024}
+
+
+def _skewed(rng, low, high):
+    """Integer in [low, high] weighted towards low (min of two uniforms)."""
+    return low + int(min(rng.random(), rng.random()) * (high - low + 1))
+
+
+def draw_clicks(rng, tier):
+    low, high = TIER_CLICKS[tier]
+    if high is None:
+        return low + int(rng.expovariate(1.0 / GIF_TAIL_MEAN))
+    return _skewed(rng, low, high)
+
+
+class Generator:
+    """Writes synthetic rows to one database; counts what it wrote."""
+
+    def __init__(self, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, using=DEFAULT_DB_ALIAS, progress=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.using = using
+        self.progress = progress or (lambda table, done, total, seconds: None)
+        self.timings = {}  # {table: (rows, seconds)}
+        self.warnings = []
+
+    def _record(self, table, rows, seconds):
+        previous_rows, previous_seconds = self.timings.get(table, (0, 0.0))
+        self.timings[table] = (previous_rows + rows, previous_seconds + seconds)
+
+    def _insert(self, model, total, build):
+        """bulk_create `total` rows from build(start, count) in chunks, one transaction each."""
+        started = time.perf_counter()
+        done = 0
+        while done < total:
+            count = min(self.chunk_size, total - done)
+            objects = build(done, count)
+            with transaction.atomic(using=self.using):
+                model.objects.using(self.using).bulk_create(objects, batch_size=self.chunk_size)
+            done += count
+            self.progress(model._meta.db_table, done, total, time.perf_counter() - started)
+        self._record(model._meta.db_table, total, time.perf_counter() - started)
+
+    def _insert_rows(self, model, field_names, total, build):
+        """
+        INSERT `total` rows of database values from build(start, count) with executemany.
+
+        For tables too big for bulk_create, which spends several microseconds
+        per field preparing values.
+        """
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        columns = [model._meta.get_field(name).column for name in field_names]
+        sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(map(quote, columns))}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))})'
+        )
+        started = time.perf_counter()
+        done = 0
+        while done < total:
+            count = min(self.chunk_size, total - done)
+            rows = build(done, count)
+            with transaction.atomic(using=self.using), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            done += count
+            self.progress(model._meta.db_table, done, total, time.perf_counter() - started)
+        self._record(model._meta.db_table, total, time.perf_counter() - started)
+
+    def users(self, count, prefix='scale_'):
+        """Create users named prefix + number, numbered after the highest existing number; returns their ids."""
+        User = get_user_model()
+        manager = User.objects.using(self.using)
+        # Not a count: after deletions the count falls below the highest number in use
+        last = manager.filter(username__regex=rf'^{re.escape(prefix)}[0-9]+$').aggregate(
+            last=Max(Cast(Substr('username', len(prefix) + 1), IntegerField()))
+        )['last']
+        first = 0 if last is None else last + 1
+        # One unusable hash for every row; generating a random one each is slow
+        password = UNUSABLE_PASSWORD_PREFIX + 'scale'
+
+        def build(start, n):
+            return [User(username=f'{prefix}{first + start + i}', password=password) for i in range(n)]
+
+        self._insert(User, count, build)
+        names = [f'{prefix}{first + i}' for i in range(count)]
+        ids = []
+        for start in range(0, count, LOOKUP_BATCH):
+            ids += manager.filter(username__in=names[start:start + LOOKUP_BATCH]).values_list('pk', flat=True)
+        return sorted(ids)
+
+    def rewards(self, count):
+        """Create FishReward rows split across tiers by REWARD_WEIGHTS."""
+        first = FishReward.objects.using(self.using).count()
+        tiers = list(REWARD_WEIGHTS)
+        weights = list(REWARD_WEIGHTS.values())
+
+        def build(start, n):
+            objects = []
+            for i in range(start, start + n):
+                tier = self.rng.choices(tiers, weights)[0]
+                number = first + i
+                if tier == 'TEXT':
+                    objects.append(FishReward(fish_type=tier, message=f'Synthetic fish #{number} (seed {self.seed})'))
+                else:
+                    extension = 'gif' if tier == 'GIF' else 'jpg'
+                    objects.append(FishReward(fish_type=tier, media_url=f'/media/scale/{self.seed}/{number}.{extension}'))
+            return objects
+
+        self._insert(FishReward, count, build)
+        reward_pool.invalidate()
+
+    def redemptions(self, count, user_ids, end, days):
+        """Create RedeemedFish rows for user_ids with times rising evenly over `days` days up to `end`."""
+        rewards = {tier: [] for tier in TIER_WEIGHTS}
+        for pk, fish_type in FishReward.objects.using(self.using).values_list('pk', 'fish_type').order_by('pk'):
+            rewards.setdefault(fish_type, []).append(pk)
+        missing = [tier for tier, pks in rewards.items() if not pks and TIER_WEIGHTS.get(tier)]
+        if missing:
+            raise ValueError(f"No rewards for tier(s) {', '.join(missing)}; load or generate rewards first")
+
+        rng = self.rng
+        tiers = list(TIER_WEIGHTS)
+        cumulative = []
+        total_weight = 0.0
+        for tier in tiers:
+            total_weight += TIER_WEIGHTS[tier]
+            cumulative.append(total_weight)
+        # Naive UTC values skip the per-row time zone conversion in the adapter;
+        # Django's connections run in UTC
+        start_time = timezone.make_naive(end, dt_timezone.utc) - timedelta(days=days)
+        step = timedelta(days=days) / max(count, 1)
+        users = len(user_ids)
+        adapt_datetime = connections[self.using].ops.adapt_datetimefield_value
+
+        def build(start, n):
+            rows = []
+            for i in range(start, start + n):
+                pick = rng.random() * total_weight
+                tier = next(t for t, limit in zip(tiers, cumulative) if pick < limit)
+                rows.append((
+                    user_ids[int(users * rng.random() ** USER_SKEW)],
+                    draw_clicks(rng, tier),
+                    rng.choice(rewards[tier]),
+                    adapt_datetime(start_time + step * (i + rng.random())),
+                ))
+            return rows
+
+        self._insert_rows(
+            RedeemedFish, ('user', 'clicks_before_redeem', 'fish_reward', 'redeemed_at'), count, build,
+        )
+
+    def rebuild_stats(self, user_ids):
+        """Recompute UserRedemptionStats for user_ids from their redemptions, one grouped query per chunk."""
+        started = time.perf_counter()
+        rows = []
+        for start in range(0, len(user_ids), LOOKUP_BATCH):
+            totals = (
+                RedeemedFish.objects.using(self.using)
+                .filter(user_id__in=user_ids[start:start + LOOKUP_BATCH])
+                .values('user_id')
+                .annotate(
+                    redemption_count=Count('pk'),
+                    total_clicks_before_redeem=Sum('clicks_before_redeem'),
+                    max_clicks_before_redeem=Max('clicks_before_redeem'),
+                    last_redeemed_at=Max('redeemed_at'),
+                )
+                .order_by()
+            )
+            rows += [UserRedemptionStats(**values) for values in totals]
+        fields = ['redemption_count', 'total_clicks_before_redeem', 'max_clicks_before_redeem', 'last_redeemed_at']
+        with transaction.atomic(using=self.using):
+            UserRedemptionStats.objects.using(self.using).bulk_create(
+                rows, batch_size=self.chunk_size, update_conflicts=True, unique_fields=['user'], update_fields=fields,
+            )
+        self.timings[UserRedemptionStats._meta.db_table] = (len(rows), time.perf_counter() - started)
+
+    @contextmanager
+    def _bulk_load_pragmas(self):
+        """On SQLite, skip fsyncs and enlarge the page cache while loading; restores the usual pragmas after."""
+        connection = connections[self.using]
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        from core.dbconfig import sqlite_pragmas
+
+        usual = sqlite_pragmas(self.using)
+        with connection.cursor() as cursor:
+            for name, value in BULK_LOAD_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                for name in BULK_LOAD_PRAGMAS:
+                    if name in usual:
+                        cursor.execute(f'PRAGMA {name} = {usual[name]}')
+
+    def generate(self, users, rewards, redemptions, end, days, stats=True):
+        """Generate everything with foreign key checks deferred to one check at the end."""
+        connection = connections[self.using]
+        with self._bulk_load_pragmas(), connection.constraint_checks_disabled():
+            if rewards:
+                self.rewards(rewards)
+            user_ids = self.users(users) if users else []
+            if redemptions:
+                if not user_ids:
+                    user_ids = sorted(get_user_model().objects.using(self.using).values_list('pk', flat=True))
+                if not user_ids:
+                    raise ValueError('No users to attach redemptions to; pass --users')
+                self.redemptions(redemptions, user_ids, end, days)
+        tables = [model._meta.db_table for model in (RedeemedFish, FishReward)]
+        started = time.perf_counter()
+        connection.check_constraints(table_names=tables)
+        self.timings['constraint check'] = (0, time.perf_counter() - started)
+        if stats and redemptions and users:
+            self.rebuild_stats(user_ids)
+        elif stats and redemptions:
+            self.warnings.append(
+                f'{redemptions:,} redemptions were added to existing users; their UserRedemptionStats rows '
+                'were not updated and are now stale'
+            )
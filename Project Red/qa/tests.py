@@ -1,3 +1,49 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from gameplay.models import LeaderboardScore
+
+from . import scaledata
+
+
+class GeneratorUsersTests(TestCase):
+    def usernames(self):
+        return sorted(User.objects.filter(username__startswith='scale_').values_list('username', flat=True))
+
+    def test_numbers_after_the_highest_existing_suffix(self):
+        scaledata.Generator(seed=1).users(3)
+        User.objects.filter(username='scale_0').delete()
+        User.objects.create_user('scale_extra')
+        scaledata.Generator(seed=2).users(2)
+        self.assertEqual(
+            self.usernames(), ['scale_1', 'scale_2', 'scale_3', 'scale_4', 'scale_extra'],
+        )
+
+    def test_starts_at_zero_without_numbered_users(self):
+        User.objects.create_user('scale_extra')
+        scaledata.Generator().users(1)
+        self.assertIn('scale_0', self.usernames())
+
+
+class GenerateScaleDataCommandTests(TransactionTestCase):
+    # generate() changes SQLite pragmas, which cannot happen inside the transaction TestCase wraps tests in
+    def run_command(self, *args):
+        out = StringIO()
+        call_command(
+            'generate_scale_data', '--users', '3', '--rewards', '50', '--redemptions', '20', '--end', '2026-01-31',
+            *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_leaderboard_is_skipped_by_default(self):
+        output = self.run_command()
+        self.assertIn('run rebuild_leaderboard', output)
+        self.assertFalse(LeaderboardScore.objects.exists())
+
+    def test_leaderboard_rebuild_is_timed_separately(self):
+        output = self.run_command('--leaderboard')
+        self.assertIn('Leaderboard rebuild took', output)
+        self.assertTrue(LeaderboardScore.objects.exists())
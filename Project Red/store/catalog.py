@@ -0,0 +1,76 @@
+"""
+Per-worker cache of the store catalog as a ready-to-send JSON body.
+
+The body is built once from the active products and reused for every
+request. Its version is a hash of the content, which doubles as the ETag,
+so clients holding the current catalog get a 304 without any query.
+
+Saves and deletes in this process invalidate the cache through signals.
+Other workers pick up changes after STORE_CATALOG_TTL seconds at the latest;
+bulk writes that bypass signals must call invalidate() themselves.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Product
+
+# Product fields sent to the client
+CATALOG_FIELDS = ('id', 'name', 'price', 'category', 'description', 'visual', 'effect', 'stackable')
+
+_lock = threading.Lock()
+_catalog = None   # (body bytes, version)
+_loaded_at = 0.0
+_generation = 0   # bumped on every invalidation
+
+
+def _ttl():
+    return getattr(settings, 'STORE_CATALOG_TTL', 300)
+
+
+def _build():
+    """Serialize the active products in one query and publish the result."""
+    global _catalog, _loaded_at
+    generation = _generation
+    products = list(Product.objects.filter(is_active=True).order_by('id').values(*CATALOG_FIELDS))
+    content = json.dumps(products, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    version = hashlib.sha1(content.encode()).hexdigest()[:16]
+    body = json.dumps(
+        {'success': True, 'version': version, 'products': products},
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    catalog = (body, version)
+
+    with _lock:
+        # Only publish if nothing was invalidated while we were querying
+        if generation == _generation:
+            _catalog, _loaded_at = catalog, time.monotonic()
+    return catalog
+
+
+def get_catalog():
+    """Return (json body, version), rebuilding when missing or older than the TTL."""
+    catalog = _catalog
+    if catalog is None or time.monotonic() - _loaded_at > _ttl():
+        catalog = _build()
+    return catalog
+
+
+def invalidate():
+    """Drop the cached catalog so the next request rebuilds it."""
+    global _catalog, _generation
+    with _lock:
+        _catalog = None
+        _generation += 1
+
+
+@receiver(post_save, sender=Product, dispatch_uid='store_catalog_post_save')
+@receiver(post_delete, sender=Product, dispatch_uid='store_catalog_post_delete')
+def _invalidate_on_change(sender, **kwargs):
+    invalidate()
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.PositiveIntegerField(help_text='Stable product id shared with the game client.', primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Display name of the item.', max_length=100)),
+                ('price', models.PositiveIntegerField(help_text='Base price in coins; stackable items get dearer per owned tier.')),
+                ('category', models.CharField(choices=[('baits', 'Baits'), ('rods', 'Rods'), ('upgrades', 'Upgrades'), ('decorations', 'Decorations')], help_text='Store section the item is listed under.', max_length=20)),
+                ('description', models.CharField(blank=True, help_text='Short description shown on the product card.', max_length=255)),
+                ('visual', models.CharField(blank=True, help_text='Emoji shown as the product image.', max_length=32)),
+                ('effect', models.CharField(blank=True, help_text='What owning the item does.', max_length=100)),
+                ('stackable', models.BooleanField(default=True, help_text='Whether the item can be bought more than once.')),
+                ('is_active', models.BooleanField(default=True, help_text='Inactive products are hidden from the catalog and cannot be bought.')),
+            ],
+            options={
+                'verbose_name': 'Product',
+                'verbose_name_plural': 'Products',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0, help_text='Units owned.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the item was last bought.')),
+                ('user', models.ForeignKey(db_index=False, help_text='The player who owns the item.', on_delete=django.db.models.deletion.CASCADE, related_name='inventory_items', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(help_text='The product owned.', on_delete=django.db.models.deletion.PROTECT, related_name='inventory_items', to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Inventory Item',
+                'verbose_name_plural': 'Inventory Items',
+                'constraints': [models.UniqueConstraint(fields=('user', 'product'), name='unique_inventory_item')],
+            },
+        ),
+    ]
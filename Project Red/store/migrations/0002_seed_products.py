@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# The catalog store.js used to hard-code; ids are referenced by the catch engine
+PRODUCTS = [
+    (1, 'Magic Worms', 15, 'baits', 'Enchanted earthworms that glow underwater', '🪱✨', 'Attracts rare fish'),
+    (2, 'Crystal Lures', 25, 'baits', 'Shimmering crystal that mesmerizes fish', '💎🎣', 'Higher catch rate'),
+    (3, 'Rainbow Flies', 35, 'baits', 'Colorful flies that change color mid-flight', '🦟🌈', 'Attracts exotic species'),
+    (4, 'Wooden Rod', 50, 'rods', 'A sturdy oak fishing rod for beginners', '🎣🌳', 'Basic fishing capability'),
+    (5, 'Steel Rod', 150, 'rods', 'Professional-grade steel rod with carbon fiber grip', '🎣⚔️', 'Improved casting distance'),
+    (6, 'Mystic Rod', 500, 'rods', 'Ancient rod imbued with ocean magic', '🎣🔮', 'Can catch legendary fish'),
+    (7, 'Auto-Clicker', 100, 'upgrades', 'Automatically clicks for you every 2 seconds', '🤖👆', 'Passive income generation'),
+    (8, 'Luck Booster', 200, 'upgrades', 'Increases your fishing luck by 25%', '🍀📈', 'Better catch quality'),
+    (9, 'Speed Enhancer', 300, 'upgrades', 'Reduces fishing time by 50%', '⚡🏃‍♂️', 'Faster fishing cycles'),
+    (10, 'Fishing Gnome', 75, 'decorations', 'A cheerful gnome to watch over your fishing spot', '🧙‍♂️🎣', 'Provides moral support'),
+    (11, 'Lucky Anchor', 125, 'decorations', 'An ornate anchor that brings good fortune', '⚓✨', 'Slight luck increase'),
+    (12, 'Tropical Plants', 60, 'decorations', 'Beautiful plants to decorate your fishing area', '🌺🌿', 'Aesthetic enhancement'),
+]
+
+
+def seed_products(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Product.objects.using(schema_editor.connection.alias).bulk_create(
+        [
+            Product(
+                id=id, name=name, price=price, category=category, description=description,
+                visual=visual, effect=effect, stackable=category != 'rods',
+            )
+            for id, name, price, category, description, visual, effect in PRODUCTS
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_products(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Product.objects.using(schema_editor.connection.alias).filter(id__in=[row[0] for row in PRODUCTS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_products, remove_products),
+    ]
@@ -1,3 +1,119 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from gameplay.engine import js_round
+
+# Price multiplier applied per owned unit of a stackable product
+PRICE_SCALE = 1.25
+
+
+# Model to store an item sold in the store
+class Product(models.Model):
+    """
+    A store item. The ids match the ones game.js and gameplay.engine use
+    for inventory effects, so they are fixed rather than auto-assigned.
+    """
+    CATEGORY_CHOICES = [
+        ('baits', 'Baits'),
+        ('rods', 'Rods'),
+        ('upgrades', 'Upgrades'),
+        ('decorations', 'Decorations'),
+    ]
+
+    id = models.PositiveIntegerField(
+        primary_key=True,
+        help_text="Stable product id shared with the game client."
+    )
+    name = models.CharField(
+        max_length=100,
+        help_text="Display name of the item."
+    )
+    price = models.PositiveIntegerField(
+        help_text="Base price in coins; stackable items get dearer per owned tier."
+    )
+    category = models.CharField(
+        max_length=20,
+        choices=CATEGORY_CHOICES,
+        help_text="Store section the item is listed under."
+    )
+    description = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Short description shown on the product card."
+    )
+    visual = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text="Emoji shown as the product image."
+    )
+    effect = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="What owning the item does."
+    )
+    stackable = models.BooleanField(
+        default=True,
+        help_text="Whether the item can be bought more than once."
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text="Inactive products are hidden from the catalog and cannot be bought."
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Product"
+        verbose_name_plural = "Products"
+
+    def price_for(self, owned):
+        """Price of the next unit given how many the player owns (25% more per tier, like store.js)."""
+        if not self.stackable:
+            return self.price
+        return js_round(self.price * PRICE_SCALE ** owned)
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"{self.name} ({self.price} coins)"
+
+
+# Model to store how many of a product a player owns
+class InventoryItem(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='inventory_items',
+        db_index=False,  # covered by unique_inventory_item
+        help_text="The player who owns the item."
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.PROTECT,
+        related_name='inventory_items',
+        help_text="The product owned."
+    )
+    quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Units owned."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the item was last bought."
+    )
+
+    class Meta:
+        verbose_name = "Inventory Item"
+        verbose_name_plural = "Inventory Items"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_inventory_item'),
+        ]
+
+    @classmethod
+    def owned_by(cls, user):
+        """A player's items as [{'id': ..., 'quantity': ...}], the shape store.js and the catch engine use."""
+        items = cls.objects.filter(user=user, quantity__gt=0).order_by('product_id')
+        return [{'id': product_id, 'quantity': quantity}
+                for product_id, quantity in items.values_list('product_id', 'quantity')]
+
+    def __str__(self):
+        # Display format for admin or debugging
+        return f"user {self.user_id}: {self.quantity} x product {self.product_id}"
@@ -0,0 +1,93 @@
+"""
+Race-free purchases against the server-side coin balance.
+
+A purchase never reads a balance and writes it back. Inside one transaction
+it claims the next inventory tier with a compare-and-set on the owned
+quantity, then charges the player with a single conditional
+``UPDATE ... SET coins = coins - price WHERE coins >= price``. If either
+statement matches no row, the transaction is rolled back: a lost tier race
+is retried at the new price, and a failed charge means insufficient funds.
+Concurrent buyers therefore can neither overspend nor buy a tier twice.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from gameplay.models import PlayerState
+from gameplay.writebehind import buffer as player_state_buffer
+
+from .models import InventoryItem, Product
+
+# Tier races lost before giving up; each retry re-reads the owned quantity
+MAX_ATTEMPTS = 5
+
+
+class PurchaseError(Exception):
+    """A purchase that was refused; status is the HTTP status to answer with."""
+
+    status = 400
+
+
+class UnknownProduct(PurchaseError):
+    status = 404
+
+
+class AlreadyOwned(PurchaseError):
+    status = 409
+
+
+class InsufficientFunds(PurchaseError):
+    status = 402
+
+    def __init__(self, price):
+        super().__init__(f'Not enough coins (costs {price})')
+        self.price = price
+
+
+class Contended(PurchaseError):
+    status = 409
+
+
+def purchase(user, product_id):
+    """
+    Buy one unit of a product for a user.
+
+    Returns (product, price paid, quantity now owned, coin balance).
+    Raises a PurchaseError subclass when the purchase is refused.
+    """
+    try:
+        product = Product.objects.get(pk=product_id, is_active=True)
+    except (Product.DoesNotExist, ValueError, TypeError):
+        raise UnknownProduct(f'Unknown product: {product_id}')
+
+    # Coins earned by recent casts may still be waiting in the write-behind buffer
+    if any(player_state_buffer.pending_for(user.pk)):
+        player_state_buffer.flush()
+
+    owned_items = InventoryItem.objects.filter(user=user, product=product)
+    for _ in range(MAX_ATTEMPTS):
+        owned = owned_items.values_list('quantity', flat=True).first() or 0
+        if owned and not product.stackable:
+            raise AlreadyOwned(f'{product.name} is already owned')
+        price = product.price_for(owned)
+
+        try:
+            with transaction.atomic():
+                # Upsert: make sure the row exists, then move it from the tier we priced to the next
+                InventoryItem.objects.bulk_create(
+                    [InventoryItem(user=user, product=product, quantity=0)], ignore_conflicts=True
+                )
+                if not owned_items.filter(quantity=owned).update(quantity=F('quantity') + 1, updated_at=Now()):
+                    raise Contended('Someone else bought this tier first')
+                charged = PlayerState.objects.filter(user=user, coins__gte=price).update(
+                    coins=F('coins') - price, updated_at=Now()
+                )
+                if not charged:
+                    raise InsufficientFunds(price)
+        except Contended:
+            continue
+
+        coins = PlayerState.objects.filter(user=user).values_list('coins', flat=True).first()
+        return product, price, owned + 1, coins + player_state_buffer.pending_for(user.pk)[0]
+
+    raise Contended('Too many concurrent purchases, please retry')
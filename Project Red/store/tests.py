@@ -1,3 +1,124 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from gameplay import players
+from gameplay.models import PlayerState
+from gameplay.writebehind import buffer as player_state_buffer
+
+from .models import InventoryItem, Product
+from .purchases import AlreadyOwned, InsufficientFunds, purchase
+
+
+class PurchaseRaceTests(TestCase):
+    """
+    Two buyers racing for the last unit. The in-memory test database can't
+    take writes from two threads, so the race is replayed deterministically:
+    the rival purchase runs to completion after the first buyer has read the
+    owned quantity and priced it, but before its compare-and-set.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('racer')
+        self.rod = Product.objects.create(id=901, name='Test Rod', price=50, category='rods', stackable=False)
+        self.worms = Product.objects.create(id=902, name='Test Worms', price=15, category='baits')
+
+    def race(self, product):
+        """Start a purchase, let a rival one finish in the middle of it; returns the rival's result."""
+        price_for = Product.price_for
+        rival = []
+
+        def interleave(priced, owned):
+            if not rival:
+                rival.append(None)
+                rival[0] = purchase(self.user, product.pk)
+            return price_for(priced, owned)
+
+        with mock.patch.object(Product, 'price_for', interleave):
+            purchase(self.user, product.pk)
+        return rival[0]
+
+    def test_last_unit_is_bought_and_charged_once(self):
+        # Enough coins for two, but a non-stackable product can only be owned once
+        PlayerState.objects.create(user=self.user, coins=100)
+        with self.assertRaises(AlreadyOwned):
+            self.race(self.rod)
+        self.assertEqual(PlayerState.objects.get(user=self.user).coins, 50)
+        self.assertEqual(InventoryItem.objects.get(user=self.user, product=self.rod).quantity, 1)
+
+    def test_racing_buyers_cannot_overspend(self):
+        # Coins for exactly one unit; the loser retries at the next tier's price and can't pay it
+        PlayerState.objects.create(user=self.user, coins=15)
+        with self.assertRaises(InsufficientFunds) as refused:
+            self.race(self.worms)
+        self.assertEqual(refused.exception.price, self.worms.price_for(1))
+        self.assertEqual(PlayerState.objects.get(user=self.user).coins, 0)
+        self.assertEqual(InventoryItem.objects.get(user=self.user, product=self.worms).quantity, 1)
+
+    def test_insufficient_funds_rolls_back_the_claimed_tier(self):
+        PlayerState.objects.create(user=self.user, coins=10)
+        with self.assertRaises(InsufficientFunds):
+            purchase(self.user, self.worms.pk)
+        self.assertEqual(PlayerState.objects.get(user=self.user).coins, 10)
+        self.assertEqual(InventoryItem.owned_by(self.user), [])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class PurchaseViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+        self.client.force_login(self.user)
+        self.worms = Product.objects.create(id=902, name='Test Worms', price=15, category='baits')
+
+    def buy(self, product_id):
+        return self.client.post(
+            '/store/api/purchase/', {'product_id': product_id}, content_type='application/json'
+        )
+
+    def test_insufficient_coins_answers_402_and_changes_nothing(self):
+        PlayerState.objects.create(user=self.user, coins=10)
+        response = self.buy(self.worms.pk)
+
+        self.assertEqual(response.status_code, 402)
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(PlayerState.objects.get(user=self.user).coins, 10)
+        self.assertEqual(InventoryItem.owned_by(self.user), [])
+
+    def test_purchase_answers_the_new_balance_and_next_price(self):
+        PlayerState.objects.create(user=self.user, coins=40)
+        response = self.buy(self.worms.pk)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['price'], data['quantity'], data['coins']), (15, 1, 25))
+        self.assertEqual(data['next_price'], self.worms.price_for(1))
+        self.assertEqual(InventoryItem.owned_by(self.user), [{'id': self.worms.pk, 'quantity': 1}])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], RATE_LIMIT_ENABLED=False)
+class GuestPurchaseTests(TestCase):
+    def setUp(self):
+        self.worms = Product.objects.create(id=902, name='Test Worms', price=15, category='baits')
+
+    def buy(self, product_id):
+        return self.client.post(
+            '/store/api/purchase/', {'product_id': product_id}, content_type='application/json'
+        )
+
+    def test_guest_without_coins_is_refused_with_402(self):
+        self.assertEqual(self.buy(self.worms.pk).status_code, 402)
+        self.assertEqual(self.client.get('/store/api/inventory/').json(), {'success': True, 'inventory': []})
+
+    def test_guest_spends_coins_earned_by_casting(self):
+        self.client.post('/api/start-fishing/', {'casts': 1}, content_type='application/json')
+        guest = User.objects.get(pk=self.client.session[players.SESSION_KEY])
+        player_state_buffer.flush()
+        PlayerState.objects.filter(user=guest).update(coins=20)
+
+        response = self.buy(self.worms.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['coins'], 5)
+        self.assertEqual(
+            self.client.get('/store/api/inventory/').json()['inventory'], [{'id': self.worms.pk, 'quantity': 1}]
+        )
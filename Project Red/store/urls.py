@@ -7,4 +7,7 @@ app_name = 'store'
 # URL to be used to navigate to the store
 urlpatterns = [
     path('', views.storefront, name='storefront'),
+    path('api/catalog/', views.catalog, name='catalog'),
+    path('api/inventory/', views.inventory, name='inventory'),
+    path('api/purchase/', views.purchase, name='purchase'),
 ]
@@ -1,5 +1,72 @@
 from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_safe
+import json
 
+from gameplay import players
+
+from . import catalog as store_catalog
+from .models import InventoryItem
+from .purchases import PurchaseError, purchase as make_purchase
+
+@ensure_csrf_cookie
 def storefront(request):
-    """Store front page view"""
+    """Store front page view; sets the CSRF cookie store.js sends with purchases"""
     return render(request, 'store/storefront.html')
+
+@require_safe
+def catalog(request):
+    """
+    API endpoint for the product catalog.
+
+    The body carries a content version that is also sent as the ETag, so a
+    client revalidating with If-None-Match gets a 304 when nothing changed.
+    """
+    body, version = store_catalog.get_catalog()
+    etag = f'"{version}"'
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+def inventory(request):
+    """API endpoint for the player's owned items"""
+    player = players.player_for(request)
+    return JsonResponse({'success': True, 'inventory': InventoryItem.owned_by(player) if player else []})
+
+def purchase(request):
+    """
+    API endpoint for buying one unit of a product with server-side coins.
+
+    Accepts {"product_id": N}. Answers 402 when the player cannot afford the
+    item and 409 when a single-item product is already owned. Guests buy
+    with the coins of their session's player (see gameplay.players).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        product_id = int(payload['product_id'])
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'error': 'product_id is required'}, status=400)
+
+    try:
+        product, price, quantity, coins = make_purchase(players.player_for(request, create=True), product_id)
+    except PurchaseError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+
+    return JsonResponse({
+        'success': True,
+        'product_id': product.id,
+        'price': price,
+        'quantity': quantity,
+        'coins': coins,
+        'next_price': None if not product.stackable else product.price_for(quantity),
+    })